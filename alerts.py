@@ -0,0 +1,291 @@
+"""
+알림 - 직전 실행 스냅샷과 이번 스냅샷(snapshot.py)을 비교해 조건을 새로 만족한 종목을 알립니다.
+
+전 종목을 티커 코드로 맞춘 뒤 규칙마다 배열 비교 한 번으로 판정하므로 종목이 수천 개여도 주기마다 평가할 수 있습니다.
+규칙은 직전에는 만족하지 않다가 이번에 만족한 경우(상향/하향 돌파)에만 알리고, 같은 종목/규칙/내용의 알림은
+싱크마다 ALERT_DEDUP_HOURS 동안 다시 보내지 않습니다. 전송에 실패한 알림은 보낸 것으로 기록하지 않고 다음 실행에서 다시 보냅니다.
+
+규칙:
+- ma_signal: 이동평균 배열 상태가 바뀜 (예: 역배열 -> 골든크로스)
+- rsi_overbought / rsi_oversold: RSI30이 ALERT_RSI_HIGH 상향 돌파 / ALERT_RSI_LOW 하향 돌파
+- high52 / low52: 현재가가 직전 52주 최고가를 넘음 / 최저가 아래로 내려감
+- volume_spike: 5일평균거래량대비가 ALERT_VOLUME_RATIO 상향 돌파
+
+알림은 AlertSink를 상속한 싱크로 보냅니다 (ALERT_SINKS: file, webhook).
+"""
+
+import os
+import json
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from indicators import MA_SIGNALS, RSI_PERIOD
+from metrics import metrics
+from snapshot import SNAPSHOT_DIR, Snapshot, SnapshotStore, align
+
+ALERT_SINKS = os.environ.get('ALERT_SINKS', 'file')  # 쉼표로 구분 (빈 값이면 알림 안 함)
+ALERT_RULES = os.environ.get('ALERT_RULES', '')  # 쉼표로 구분 (빈 값이면 모든 규칙)
+ALERT_FILE_PATH = os.environ.get('ALERT_FILE_PATH', '.cache/alerts.jsonl')  # file 싱크 위치
+ALERT_WEBHOOK_URL = os.environ.get('ALERT_WEBHOOK_URL', '')  # webhook 싱크 주소 (Slack 호환)
+ALERT_STATE_PATH = os.environ.get('ALERT_STATE_PATH', '.cache/alert_state.json')  # 싱크별 보낸/못 보낸 알림 기록
+ALERT_DEDUP_HOURS = float(os.environ.get('ALERT_DEDUP_HOURS', '24'))  # 같은 알림을 다시 보내지 않는 시간
+ALERT_RSI_HIGH = float(os.environ.get('ALERT_RSI_HIGH', '70'))
+ALERT_RSI_LOW = float(os.environ.get('ALERT_RSI_LOW', '30'))
+ALERT_VOLUME_RATIO = float(os.environ.get('ALERT_VOLUME_RATIO', '1.0'))  # 5일 평균보다 100% 많으면 1.0
+
+RULES = ["ma_signal", "rsi_overbought", "rsi_oversold", "high52", "low52", "volume_spike"]
+
+RSI_FIELD = f'rsi{RSI_PERIOD}'
+
+
+class Alert(NamedTuple):
+    ticker: str
+    name: str  # 종목명
+    rule: str
+    message: str
+    value: float  # 규칙이 본 이번 값 (ma_signal은 MA_SIGNALS 위치)
+    previous: float  # 직전 값
+    taken_at: datetime  # 이번 스냅샷 시각 (UTC)
+
+    @property
+    def key(self) -> str:
+        """중복 제거 키 (ma_signal은 바뀐 상태별로 따로)"""
+        detail = MA_SIGNALS[int(self.value)] if self.rule == "ma_signal" else ""
+        return f"{self.ticker}|{self.rule}|{detail}"
+
+    def to_dict(self) -> Dict:
+        return {"ticker": self.ticker, "name": self.name, "rule": self.rule, "message": self.message,
+                "value": self.value, "previous": self.previous, "taken_at": self.taken_at.isoformat()}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Alert':
+        return cls(**dict(data, taken_at=datetime.fromisoformat(data['taken_at'])))
+
+
+def _signal_label(code: int) -> str:
+    return MA_SIGNALS[code] if code >= 0 else "-"
+
+
+# 규칙 -> (판정, 알림 값으로 쓸 필드, 메시지)
+# 판정은 align()으로 맞춘 직전/이번 줄 배열을 받아 종목별 bool 배열 반환 (NaN 비교는 False라 값이 없는 종목은 제외됨)
+# 메시지는 알림이 난 종목의 직전/이번 줄 하나씩을 받음
+def _rule_table(rsi_high: float, rsi_low: float, volume_ratio: float) -> Dict:
+    rsi = f"RSI{RSI_PERIOD}"
+    return {
+        "ma_signal": (
+            lambda before, after: (after['signal'] != before['signal']) & (before['signal'] >= 0) & (after['signal'] >= 0),
+            'signal',
+            lambda b, a: f"이동평균 {_signal_label(b['signal'])} → {_signal_label(a['signal'])}",
+        ),
+        "rsi_overbought": (
+            lambda before, after: (before[RSI_FIELD] < rsi_high) & (after[RSI_FIELD] >= rsi_high),
+            RSI_FIELD,
+            lambda b, a: f"{rsi} {b[RSI_FIELD]:.1f} → {a[RSI_FIELD]:.1f} ({rsi_high:g} 상향 돌파)",
+        ),
+        "rsi_oversold": (
+            lambda before, after: (before[RSI_FIELD] > rsi_low) & (after[RSI_FIELD] <= rsi_low),
+            RSI_FIELD,
+            lambda b, a: f"{rsi} {b[RSI_FIELD]:.1f} → {a[RSI_FIELD]:.1f} ({rsi_low:g} 하향 돌파)",
+        ),
+        "high52": (
+            lambda before, after: after['close'] > before['high52'],
+            'close',
+            lambda b, a: f"52주 신고가 {a['close']:,.2f} (직전 최고 {b['high52']:,.2f})",
+        ),
+        "low52": (
+            lambda before, after: after['close'] < before['low52'],
+            'close',
+            lambda b, a: f"52주 신저가 {a['close']:,.2f} (직전 최저 {b['low52']:,.2f})",
+        ),
+        "volume_spike": (
+            lambda before, after: (before['volume_ratio'] < volume_ratio) & (after['volume_ratio'] >= volume_ratio),
+            'volume_ratio',
+            lambda b, a: f"거래량 5일 평균 대비 {b['volume_ratio']:+.0%} → {a['volume_ratio']:+.0%}",
+        ),
+    }
+
+
+def evaluate(previous: Snapshot, current: Snapshot, rules: Optional[List[str]] = None,
+             rsi_high: float = ALERT_RSI_HIGH, rsi_low: float = ALERT_RSI_LOW,
+             volume_ratio: float = ALERT_VOLUME_RATIO) -> List[Alert]:
+    """두 스냅샷 사이에 새로 조건을 만족한 종목의 알림 (중복 제거 전)"""
+    before, after = align(previous, current)
+    table = _rule_table(rsi_high, rsi_low, volume_ratio)
+    alerts = []
+    for rule in RULES if rules is None else rules:
+        check, field, message = table[rule]
+        hits = np.flatnonzero(check(before, after))
+        for i, ticker in zip(hits, current.tickers(after[hits])):
+            b, a = before[i], after[i]
+            name = current.dictionary.names.get(ticker, ticker)
+            alerts.append(Alert(ticker, name, rule, message(b, a), float(a[field]), float(b[field]), current.taken_at))
+    return alerts
+
+
+class AlertSink:
+    """알림 싱크 인터페이스"""
+
+    name = "sink"
+
+    def send(self, alerts: List[Alert]):
+        raise NotImplementedError
+
+
+class FileSink(AlertSink):
+    """알림을 JSON Lines 파일에 추가 (테스트/다른 도구 연동용)"""
+
+    name = "file"
+
+    def __init__(self, path: str = ALERT_FILE_PATH):
+        self.path = path
+
+    def send(self, alerts: List[Alert]):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for alert in alerts:
+                f.write(json.dumps(alert.to_dict(), ensure_ascii=False) + "\n")
+
+
+class WebhookSink(AlertSink):
+    """알림을 웹훅으로 한 번에 전송 ({"text": ...}, Slack 호환 - Discord는 주소 끝에 /slack)"""
+
+    name = "webhook"
+
+    def __init__(self, url: str = ALERT_WEBHOOK_URL, timeout: float = 10):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, alerts: List[Alert]):
+        import requests
+
+        text = "\n".join(f"🔔 {a.ticker} ({a.name}): {a.message}" for a in alerts)
+        requests.post(self.url, json={"text": text}, timeout=self.timeout).raise_for_status()
+
+
+def build_sinks(names: Optional[List[str]] = None) -> List[AlertSink]:
+    """싱크 생성 (names가 없으면 ALERT_SINKS)"""
+    if names is None:
+        names = [name.strip() for name in ALERT_SINKS.split(',') if name.strip()]
+    sinks = []
+    for name in names:
+        if name == "file":
+            sinks.append(FileSink())
+        elif name == "webhook":
+            if not ALERT_WEBHOOK_URL:
+                print("⚠️  ALERT_WEBHOOK_URL이 없어 webhook 알림을 건너뜁니다")
+                continue
+            sinks.append(WebhookSink())
+        else:
+            print(f"⚠️  알 수 없는 알림 싱크: {name}")
+    return sinks
+
+
+class AlertEngine:
+    """스냅샷 비교 -> 싱크별 중복 제거 -> 싱크 전송 (싱크별로 보낸 알림과 못 보낸 알림을 ALERT_STATE_PATH에 기록)
+
+    알림은 돌파 시점에만 생기므로, 전송에 실패한 알림은 다음 실행에서 그 싱크로 다시 보냅니다
+    (ALERT_DEDUP_HOURS가 지나면 버림).
+    """
+
+    def __init__(self, sinks: List[AlertSink], state_path: str = ALERT_STATE_PATH,
+                 dedup_hours: float = ALERT_DEDUP_HOURS, rules: Optional[List[str]] = None):
+        self.sinks = sinks
+        self.state_path = state_path
+        self.dedup = timedelta(hours=dedup_hours)
+        if rules is None:
+            rules = [rule.strip() for rule in ALERT_RULES.split(',') if rule.strip()] or RULES
+        unknown = [rule for rule in rules if rule not in RULES]
+        if unknown:
+            print(f"⚠️  알 수 없는 알림 규칙: {', '.join(unknown)}")
+        self.rules = [rule for rule in rules if rule in RULES]
+        self._sent: Dict[str, str] = {}  # "싱크|알림 키" -> 보낸 알림의 스냅샷 시각
+        self._pending: Dict[str, List[Dict]] = {}  # 싱크 -> 못 보낸 알림
+        if state_path:
+            try:
+                with open(state_path, encoding='utf-8') as f:
+                    data = json.load(f)
+                self._sent, self._pending = data['sent'], data.get('pending', {})
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+
+    def _recent(self, at: str, now: datetime) -> bool:
+        return now - datetime.fromisoformat(at) < self.dedup
+
+    def _was_sent(self, sink: AlertSink, alert: Alert) -> bool:
+        sent = self._sent.get(f"{sink.name}|{alert.key}")
+        return bool(sent) and self._recent(sent, alert.taken_at)
+
+    def deduplicate(self, sink: AlertSink, alerts: List[Alert]) -> List[Alert]:
+        """sink로 ALERT_DEDUP_HOURS 안에 보낸 적 있는 알림 제외"""
+        fresh = []
+        keys = set()
+        for alert in alerts:
+            if alert.key in keys or self._was_sent(sink, alert):
+                continue
+            keys.add(alert.key)
+            fresh.append(alert)
+        return fresh
+
+    def deliver(self, sink: AlertSink, alerts: List[Alert], now: datetime) -> bool:
+        """지난번에 못 보낸 알림과 새 알림을 sink로 보냄 (성공한 알림만 보낸 것으로 기록)"""
+        retry = [Alert.from_dict(data) for data in self._pending.get(sink.name, [])]
+        batch = self.deduplicate(sink, [a for a in retry if self._recent(a.taken_at.isoformat(), now)] + alerts)
+        if not batch:
+            self._pending.pop(sink.name, None)
+            return True
+        try:
+            sink.send(batch)
+        except Exception as e:
+            print(f"⚠️  알림 전송 실패 ({sink.name}, {len(batch)}개는 다음 실행에서 다시 보냄): {str(e)}")
+            self._pending[sink.name] = [alert.to_dict() for alert in batch]
+            return False
+        for alert in batch:
+            self._sent[f"{sink.name}|{alert.key}"] = alert.taken_at.isoformat()
+        self._pending.pop(sink.name, None)
+        return True
+
+    def run(self, previous: Snapshot, current: Snapshot) -> List[Alert]:
+        """두 스냅샷을 비교해 새 알림을 싱크로 보내고 반환 (어느 싱크로도 보낸 적 없는 알림만 반환)"""
+        alerts = evaluate(previous, current, self.rules)
+        fresh = [alert for alert in alerts if not any(self._was_sent(sink, alert) for sink in self.sinks)]
+        for sink in self.sinks:
+            self.deliver(sink, alerts, current.taken_at)
+        self.save(current.taken_at)
+        return fresh
+
+    def save(self, now: datetime):
+        """보낸/못 보낸 알림 기록 저장 (중복 제거 기간이 지난 기록은 버림)"""
+        if not self.state_path:
+            return
+        self._sent = {key: at for key, at in self._sent.items() if self._recent(at, now)}
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.state_path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"sent": self._sent, "pending": self._pending}, f, ensure_ascii=False)
+        os.replace(tmp, self.state_path)
+
+
+def check_alerts(root: str = SNAPSHOT_DIR) -> List[Alert]:
+    """최근 스냅샷 두 개를 비교해 알림 전송 (ALERT_SINKS가 비었거나 스냅샷이 하나뿐이면 아무것도 안 함)"""
+    sinks = build_sinks()
+    if not root or not sinks:
+        return []
+    with metrics.timer("alerts"):
+        snapshots = SnapshotStore(root).latest(2)
+        if len(snapshots) < 2:
+            return []
+        alerts = AlertEngine(sinks).run(*snapshots)
+    metrics.count("alerts", len(alerts))
+    if alerts:
+        print(f"🔔 알림 {len(alerts)}개")
+        for alert in alerts[:20]:
+            print(f"   {alert.ticker} ({alert.name}): {alert.message}")
+        if len(alerts) > 20:
+            print(f"   ... 외 {len(alerts) - 20}개")
+    return alerts
@@ -0,0 +1,431 @@
+"""
+지표 히스토리 - 종목별 일자별 지표(현재가/등락률/SMA/RSI/52주 고저 등) 시계열을 채우고 새 날만 이어 붙입니다.
+
+노션의 종목 행은 매번 덮어쓰므로 지표의 과거 값이 남지 않습니다. 여기서는 로컬 일봉 저장소(price_store.py)의
+1년치 봉으로 종목 × 날짜 지표 행렬을 한 번에 계산해
+- 종목별 `<티커>.npy` 파일(HISTORY_DTYPE 구조화 배열)에 기록하고
+- NOTION_HISTORY_DATABASE_ID가 있으면 보조 노션 DB에 (종목, 날짜)마다 페이지 하나로 기록합니다.
+
+진행 상황은 `_checkpoint.json`에 종목별로 남기므로 중간에 멈춰도 다음 실행에서 이어서 채우고,
+채운 뒤에는 새로 완성된 날(UTC 기준 오늘 이전의 봉)만 추가합니다. 일반 실행(append_only)은 `--backfill`로 이미 채운 종목에만
+새 날을 추가하고, 노션에는 밀린 날이 BACKFILL_APPEND_MAX_DAYS일 이하인 종목만 실행당 BACKFILL_APPEND_MAX_PAGES개까지 보내므로
+5분 주기 실행이 전체 채우기로 길어지지 않습니다. 일봉 저장소가 1년치를 다시 받으면
+(수정주가 반영) 로컬 파일은 다시 쓰고, 노션에 이미 기록한 날은 그대로 둡니다.
+"""
+
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from indicators import MA_SIGNALS, RSI_PERIOD, SMA_PERIODS, ma_signals, rsi_series
+from metrics import metrics
+from notion_sync import NOTION_WORKERS, notion
+from price_store import PriceStore
+
+INDICATOR_HISTORY_DIR = os.environ.get('INDICATOR_HISTORY_DIR', '.cache/indicator_history')  # 빈 값이면 사용 안 함
+NOTION_HISTORY_DATABASE_ID = os.environ.get('NOTION_HISTORY_DATABASE_ID', '')  # 빈 값이면 노션에 기록 안 함
+BACKFILL_NOTION_MAX_PAGES = int(os.environ.get('BACKFILL_NOTION_MAX_PAGES', '0'))  # 실행당 노션 페이지 수 (0이면 제한 없음)
+BACKFILL_APPEND_MAX_PAGES = int(os.environ.get('BACKFILL_APPEND_MAX_PAGES', '100'))  # 일반 실행의 노션 페이지 수
+BACKFILL_APPEND_MAX_DAYS = 5  # 일반 실행에서 노션에 이어 보낼 종목의 최대 밀린 날 수 (더 밀리면 --backfill로)
+BACKFILL_CHUNK_SIZE = 100  # 지표 행렬을 한 번에 계산할 종목 수
+BACKFILL_CHECKPOINT_PAGES = 10  # 노션 기록 중 체크포인트를 저장하는 페이지 간격
+
+HISTORY_DTYPE = np.dtype([
+    ('date', 'datetime64[D]'),
+    ('close', 'f8'),
+    ('change', 'f8'),
+    ('volume', 'f8'),
+    ('volume_ratio', 'f8'),
+    *[(f'sma{period}', 'f8') for period in SMA_PERIODS],
+    (f'rsi{RSI_PERIOD}', 'f8'),
+    ('high52', 'f8'),
+    ('low52', 'f8'),
+    ('signal', 'i1'),  # MA_SIGNALS 위치 (-1이면 "-")
+])
+
+# 저장 필드 -> 노션 속성 (compute_indicators 결과와 같은 이름)
+FIELDS = {
+    'close': "현재가",
+    'change': "등락률",
+    'volume': "거래량",
+    'volume_ratio': "5일평균거래량대비",
+    **{f'sma{period}': f"SMA{period}" for period in SMA_PERIODS},
+    f'rsi{RSI_PERIOD}': f"RSI{RSI_PERIOD}",
+    'high52': "52주최고가",
+    'low52': "52주최저가",
+}
+
+CHECKPOINT_FILE = '_checkpoint.json'
+
+
+def indicator_series(close: np.ndarray, high: np.ndarray, low: np.ndarray,
+                     volume: np.ndarray) -> Dict[str, np.ndarray]:
+    """종목 × 날짜 행렬(오른쪽 정렬, 앞쪽 NaN)에서 날짜마다의 지표 행렬을 한 번에 계산 (저장 필드 -> 행렬)
+
+    각 날짜의 값은 그날까지의 봉만으로 compute_indicators를 계산한 값과 같으며 (같은 반올림),
+    52주 최고/최저는 저장소 보관 기간(1년) 안의 그날까지 누적 최고/최저입니다.
+    """
+    n_tickers, n_bars = close.shape
+
+    def windows(values: np.ndarray, period: int) -> np.ndarray:
+        padded = np.concatenate([np.full((n_tickers, period - 1), np.nan), values], axis=1)
+        return sliding_window_view(padded, period, axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        prev_close = np.concatenate([close[:, :1], close[:, :-1]], axis=1)
+        prev_close = np.where(np.isnan(prev_close), close, prev_close)
+
+        recent_volume = windows(volume, 5)
+        counts = (~np.isnan(recent_volume)).sum(axis=-1)
+        avg_volume_5d = np.where(counts > 0, np.nansum(recent_volume, axis=-1) / np.maximum(counts, 1), np.nan)
+
+        series = {
+            'close': np.round(close, 2),
+            'change': np.round(np.where(prev_close > 0, close / prev_close - 1, 0), 4),
+            'volume': volume,
+            'volume_ratio': np.round(np.where(avg_volume_5d > 0, volume / avg_volume_5d - 1, 0), 4),
+        }
+        for period in SMA_PERIODS:
+            # 봉이 period개보다 적은 날은 창에 NaN이 섞여 NaN
+            series[f'sma{period}'] = np.round(np.mean(windows(close, period), axis=-1), 2)
+        series[f'rsi{RSI_PERIOD}'] = np.round(rsi_series(close, RSI_PERIOD), 2)
+        series['high52'] = np.round(np.fmax.accumulate(high, axis=1), 2)
+        series['low52'] = np.round(np.fmin.accumulate(low, axis=1), 2)
+
+    signals = ma_signals(series['sma20'], series['sma50'], series['sma200'])
+    codes = np.full(signals.shape, -1, dtype='i1')
+    for code, name in enumerate(MA_SIGNALS):
+        codes[signals == name] = code
+    series['signal'] = codes
+    return series
+
+
+def history_rows(bars_list: List[np.ndarray]) -> List[np.ndarray]:
+    """종목별 일봉 배열 목록 -> 종목별 HISTORY_DTYPE 배열 목록 (종목 묶음을 한 번에 계산)"""
+    n_bars = max((len(bars) for bars in bars_list), default=0)
+    matrices = {}
+    for field in ('close', 'high', 'low', 'volume'):
+        matrix = np.full((len(bars_list), n_bars), np.nan)
+        for i, bars in enumerate(bars_list):
+            if len(bars):
+                matrix[i, n_bars - len(bars):] = bars[field]
+        matrices[field] = matrix
+
+    series = indicator_series(**matrices) if n_bars else {}
+    rows = []
+    for i, bars in enumerate(bars_list):
+        out = np.empty(len(bars), dtype=HISTORY_DTYPE)
+        out['date'] = bars['date']
+        for field, values in series.items():
+            out[field] = values[i, n_bars - len(bars):]
+        rows.append(out)
+    return rows
+
+
+def history_properties(ticker: str, row: np.void) -> Dict[str, Dict]:
+    """히스토리 한 줄 -> 보조 노션 DB 속성"""
+    day = row['date'].astype(datetime).isoformat()
+    properties = {
+        "이름": {"title": [{"text": {"content": f"{ticker} {day}"}}]},
+        "티커": {"rich_text": [{"text": {"content": ticker}}]},
+        "날짜": {"date": {"start": day}},
+    }
+    for field, name in FIELDS.items():
+        value = float(row[field])
+        if not np.isnan(value):
+            properties[name] = {"number": int(value) if field == 'volume' else value}
+    signal = int(row['signal'])
+    properties["골든크로스데드크로스"] = {"select": {"name": MA_SIGNALS[signal] if signal >= 0 else "-"}}
+    return properties
+
+
+class HistoryStore:
+    """종목별 지표 히스토리 파일 + 진행 상황(체크포인트)
+
+    체크포인트 (티커 -> 값):
+    - date: 파일에 기록한 마지막 날짜
+    - refreshed: 계산에 쓴 일봉 저장소의 마지막 전체 다운로드 시각 (바뀌면 파일을 다시 씀)
+    - notion: 노션에 기록한 마지막 날짜
+    - inflight: 노션 기록 중 (비정상 종료 시 다음 실행에서 이미 만든 페이지를 조회해 건너뜀)
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # 여러 노션 기록 스레드가 같은 임시 파일을 쓰지 않도록
+        os.makedirs(root, exist_ok=True)
+        try:
+            with open(os.path.join(root, CHECKPOINT_FILE), encoding='utf-8') as f:
+                self._checkpoint: Dict[str, Dict] = json.load(f)
+        except (OSError, ValueError):
+            self._checkpoint = {}
+
+    def path(self, ticker: str) -> str:
+        return os.path.join(self.root, f"{ticker.replace('/', '_')}.npy")
+
+    def load(self, ticker: str) -> Optional[np.ndarray]:
+        try:
+            return np.load(self.path(ticker))
+        except (OSError, ValueError):
+            return None
+
+    def progress(self, ticker: str) -> Dict:
+        with self._lock:
+            return dict(self._checkpoint.get(ticker, {}))
+
+    def update_progress(self, ticker: str, **values):
+        with self._lock:
+            self._checkpoint.setdefault(ticker, {}).update(values)
+
+    def write(self, ticker: str, rows: np.ndarray, refreshed: Optional[str]) -> int:
+        """rows 중 새 날만 파일에 이어 붙임 (일봉 저장소를 다시 받았으면 전체를 다시 씀, 기록한 줄 수 반환)"""
+        progress = self.progress(ticker)
+        existing = self.load(ticker) if progress.get('refreshed') == refreshed else None
+        if existing is not None and progress.get('date'):
+            new = rows[rows['date'] > np.datetime64(progress['date'], 'D')]
+            rows = np.concatenate([existing, new])
+        else:
+            new = rows
+        if len(new) == 0:
+            return 0
+
+        path = self.path(ticker)
+        tmp = f"{path}.tmp.npy"
+        np.save(tmp, rows)
+        os.replace(tmp, path)
+        self.update_progress(ticker, date=str(rows['date'][-1]), refreshed=refreshed)
+        return len(new)
+
+    def save(self):
+        with self._lock:
+            data = json.dumps(self._checkpoint, ensure_ascii=False, indent=1, sort_keys=True)
+        path = os.path.join(self.root, CHECKPOINT_FILE)
+        tmp = f"{path}.tmp"
+        with self._save_lock:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp, path)
+
+
+def existing_history_dates(ticker: str, after: Optional[str]) -> Optional[Set[str]]:
+    """보조 노션 DB에 이미 있는 ticker의 날짜 (after 이후, 조회 실패 시 None)"""
+    conditions = [{"property": "티커", "rich_text": {"equals": ticker}}]
+    if after:
+        conditions.append({"property": "날짜", "date": {"after": after}})
+    dates = set()
+    cursor = None
+    while True:
+        payload = {"page_size": 100, "filter": {"and": conditions}}
+        if cursor:
+            payload["start_cursor"] = cursor
+        response = notion.post(f"databases/{NOTION_HISTORY_DATABASE_ID}/query", payload)
+        if response.status_code != 200:
+            print(f"❌ {ticker}: 노션 히스토리 조회 실패: {response.status_code}")
+            return None
+        data = response.json()
+        for page in data.get('results', []):
+            day = (page.get('properties', {}).get('날짜', {}).get('date') or {}).get('start')
+            if day:
+                dates.add(day[:10])
+        if not data.get('has_more'):
+            return dates
+        cursor = data.get('next_cursor')
+
+
+class NotionHistoryWriter:
+    """히스토리를 보조 노션 DB에 종목별로 날짜순 기록 (종목 단위 병렬, 실행당 max_pages개까지)
+
+    노션에는 여러 페이지를 한 번에 만드는 API가 없어 (종목, 날짜)마다 요청 하나가 필요합니다.
+    요청은 공용 NotionClient의 속도 제한을 따르며, 다 보내지 못한 날은 체크포인트부터 다음 실행에서 이어 보냅니다.
+    """
+
+    def __init__(self, history: HistoryStore, max_pages: int = BACKFILL_NOTION_MAX_PAGES,
+                 workers: int = NOTION_WORKERS):
+        self.history = history
+        self.max_pages = max_pages
+        self.workers = max(1, workers)
+        self.created = 0
+        self.skipped = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> bool:
+        with self._lock:
+            if self.max_pages and self.created + self.failed >= self.max_pages:
+                return False
+            self.created += 1
+            return True
+
+    def _write_ticker(self, ticker: str):
+        progress = self.history.progress(ticker)
+        after = progress.get('notion')
+        if not progress.get('date') or after == progress['date']:
+            return
+        rows = self.history.load(ticker)
+        if rows is None:
+            return
+        if after:
+            rows = rows[rows['date'] > np.datetime64(after, 'D')]
+        if len(rows) == 0:
+            return
+
+        done: Set[str] = set()
+        if progress.get('inflight'):
+            done = existing_history_dates(ticker, after)
+            if done is None:
+                return
+        # 강제 종료(시간 초과, SIGKILL)돼도 다음 실행이 이미 만든 페이지를 조회하도록 보내기 전에 저장
+        self.history.update_progress(ticker, inflight=True)
+        self.history.save()
+
+        for n, row in enumerate(rows, 1):
+            day = str(row['date'])
+            if day in done:
+                with self._lock:
+                    self.skipped += 1
+            else:
+                if not self._reserve():
+                    break
+                try:
+                    with metrics.timer("history_notion", ticker):
+                        response = notion.post("pages", {"parent": {"database_id": NOTION_HISTORY_DATABASE_ID},
+                                                         "properties": history_properties(ticker, row)},
+                                               idempotent=False)
+                except Exception as e:
+                    # 만들어졌는지 알 수 없으므로 inflight를 남겨 다음 실행에서 조회
+                    print(f"❌ {ticker} {day} 노션 히스토리 기록 오류: {str(e)}")
+                    with self._lock:
+                        self.created -= 1
+                        self.failed += 1
+                    return
+                if response.status_code != 200:
+                    print(f"❌ {ticker} {day} 노션 히스토리 기록 실패: {response.status_code}")
+                    with self._lock:
+                        self.created -= 1
+                        self.failed += 1
+                    if response.status_code >= 500:
+                        return  # 만들어졌을 수 있으므로 inflight를 남김
+                    break
+            self.history.update_progress(ticker, notion=day)
+            if n % BACKFILL_CHECKPOINT_PAGES == 0:
+                self.history.save()  # 재개 시 조회할 범위를 줄임
+        self.history.update_progress(ticker, inflight=False)
+        self.history.save()
+
+    def run(self, tickers: List[str]):
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for future in [executor.submit(self._write_ticker, ticker) for ticker in tickers]:
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"❌ 노션 히스토리 기록 오류: {str(e)}")
+
+    def pending_days(self, ticker: str) -> int:
+        """ticker의 아직 노션에 기록하지 않은 날 수"""
+        progress = self.history.progress(ticker)
+        after = progress.get('notion')
+        if not progress.get('date') or after == progress['date']:
+            return 0
+        rows = self.history.load(ticker)
+        if rows is None:
+            return 0
+        return len(rows) if not after else int((rows['date'] > np.datetime64(after, 'D')).sum())
+
+    def pending(self, tickers: List[str]) -> int:
+        """아직 노션에 기록하지 않은 날 수"""
+        return sum(self.pending_days(ticker) for ticker in tickers)
+
+    def caught_up(self, ticker: str) -> bool:
+        """노션 채우기를 마치고 최근 며칠만 밀린 종목 (일반 실행에서 이어 보냄)"""
+        return bool(self.history.progress(ticker).get('notion')) and \
+            self.pending_days(ticker) <= BACKFILL_APPEND_MAX_DAYS
+
+
+def sync_prices(store: PriceStore, tickers: List[str]):
+    """일봉 저장소에 없거나 오늘 동기화하지 않은 종목의 일봉을 받음 (묶음 다운로드)"""
+    from provider_yfinance import HISTORY_BATCH_SIZE, BatchHistoryLoader
+
+    today = datetime.now(timezone.utc).date()
+    stale = [t for t in tickers if store.needs_full_refresh(t) or store.needs_daily_sync(t, today)]
+    if not stale:
+        return
+    print(f"📥 일봉 동기화: {len(stale)}개 종목")
+    loader = BatchHistoryLoader(stale, max(HISTORY_BATCH_SIZE, 1), store=store)
+    for ticker in stale:
+        loader.get(ticker)
+
+
+def update_history(tickers: List[str], store: PriceStore, history: HistoryStore,
+                   chunk_size: int = BACKFILL_CHUNK_SIZE, append_only: bool = False) -> Dict[str, int]:
+    """오늘 일봉을 동기화한 종목의 완성된 날(UTC 오늘 이전)을 히스토리 파일에 반영
+
+    append_only=True면 이미 채운(체크포인트가 있는) 종목만 반영합니다.
+    """
+    today = datetime.now(timezone.utc).date()
+    cutoff = np.datetime64(today, 'D')
+    counts = {"종목": 0, "파일 기록": 0}
+
+    due = []
+    for ticker in tickers:
+        bars = store.load(ticker)
+        if bars is None or store.needs_daily_sync(ticker, today):
+            continue
+        bars = bars[bars['date'] < cutoff]
+        if len(bars) == 0:
+            continue
+        progress = history.progress(ticker)
+        if append_only and not progress.get('date'):
+            continue
+        if progress.get('date') == str(bars['date'][-1]) and progress.get('refreshed') == store.refreshed_at(ticker):
+            continue
+        due.append((ticker, np.array(bars)))
+
+    for i in range(0, len(due), chunk_size):
+        chunk = due[i:i + chunk_size]
+        with metrics.timer("history_series"):
+            rows_list = history_rows([bars for _, bars in chunk])
+        for (ticker, _), rows in zip(chunk, rows_list):
+            written = history.write(ticker, rows, store.refreshed_at(ticker))
+            if written:
+                counts["종목"] += 1
+                counts["파일 기록"] += written
+        history.save()
+    metrics.count("history_rows", counts["파일 기록"], sink="file")
+    return counts
+
+
+def run_backfill(tickers: List[str], store: PriceStore, sync: bool = True,
+                 history_dir: str = INDICATOR_HISTORY_DIR,
+                 max_pages: int = BACKFILL_NOTION_MAX_PAGES, append_only: bool = False) -> Dict[str, int]:
+    """지표 히스토리를 채우거나 새 날을 추가 (sync=True면 먼저 일봉 저장소를 동기화)
+
+    append_only=True(일반 실행)면 이미 채운 종목에 새 날만 추가하고, 노션에는 최근 며칠만 밀린 종목을
+    BACKFILL_APPEND_MAX_PAGES개까지 보냅니다 (채우기는 --backfill에서만).
+    결과 개수(갱신 종목, 파일 기록 줄 수, 노션 생성/건너뜀/실패/대기)를 반환합니다.
+    """
+    history = HistoryStore(history_dir)
+    if sync:
+        sync_prices(store, tickers)
+    counts = update_history(tickers, store, history, append_only=append_only)
+
+    if NOTION_HISTORY_DATABASE_ID:
+        writer = NotionHistoryWriter(history, BACKFILL_APPEND_MAX_PAGES if append_only else max_pages)
+        targets = [ticker for ticker in tickers if writer.caught_up(ticker)] if append_only else tickers
+        try:
+            writer.run(targets)
+        finally:
+            history.save()
+        metrics.count("history_rows", writer.created, sink="notion")
+        counts.update({"노션 생성": writer.created, "노션 건너뜀": writer.skipped,
+                       "노션 실패": writer.failed, "노션 대기": writer.pending(tickers)})
+    return counts
+
+
+def summary(counts: Dict[str, int]) -> str:
+    return " | ".join(f"{key} {value}" for key, value in counts.items())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+히스토리 다운로드 벤치마크 - 종목별 yf.Ticker().history() vs 묶음 yf.download() vs 시세만 (최근 봉 하나)
+
+종목 수(10/100/500)별로 소요 시간, HTTP 요청 수, 응답 크기를 비교합니다.
+"quote"는 일봉 동기화 후 매 실행마다 받는 시세 단계(provider_yfinance.QUOTE_PERIOD)입니다.
+실제 Yahoo Finance에 접속하므로 네트워크가 필요합니다.
+
+사용법:
+    python benchmarks/bench_history_download.py
+    python benchmarks/bench_history_download.py --sizes 10 100 --chunk-size 50
+    python benchmarks/bench_history_download.py --tickers-file tickers.txt
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+from typing import Callable, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import yfinance as yf
+import provider_yfinance
+
+# 기본 종목 목록 (미국 대형주 + 코스피)
+DEFAULT_TICKERS = [
+    "AAPL", "MSFT", "GOOGL", "AMZN", "NVDA", "META", "TSLA", "BRK-B", "JPM", "V",
+    "UNH", "XOM", "JNJ", "WMT", "MA", "PG", "LLY", "HD", "CVX", "MRK",
+    "ABBV", "AVGO", "PEP", "KO", "COST", "ADBE", "TMO", "MCD", "CSCO", "CRM",
+    "ACN", "ABT", "DHR", "LIN", "NKE", "TXN", "NEE", "AMD", "ORCL", "PM",
+    "WFC", "DIS", "BMY", "UPS", "RTX", "MS", "HON", "QCOM", "INTC", "UNP",
+    "IBM", "AMGN", "LOW", "SPGI", "GS", "CAT", "BA", "INTU", "SBUX", "AMAT",
+    "PLD", "GE", "DE", "BLK", "MDT", "ELV", "ISRG", "GILD", "ADP", "BKNG",
+    "005930.KS", "000660.KS", "035720.KS", "035420.KS", "207940.KS", "005380.KS",
+    "000270.KS", "051910.KS", "006400.KS", "068270.KS", "005490.KS", "105560.KS",
+    "055550.KS", "012330.KS", "028260.KS", "066570.KS", "003550.KS", "096770.KS",
+    "017670.KS", "034730.KS", "015760.KS", "032830.KS", "086790.KS", "009150.KS",
+]
+
+
+class RequestCounter:
+    """세션 응답 훅으로 HTTP 요청 수와 응답 크기 집계"""
+
+    def __init__(self):
+        self.count = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, response, *args, **kwargs):
+        with self._lock:
+            self.count += 1
+            self.bytes += len(response.content)
+        return response
+
+
+def per_ticker(tickers: List[str]) -> int:
+    """기존 방식: 종목마다 yf.Ticker().history() 호출"""
+    ok = 0
+    for ticker in tickers:
+        hist = yf.Ticker(ticker, session=provider_yfinance.session).history(period="1y")
+        if not hist.empty:
+            ok += 1
+    return ok
+
+
+def batched(chunk_size: int, period: str = "1y") -> Callable[[List[str]], int]:
+    """묶음 방식: chunk_size개씩 yf.download() 호출"""
+    def run(tickers: List[str]) -> int:
+        ok = 0
+        for i in range(0, len(tickers), chunk_size):
+            ok += len(provider_yfinance.download_histories(tickers[i:i + chunk_size], period))
+        return ok
+    return run
+
+
+def measure(name: str, fn: Callable[[List[str]], int], tickers: List[str]):
+    counter = RequestCounter()
+    provider_yfinance.session.hooks['response'].append(counter)
+    try:
+        start = time.perf_counter()
+        ok = fn(tickers)
+        elapsed = time.perf_counter() - start
+    finally:
+        provider_yfinance.session.hooks['response'].remove(counter)
+
+    print(f"{name:<16} {len(tickers):>6} {ok:>6} {elapsed:>10.2f} {counter.count:>8} {counter.bytes / 1024:>10,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="히스토리 다운로드 벤치마크")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 500])
+    parser.add_argument('--chunk-size', type=int, default=provider_yfinance.HISTORY_BATCH_SIZE or 50)
+    parser.add_argument('--tickers-file', help="한 줄에 하나씩 티커가 적힌 파일")
+    args = parser.parse_args()
+
+    tickers = DEFAULT_TICKERS
+    if args.tickers_file:
+        with open(args.tickers_file, encoding='utf-8') as f:
+            tickers = [line.strip() for line in f if line.strip()]
+
+    print(f"{'mode':<16} {'종목':>6} {'성공':>6} {'시간(초)':>10} {'요청수':>8} {'응답(KB)':>10}")
+    for size in args.sizes:
+        if size > len(tickers):
+            print(f"⚠️  종목 목록이 {len(tickers)}개뿐이라 {size}개 대신 {len(tickers)}개로 측정")
+        sample = tickers[:size]
+        measure("per-ticker", per_ticker, sample)
+        measure(f"batch({args.chunk_size})", batched(args.chunk_size), sample)
+        measure(f"quote({args.chunk_size})", batched(args.chunk_size, provider_yfinance.QUOTE_PERIOD), sample)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+증분 지표 벤치마크 - 장중 봉이 바뀔 때마다 compute_indicators로 전체 히스토리를 다시 계산 vs
+incremental.IndicatorState.values(live) (이전 거래일까지 상태는 한 번만 만듦)
+
+종목 수별로 "스냅샷 한 번"에 걸리는 시간을 비교하고, 두 결과가 정확히 같은지 확인합니다.
+네트워크가 필요 없습니다 (무작위 가격 사용).
+
+사용법:
+    python benchmarks/bench_incremental.py
+    python benchmarks/bench_incremental.py --tickers 100 1000 --bars 252
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from price_store import PRICE_DTYPE, bars_to_frame
+from indicators import align_histories, compute_indicators, indicator_rows
+from incremental import IndicatorState
+
+
+def random_bars(rng: np.random.Generator, n_bars: int) -> np.ndarray:
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n_bars)))
+    bars = np.empty(n_bars, dtype=PRICE_DTYPE)
+    bars['date'] = np.datetime64('2025-10-01') + np.arange(n_bars)
+    bars['open'] = close
+    bars['high'] = close * (1 + rng.uniform(0, 0.02, n_bars))
+    bars['low'] = close * (1 - rng.uniform(0, 0.02, n_bars))
+    bars['close'] = close
+    bars['volume'] = rng.integers(1_000, 1_000_000, n_bars).astype(float)
+    return bars
+
+
+def main():
+    parser = argparse.ArgumentParser(description="증분 지표 벤치마크")
+    parser.add_argument('--tickers', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--bars', type=int, default=252)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+
+    print(f"{'종목':>6} {'배치(초)':>10} {'증분(초)':>10} {'배속':>8} {'일치':>6}")
+    for n_tickers in args.tickers:
+        histories = [random_bars(rng, args.bars) for _ in range(n_tickers)]
+        tickers = [f"T{i}" for i in range(n_tickers)]
+        states = [IndicatorState.from_bars(bars[:-1]) for bars in histories]
+        lives = [(bars['date'][-1].astype(object), float(bars['high'][-1]), float(bars['low'][-1]),
+                  float(bars['close'][-1]), float(bars['volume'][-1])) for bars in histories]
+
+        start = time.perf_counter()
+        frames = [bars_to_frame(bars) for bars in histories]
+        expected = indicator_rows(tickers, compute_indicators(**align_histories(frames)))
+        batch_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = {ticker: state.values(live) for ticker, state, live in zip(tickers, states, lives)}
+        incremental_time = time.perf_counter() - start
+
+        match = actual == expected
+        print(f"{n_tickers:>6} {batch_time:>10.4f} {incremental_time:>10.4f} "
+              f"{batch_time / incremental_time:>7.1f}x {'✅' if match else '❌':>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+오프라인 전체 실행 벤치마크 - update_stocks.main()을 스텁 HTTP 응답(offline_stub.py)으로 실행해
+종목 수별 처리량과 단계별(fetch/history/info/indicators/notion_write 등) 시간을 측정합니다.
+
+네트워크가 필요 없으며, 요청마다 지연과 429 응답 비율을 주입할 수 있습니다.
+종목 수마다 새 작업 디렉터리에서 두 번 실행합니다.
+- cold: 캐시가 없는 첫 실행 (1년치 일봉, 펀더멘털 조회, 노션 페이지 생성)
+- warm: 같은 디렉터리에서 다시 실행 (시세만, 펀더멘털 캐시 적중, 노션 변경 없음)
+
+각 실행은 별도 프로세스에서 돌리고(모듈 단위 캐시/통계 분리), 단계별 시간은 실행이 남긴
+계측 보고서(metrics.py)에서 읽습니다. 결과는 커밋 해시와 함께 benchmarks/results/에 저장되며,
+--compare로 이전 결과와 비교할 수 있습니다.
+
+사용법:
+    python benchmarks/bench_offline.py
+    python benchmarks/bench_offline.py --sizes 10 100 --latency 0.05 --throttle-rate 0.02
+    python benchmarks/bench_offline.py --alphavantage          # 미국 주식을 Alpha Vantage로 먼저 수집
+    python benchmarks/bench_offline.py --compare benchmarks/results/<이전 결과>.json
+
+    # 실제 응답 기록 (네트워크 필요, 노션은 항상 스텁) 후 같은 종목으로 재생
+    python benchmarks/bench_offline.py --tickers-file tickers.txt --sizes 10 --record benchmarks/fixtures
+    python benchmarks/bench_offline.py --tickers-file tickers.txt --sizes 10 --fixtures benchmarks/fixtures
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import shutil
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+PHASES = ('cold', 'warm')
+
+
+def synthetic_stocks(n: int) -> List[Dict]:
+    """미국/한국 반반 합성 종목 목록"""
+    stocks = []
+    for i in range(n):
+        if i % 2:
+            stocks.append({"ticker": f"{100000 + i:06d}.KS", "market": "한국"})
+        else:
+            stocks.append({"ticker": f"SYN{i:04d}", "market": "미국"})
+    return stocks
+
+
+def file_stocks(path: str, n: int) -> List[Dict]:
+    """종목 파일(한 줄에 티커 하나)의 앞에서 n개 (.KS/.KQ는 한국, 나머지는 미국)"""
+    with open(path, encoding='utf-8') as f:
+        tickers = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    if len(tickers) < n:
+        raise SystemExit(f"❌ {path}: 종목이 {len(tickers)}개뿐입니다 ({n}개 필요)")
+    return [{"ticker": t, "market": "한국" if t.endswith(('.KS', '.KQ')) else "미국"} for t in tickers[:n]]
+
+
+def child(config: Dict):
+    """작업 디렉터리에서 스텁을 설치하고 main()을 한 번 실행"""
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, BENCH_DIR)
+
+    import yfinance as yf
+    yf.set_tz_cache_location(os.path.abspath('.cache/yfinance'))
+
+    import provider_yfinance
+    import provider_alphavantage
+    import notion_sync
+    import update_stocks
+    from offline_stub import OfflineBackend, install, record
+
+    backend = OfflineBackend(latency=config['latency'], jitter=config['jitter'],
+                             throttle_rate=config['throttle_rate'], retry_after=config['retry_after'],
+                             fixtures_dir=config['fixtures'], notion_path='.cache/stub_notion.json')
+    if config['record']:
+        # 시세 제공자는 실제로 호출해 응답을 기록
+        record(provider_yfinance.session, config['record'])
+        record(provider_alphavantage.session, config['record'])
+        install([notion_sync.notion.session], backend)
+    else:
+        install([provider_yfinance.session, provider_alphavantage.session, notion_sync.notion.session], backend)
+
+    started = time.perf_counter()
+    update_stocks.main(argv=['--force'])
+    wall = time.perf_counter() - started
+    backend.save()
+
+    with open('.cache/bench_child.json', 'w', encoding='utf-8') as f:
+        json.dump({"wall_seconds": wall, "stub": backend.stats}, f)
+
+
+def run_phase(workdir: str, n: int, config: Dict) -> Dict:
+    stocks = file_stocks(config['tickers_file'], n) if config['tickers_file'] else synthetic_stocks(n)
+    env = dict(os.environ)
+    env.update({
+        "STOCK_TICKERS": json.dumps(stocks, ensure_ascii=False),
+        "NOTION_API_KEY": "offline",
+        "NOTION_DATABASE_ID": "offline-db",
+        "NOTION_RATE_LIMIT": str(config['notion_rate']),
+        "ALPHA_VANTAGE_CALLS_PER_MINUTE": str(config['av_calls_per_minute']),
+        "METRICS_PATH": ".cache/metrics.json",
+        "METRICS_PROM_PATH": "",
+        "PYTHONWARNINGS": "ignore",
+    })
+    if config['alphavantage']:
+        env["ALPHA_VANTAGE_API_KEY"] = "offline"
+    else:
+        env.pop("ALPHA_VANTAGE_API_KEY", None)
+
+    with open(os.path.join(workdir, 'run.log'), 'a', encoding='utf-8') as log:
+        subprocess.run([sys.executable, os.path.abspath(__file__), '--child', json.dumps(config)],
+                       cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT, check=True)
+
+    with open(os.path.join(workdir, '.cache', 'metrics.json'), encoding='utf-8') as f:
+        report = json.load(f)
+    with open(os.path.join(workdir, '.cache', 'bench_child.json'), encoding='utf-8') as f:
+        child_result = json.load(f)
+
+    results = {g['labels']['result']: g['value'] for g in report['gauges'].get('results', [])}
+    http = {}
+    for counter in report['counters'].get('http_requests', []):
+        client = counter['labels']['client']
+        http[client] = http.get(client, 0) + counter['value']
+    wall = child_result['wall_seconds']
+    return {
+        "tickers": n,
+        "wall_seconds": round(wall, 4),
+        "tickers_per_second": round(n / wall, 2) if wall else None,
+        "results": results,
+        "stages": {stage: {"count": h['count'], "sum": h['sum'], "max": h['max'],
+                           "mean": round(h['sum'] / h['count'], 6) if h['count'] else None}
+                   for stage, h in report['stages'].items()},
+        "http_requests": http,
+        "stub": child_result['stub'],
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        sha = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                             capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                               capture_output=True, text=True).stdout.strip()
+        return sha + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_row(phase: str, row: Dict, previous: Optional[Dict] = None):
+    stages = row['stages']
+
+    def stage_sum(name: str) -> str:
+        return f"{stages[name]['sum']:.2f}" if name in stages else "-"
+
+    change = ""
+    if previous:
+        change = f" {previous['wall_seconds'] / row['wall_seconds']:>6.2f}x"
+    print(f"{row['tickers']:>6} {phase:>5} {row['wall_seconds']:>8.2f} {row['tickers_per_second']:>8.1f} "
+          f"{stage_sum('fetch'):>8} {stage_sum('indicators'):>8} {stage_sum('notion_write'):>8} "
+          f"{sum(row['http_requests'].values()):>7.0f} {sum(s['throttled'] for s in row['stub'].values()):>5}{change}")
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == '--child':
+        child(json.loads(sys.argv[2]))
+        return
+
+    parser = argparse.ArgumentParser(description="오프라인 전체 실행 벤치마크")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--latency', type=float, default=0.02, help="요청당 주입 지연 (초)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="지연 편차 (초, ±)")
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help="429(호출 제한) 응답 비율 (0~1)")
+    parser.add_argument('--retry-after', type=float, default=0.1, help="429 응답의 Retry-After (초)")
+    parser.add_argument('--notion-rate', type=float, default=1000,
+                        help="초당 노션 요청 수 (기본값은 속도 제한 없이 코드만 측정)")
+    parser.add_argument('--av-calls-per-minute', type=int, default=1_000_000)
+    parser.add_argument('--alphavantage', action='store_true', help="미국 주식을 Alpha Vantage 우선으로 수집")
+    parser.add_argument('--fixtures', help="기록된 응답 디렉터리 (있으면 합성 응답 대신 재생)")
+    parser.add_argument('--record', metavar='DIR', help="yfinance/Alpha Vantage 실제 응답을 DIR에 기록 (네트워크 필요)")
+    parser.add_argument('--tickers-file', help="합성 종목 대신 사용할 종목 파일 (한 줄에 티커 하나)")
+    parser.add_argument('--output', default=RESULTS_DIR, help="결과 저장 디렉터리")
+    parser.add_argument('--compare', help="비교할 이전 결과 파일")
+    parser.add_argument('--keep', action='store_true', help="작업 디렉터리(로그, 캐시) 유지")
+    args = parser.parse_args()
+
+    config = {
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "throttle_rate": args.throttle_rate,
+        "retry_after": args.retry_after,
+        "notion_rate": args.notion_rate,
+        "av_calls_per_minute": args.av_calls_per_minute,
+        "alphavantage": args.alphavantage,
+        "fixtures": os.path.abspath(args.fixtures) if args.fixtures else None,
+        "record": os.path.abspath(args.record) if args.record else None,
+        "tickers_file": os.path.abspath(args.tickers_file) if args.tickers_file else None,
+    }
+
+    previous = {}
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            for row in json.load(f)['results']:
+                previous[(row['tickers'], row['phase'])] = row
+
+    print(f"지연 {args.latency:g}초 | 429 비율 {args.throttle_rate:g} | "
+          f"{'Alpha Vantage 우선' if args.alphavantage else 'yfinance'}")
+    print(f"{'종목':>6} {'단계':>5} {'전체(초)':>8} {'종목/초':>8} {'수집':>8} {'지표':>8} {'노션':>8} "
+          f"{'HTTP':>7} {'429':>5}" + (f" {'이전 대비':>7}" if previous else ""))
+
+    rows = []
+    for n in args.sizes:
+        workdir = tempfile.mkdtemp(prefix=f"bench-offline-{n}-")
+        for phase in PHASES:
+            row = {"phase": phase, **run_phase(workdir, n, config)}
+            rows.append(row)
+            print_row(phase, row, previous.get((n, phase)))
+        if args.keep:
+            print(f"   작업 디렉터리: {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    commit = git_commit()
+    os.makedirs(args.output, exist_ok=True)
+    created = datetime.now(timezone.utc)
+    path = os.path.join(args.output, f"offline-{created.strftime('%Y%m%dT%H%M%S')}-{commit or 'nogit'}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"commit": commit, "created_at": created.isoformat(), "python": sys.version.split()[0],
+                   "config": config, "results": rows}, f, ensure_ascii=False, indent=2)
+    print(f"💾 결과 저장: {os.path.relpath(path)}")
+
+
+if __name__ == "__main__":
+    main()
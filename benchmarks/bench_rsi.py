@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+RSI 벤치마크 - 기존 종목별 Python 루프 vs indicators.rsi_series (종목 × 시간 벡터화)
+
+봉 개수(252/2,520/25,200)별로 여러 종목의 마지막 RSI를 계산하는 시간을 비교하고,
+두 결과가 정확히 같은지 확인합니다. 네트워크가 필요 없습니다 (무작위 가격 사용).
+
+사용법:
+    python benchmarks/bench_rsi.py
+    python benchmarks/bench_rsi.py --tickers 100 --bars 252 2520
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from indicators import rsi_series
+
+
+def calculate_rsi_loop(prices: np.ndarray, period: int = 30) -> float:
+    """기존 구현 (비교 기준)"""
+    if len(prices) < period + 1:
+        return None
+
+    deltas = np.diff(prices)
+    gains = np.where(deltas > 0, deltas, 0)
+    losses = np.where(deltas < 0, -deltas, 0)
+
+    avg_gain = np.mean(gains[:period])
+    avg_loss = np.mean(losses[:period])
+
+    for i in range(period, len(deltas)):
+        avg_gain = (avg_gain * (period - 1) + gains[i]) / period
+        avg_loss = (avg_loss * (period - 1) + losses[i]) / period
+
+    if avg_loss == 0:
+        return 100
+
+    rs = avg_gain / avg_loss
+    rsi = 100 - (100 / (1 + rs))
+    return round(rsi, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RSI 벤치마크")
+    parser.add_argument('--tickers', type=int, default=500)
+    parser.add_argument('--bars', type=int, nargs='+', default=[252, 2520, 25200])
+    parser.add_argument('--period', type=int, default=30)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+
+    print(f"{'봉 개수':>8} {'종목':>6} {'루프(초)':>10} {'벡터(초)':>10} {'배속':>8} {'일치':>6}")
+    for bars in args.bars:
+        prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (args.tickers, bars)), axis=1))
+
+        start = time.perf_counter()
+        expected = [calculate_rsi_loop(row, args.period) for row in prices]
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        series = rsi_series(prices, args.period)
+        actual = [round(value, 2) for value in series[:, -1]]
+        vector_time = time.perf_counter() - start
+
+        match = all(a == e for a, e in zip(actual, expected))
+        print(f"{bars:>8,} {args.tickers:>6} {loop_time:>10.3f} {vector_time:>10.3f} "
+              f"{loop_time / vector_time:>7.1f}x {'✅' if match else '❌':>5}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+"""
+오프라인 스텁 - yfinance(Yahoo Finance), Alpha Vantage, 노션 HTTP 응답을 네트워크 없이 재현하는 requests 어댑터
+
+세션에 mount하면 실제 응답과 같은 형식의 JSON을 돌려주며, 요청마다 지연(latency/jitter)과 429 응답을
+주입할 수 있습니다. 가격은 티커별로 고정된 난수 시드의 무작위 행보라서 실행마다 같은 값이 나옵니다.
+
+fixtures_dir에 기록된 응답({"status", "headers", "body"} JSON)이 있으면 합성 응답 대신 그대로 재생합니다.
+기록은 record()로 실제 세션의 응답을 같은 디렉터리 구조로 저장해 만듭니다 (네트워크 필요).
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import zlib
+import random
+import threading
+from datetime import date, datetime, timedelta, timezone
+from http.client import responses as HTTP_REASONS
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import requests
+from requests.adapters import BaseAdapter
+from requests.cookies import cookiejar_from_dict
+from requests.structures import CaseInsensitiveDict
+
+YAHOO_HOSTS = ('fc.yahoo.com', 'query1.finance.yahoo.com', 'query2.finance.yahoo.com')
+AV_HOST = 'www.alphavantage.co'
+NOTION_HOST = 'api.notion.com'
+HISTORY_DAYS = 400  # 합성 일봉 기간 (달력 일수)
+
+
+def _service(host: str) -> str:
+    if host in YAHOO_HOSTS:
+        return "yahoo"
+    if host == AV_HOST:
+        return "alphavantage"
+    if host == NOTION_HOST:
+        return "notion"
+    return "other"
+
+
+def fixture_path(fixtures_dir: str, request: requests.PreparedRequest) -> str:
+    """기록된 응답 파일 위치 (서비스/메서드_경로[_function].json)"""
+    url = urlparse(request.url)
+    name = f"{request.method}_{url.path.strip('/')}"
+    function = parse_qs(url.query).get('function')
+    if function:
+        name += f"_{function[0]}"
+    name = re.sub(r'[^A-Za-z0-9._-]+', '_', name)
+    return os.path.join(fixtures_dir, _service(url.hostname or ''), f"{name}.json")
+
+
+def make_response(request: requests.PreparedRequest, status: int, body, headers: Optional[Dict] = None,
+                  cookies: Optional[Dict[str, str]] = None) -> requests.Response:
+    if isinstance(body, (dict, list)):
+        body = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        headers = {'Content-Type': 'application/json', **(headers or {})}
+    elif isinstance(body, str):
+        body = body.encode('utf-8')
+    response = requests.Response()
+    response.status_code = status
+    response.reason = HTTP_REASONS.get(status, '')
+    response.url = request.url
+    response.request = request
+    response.encoding = 'utf-8'
+    response._content = body
+    response.headers = CaseInsensitiveDict({**(headers or {}), 'Content-Length': str(len(body))})
+    if cookies:
+        response.cookies = cookiejar_from_dict(cookies)
+    return response
+
+
+class SyntheticMarket:
+    """티커별 합성 일봉 (티커 이름으로 시드를 정해 항상 같은 값)"""
+
+    def __init__(self, today: Optional[date] = None):
+        self.today = today or datetime.now(timezone.utc).date()
+        self._bars: Dict[str, Dict[str, np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def bars(self, ticker: str) -> Dict[str, np.ndarray]:
+        with self._lock:
+            bars = self._bars.get(ticker)
+            if bars is None:
+                rng = np.random.default_rng(zlib.crc32(ticker.encode('utf-8')))
+                days = np.arange(np.datetime64(self.today - timedelta(days=HISTORY_DAYS)),
+                                 np.datetime64(self.today + timedelta(days=1)), dtype='datetime64[D]')
+                days = days[np.is_busday(days)]
+                n = len(days)
+                base = 50_000 if ticker.endswith(('.KS', '.KQ')) else 100
+                close = base * rng.uniform(0.5, 2) * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+                bars = self._bars[ticker] = {
+                    'date': days,
+                    'open': close * (1 + rng.normal(0, 0.005, n)),
+                    'high': close * (1 + rng.uniform(0, 0.02, n)),
+                    'low': close * (1 - rng.uniform(0, 0.02, n)),
+                    'close': close,
+                    'volume': rng.integers(100_000, 10_000_000, n).astype(float),
+                }
+            return bars
+
+    def fundamentals(self, ticker: str) -> Dict:
+        rng = random.Random(zlib.crc32(ticker.encode('utf-8')))
+        close = float(self.bars(ticker)['close'][-1])
+        shares = rng.uniform(1e8, 1e10)
+        return {
+            "name": f"{ticker} Synthetic Corp",
+            "per": round(rng.uniform(5, 60), 2),
+            "pbr": round(rng.uniform(0.5, 15), 2),
+            "market_cap": close * shares,
+        }
+
+
+class OfflineBackend:
+    """Yahoo/Alpha Vantage/노션 응답 생성기 (스레드 안전)
+
+    latency/jitter(초)만큼 응답을 늦추고, throttle_rate 비율로 호출 제한 응답을 돌려줍니다
+    (Yahoo/노션은 429 + Retry-After, Alpha Vantage는 실제처럼 200 + "Note").
+    노션 페이지는 notion_path가 주어지면 파일에서 읽고 save()로 저장해 여러 실행에 걸쳐 유지합니다.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, throttle_rate: float = 0.0,
+                 retry_after: float = 0.1, seed: int = 0, fixtures_dir: Optional[str] = None,
+                 notion_path: Optional[str] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.fixtures_dir = fixtures_dir
+        self.market = SyntheticMarket()
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._pages: Dict[str, Dict] = {}  # 노션 page_id -> 페이지
+        self.notion_path = notion_path
+        if notion_path and os.path.exists(notion_path):
+            with open(notion_path, encoding='utf-8') as f:
+                self._pages = json.load(f)
+
+    def save(self):
+        if self.notion_path:
+            with self._lock:
+                data = json.dumps(self._pages, ensure_ascii=False)
+            with open(self.notion_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+
+    def _count(self, service: str, key: str):
+        with self._lock:
+            counts = self.stats.setdefault(service, {"requests": 0, "throttled": 0, "replayed": 0})
+            counts[key] += 1
+
+    def _roll(self) -> Tuple[float, bool]:
+        with self._lock:
+            delay = max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+            return delay, self._rng.random() < self.throttle_rate
+
+    def respond(self, request: requests.PreparedRequest) -> requests.Response:
+        url = urlparse(request.url)
+        service = _service(url.hostname or '')
+        self._count(service, "requests")
+        delay, throttled = self._roll()
+        if delay:
+            time.sleep(delay)
+
+        if self.fixtures_dir:
+            path = fixture_path(self.fixtures_dir, request)
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    recorded = json.load(f)
+                self._count(service, "replayed")
+                return make_response(request, recorded['status'], recorded['body'], recorded.get('headers'))
+
+        # 쿠키/crumb 요청은 제한하지 않음 (yfinance가 다른 쿠키 방식으로 전환하지 않도록)
+        if throttled and url.path not in ('', '/', '/v1/test/getcrumb'):
+            self._count(service, "throttled")
+            if service == "alphavantage":
+                return make_response(request, 200, {"Note": "Thank you for using Alpha Vantage! (offline stub)"})
+            return make_response(request, 429, {"message": "rate limited (offline stub)"},
+                                 {'Retry-After': f"{self.retry_after:g}"})
+
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if service == "yahoo":
+            return self._yahoo(request, url.path, query)
+        if service == "alphavantage":
+            return self._alphavantage(request, query)
+        if service == "notion":
+            return self._notion(request, url.path)
+        return make_response(request, 404, {"error": "unknown host (offline stub)"})
+
+    # Yahoo Finance
+
+    def _yahoo(self, request, path: str, query: Dict[str, str]) -> requests.Response:
+        if path in ('', '/'):
+            return make_response(request, 404, "", cookies={"A3": "offline"})
+        if path == '/v1/test/getcrumb':
+            return make_response(request, 200, "offline-crumb")
+        match = re.match(r'/v8/finance/chart/([^/]+)$', path)
+        if match:
+            return make_response(request, 200, self._chart(match.group(1), query))
+        if path == '/v7/finance/quote':
+            return make_response(request, 200, self._quote([t for t in query.get('symbols', '').split(',') if t]))
+        match = re.match(r'/v10/finance/quoteSummary/([^/]+)$', path)
+        if match:
+            return make_response(request, 200, self._quote_summary(match.group(1)))
+        if '/finance/timeseries/' in path:
+            return make_response(request, 200, {"timeseries": {"result": [{"meta": {}, "timestamp": []}],
+                                                               "error": None}})
+        return make_response(request, 404, {"finance": {"result": None, "error": {"code": "Not Found"}}})
+
+    def _chart(self, ticker: str, query: Dict[str, str]) -> Dict:
+        bars = self.market.bars(ticker)
+        korean = ticker.endswith(('.KS', '.KQ'))
+        open_offset = np.timedelta64(0 if korean else 13 * 60 + 30, 'm')
+        stamps = ((bars['date'] + open_offset).astype('datetime64[s]').astype(np.int64))
+
+        if 'period1' in query:
+            mask = (stamps >= int(query['period1'])) & (stamps < int(query.get('period2', 2 ** 40)))
+        else:
+            days = {'1d': 1, '5d': 7, '1mo': 31, '3mo': 92, '6mo': 183, '1y': 366, '2y': 731}.get(
+                query.get('range', '1y'), HISTORY_DAYS)
+            cutoff = np.datetime64(self.market.today - timedelta(days=days - 1))
+            mask = bars['date'] >= cutoff
+            if days == 1:
+                mask = np.zeros(len(stamps), dtype=bool)
+                mask[-1] = True
+
+        def values(key: str) -> List[float]:
+            return [round(float(v), 4) for v in bars[key][mask]]
+
+        close = values('close')
+        last = float(bars['close'][-1])
+        return {"chart": {"result": [{
+            "meta": {
+                "currency": "KRW" if korean else "USD",
+                "symbol": ticker,
+                "exchangeName": "KSC" if korean else "NMS",
+                "instrumentType": "EQUITY",
+                "exchangeTimezoneName": "Asia/Seoul" if korean else "America/New_York",
+                "timezone": "KST" if korean else "EDT",
+                "gmtoffset": 32400 if korean else -14400,
+                "regularMarketPrice": round(last, 4),
+                "chartPreviousClose": round(float(bars['close'][-2]), 4),
+                "priceHint": 2,
+                "dataGranularity": query.get('interval', '1d'),
+                "range": query.get('range', ''),
+                "validRanges": ["1d", "5d", "1mo", "3mo", "6mo", "1y", "2y", "5y", "10y", "ytd", "max"],
+            },
+            "timestamp": [int(s) for s in stamps[mask]],
+            "indicators": {
+                "quote": [{"open": values('open'), "high": values('high'), "low": values('low'),
+                           "close": close, "volume": [int(v) for v in bars['volume'][mask]]}],
+                "adjclose": [{"adjclose": close}],
+            },
+        }], "error": None}}
+
+    def _quote(self, tickers: List[str]) -> Dict:
+        result = []
+        for ticker in tickers:
+            bars = self.market.bars(ticker)
+            close = np.datetime64(bars['date'][-1], 's') + np.timedelta64(6 * 60 + 30 if ticker.endswith(('.KS', '.KQ'))
+                                                                          else 20 * 60, 'm')
+            result.append({"symbol": ticker, "regularMarketTime": int(close.astype(np.int64)),
+                           "regularMarketPrice": round(float(bars['close'][-1]), 4),
+                           "regularMarketVolume": int(bars['volume'][-1])})
+        return {"quoteResponse": {"result": result, "error": None}}
+
+    def _quote_summary(self, ticker: str) -> Dict:
+        info = self.market.fundamentals(ticker)
+        return {"quoteSummary": {"result": [{
+            "quoteType": {"symbol": ticker, "longName": info['name'], "shortName": ticker, "quoteType": "EQUITY"},
+            "summaryDetail": {"marketCap": info['market_cap'], "trailingPE": info['per'], "maxAge": 1},
+            "defaultKeyStatistics": {"priceToBook": info['pbr'], "maxAge": 1},
+            "financialData": {"maxAge": 86400},
+            "assetProfile": {"maxAge": 86400},
+        }], "error": None}}
+
+    # Alpha Vantage
+
+    def _alphavantage(self, request, query: Dict[str, str]) -> requests.Response:
+        ticker = query.get('symbol', '')
+        function = query.get('function')
+        if function == 'TIME_SERIES_DAILY':
+            bars = self.market.bars(ticker)
+            series = {}
+            for i in range(len(bars['date']) - 1, max(-1, len(bars['date']) - 101), -1):
+                series[str(bars['date'][i])] = {
+                    "1. open": f"{bars['open'][i]:.4f}", "2. high": f"{bars['high'][i]:.4f}",
+                    "3. low": f"{bars['low'][i]:.4f}", "4. close": f"{bars['close'][i]:.4f}",
+                    "5. volume": f"{int(bars['volume'][i])}",
+                }
+            return make_response(request, 200, {"Meta Data": {"2. Symbol": ticker}, "Time Series (Daily)": series})
+        if function == 'OVERVIEW':
+            info = self.market.fundamentals(ticker)
+            return make_response(request, 200, {
+                "Symbol": ticker, "Name": info['name'], "PERatio": str(info['per']),
+                "PriceToBookRatio": str(info['pbr']), "MarketCapitalization": str(int(info['market_cap'])),
+            })
+        return make_response(request, 200, {"Error Message": "Invalid API call (offline stub)"})
+
+    # 노션
+
+    def _notion(self, request, path: str) -> requests.Response:
+        body = json.loads(request.body) if request.body else {}
+        now = datetime.now(timezone.utc).replace(second=0, microsecond=0).isoformat()
+
+        if request.method == 'POST' and re.match(r'/v1/databases/[^/]+/query$', path):
+            with self._lock:
+                pages = list(self._pages.values())
+            since = (body.get('filter') or {}).get('last_edited_time', {}).get('on_or_after')
+            if since:
+                pages = [p for p in pages if p['last_edited_time'] >= since]
+            start = int(body.get('start_cursor') or 0)
+            size = int(body.get('page_size', 100))
+            chunk = pages[start:start + size]
+            more = start + size < len(pages)
+            return make_response(request, 200, {"object": "list", "results": chunk, "has_more": more,
+                                                "next_cursor": str(start + size) if more else None})
+
+        if request.method == 'POST' and path == '/v1/pages':
+            page = {"object": "page", "id": str(uuid.uuid4()), "last_edited_time": now, "properties": {}}
+            self._apply(page, body.get('properties', {}))
+            with self._lock:
+                self._pages[page['id']] = page
+            return make_response(request, 200, page)
+
+        match = re.match(r'/v1/pages/([^/]+)$', path)
+        if request.method == 'PATCH' and match:
+            with self._lock:
+                page = self._pages.get(match.group(1))
+                if page is None:
+                    return make_response(request, 404, {"object": "error", "code": "object_not_found"})
+                self._apply(page, body.get('properties', {}))
+                page['last_edited_time'] = now
+            return make_response(request, 200, page)
+
+        return make_response(request, 404, {"object": "error", "code": "invalid_request_url"})
+
+    @staticmethod
+    def _apply(page: Dict, properties: Dict):
+        """요청 형식 속성을 응답 형식(type, plain_text 포함)으로 저장"""
+        for name, prop in properties.items():
+            if ':' in name:
+                continue
+            prop = json.loads(json.dumps(prop))
+            for kind in ('number', 'select', 'title', 'rich_text'):
+                if kind in prop:
+                    prop['type'] = kind
+                    if kind in ('title', 'rich_text'):
+                        for text in prop[kind]:
+                            text['plain_text'] = text.get('text', {}).get('content', '')
+            page['properties'][name] = prop
+
+
+class StubAdapter(BaseAdapter):
+    """모든 요청을 OfflineBackend로 보내는 requests 어댑터"""
+
+    def __init__(self, backend: OfflineBackend):
+        super().__init__()
+        self.backend = backend
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        return self.backend.respond(request)
+
+    def close(self):
+        pass
+
+
+def install(sessions: List[requests.Session], backend: OfflineBackend):
+    adapter = StubAdapter(backend)
+    for session in sessions:
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+
+
+def record(session: requests.Session, fixtures_dir: str):
+    """실제 응답을 fixtures_dir에 저장 (같은 요청 경로는 마지막 응답으로 덮어씀)"""
+
+    def hook(response, *args, **kwargs):
+        path = fixture_path(fixtures_dir, response.request)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            body = response.json()
+        except ValueError:
+            body = response.text
+        headers = {k: v for k, v in response.headers.items() if k.lower() in ('content-type', 'retry-after')}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"status": response.status_code, "headers": headers, "body": body}, f, ensure_ascii=False)
+        return response
+
+    session.hooks.setdefault('response', []).append(hook)
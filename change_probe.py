@@ -0,0 +1,75 @@
+"""
+변경 확인 - 수집 전에 종목별 최신 봉(날짜, 종가, 거래량)만 묶어서 받아 지난번 수집 때와 같으면
+히스토리/펀더멘털 수집, 지표 계산, 노션 기록을 모두 건너뜁니다.
+
+최신 봉은 제공자의 probe()로 받으며 (yfinance는 묶음당 요청 한 번), 종목별 마지막 수집 때의 값은
+로컬 상태 파일에 보관합니다. 값이 같아도 CHANGE_PROBE_MAX_AGE_HOURS가 지나면 펀더멘털 등을 반영하기 위해 다시 수집합니다.
+"""
+
+import os
+import json
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Set
+
+CHANGE_PROBE_PATH = os.environ.get('CHANGE_PROBE_PATH', '.cache/change_probe.json')  # 빈 값이면 변경 확인 안 함
+CHANGE_PROBE_MAX_AGE_HOURS = float(os.environ.get('CHANGE_PROBE_MAX_AGE_HOURS', '24'))  # 값이 같아도 다시 수집하는 주기
+
+
+class ChangeProbe:
+    """종목별 마지막 수집 때의 최신 봉 (티커 -> {"bar": [날짜, 종가, 거래량], "at": 수집 시각})"""
+
+    def __init__(self, path: str, max_age_hours: float):
+        self.path = path
+        self.max_age = timedelta(hours=max_age_hours)
+        self.skipped = 0
+        self.probed = 0
+        self._lock = threading.Lock()
+        self._state: Dict[str, Dict] = {}
+        if path:
+            try:
+                with open(path, encoding='utf-8') as f:
+                    self._state = json.load(f)
+            except (OSError, ValueError):
+                pass
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def unchanged(self, bars: Dict[str, List]) -> Set[str]:
+        """최신 봉이 지난번 수집 때와 같고 아직 다시 수집할 때가 안 된 종목"""
+        now = datetime.now()
+        same = set()
+        with self._lock:
+            for ticker, bar in bars.items():
+                entry = self._state.get(ticker)
+                if entry and entry['bar'] == bar and now - datetime.fromisoformat(entry['at']) < self.max_age:
+                    same.add(ticker)
+            self.probed += len(bars)
+            self.skipped += len(same)
+        return same
+
+    def record(self, ticker: str, bar: List):
+        """수집에 성공한 종목의 최신 봉 기록"""
+        with self._lock:
+            self._state[ticker] = {"bar": bar, "at": datetime.now().isoformat(timespec='seconds')}
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = json.dumps(self._state, ensure_ascii=False)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp, self.path)
+
+    def summary(self) -> str:
+        return f"확인 {self.probed}개 | 변경 없어 건너뜀 {self.skipped}개"
+
+
+change_probe = ChangeProbe(CHANGE_PROBE_PATH, CHANGE_PROBE_MAX_AGE_HOURS)
@@ -0,0 +1,173 @@
+"""
+상주(데몬) 실행 - 세션/캐시/노션 색인을 메모리에 유지한 채 내부 스케줄러로 주기적으로 갱신
+
+장이 열린 시장의 종목은 DAEMON_INTERVAL초마다, 닫힌 시장의 종목은 마감 후 한 번만 갱신합니다
+(market_hours.MarketSchedule). SIGINT/SIGTERM을 받으면 진행 중인 주기를 마치고 상태를 저장한 뒤 종료하며,
+상태는 헬스 파일(DAEMON_HEALTH_PATH)과 선택적인 HTTP 엔드포인트(DAEMON_HEALTH_PORT)로 확인할 수 있습니다.
+"""
+
+import os
+import json
+import time
+import signal
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Set
+
+from market_hours import MarketSchedule
+
+DAEMON_INTERVAL = float(os.environ.get('DAEMON_INTERVAL', '30'))  # 장중 갱신 주기 (초)
+DAEMON_INDEX_SYNC_MINUTES = float(os.environ.get('DAEMON_INDEX_SYNC_MINUTES', '10'))  # 노션 색인 변경분 조회 주기
+DAEMON_HEALTH_PATH = os.environ.get('DAEMON_HEALTH_PATH', '.cache/health.json')
+DAEMON_HEALTH_PORT = int(os.environ.get('DAEMON_HEALTH_PORT', '0'))  # 0이면 HTTP 엔드포인트 사용 안 함
+
+
+class Health:
+    """데몬 상태 (헬스 파일 기록 + HTTP 응답용, 스레드 안전)
+
+    마지막 스케줄러 루프가 stale_after초 안에 돌았으면 정상으로 봅니다.
+    """
+
+    def __init__(self, path: str, stale_after: float):
+        self.path = path
+        self.stale_after = stale_after
+        self._lock = threading.Lock()
+        self._heartbeat = time.monotonic()
+        self._status = {
+            "pid": os.getpid(),
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "state": "starting",
+            "cycles": 0,
+            "last_cycle": None,
+        }
+
+    def beat(self, state: str, **fields):
+        with self._lock:
+            self._heartbeat = time.monotonic()
+            self._status.update(state=state, heartbeat_at=datetime.now(timezone.utc).isoformat(), **fields)
+        self.write()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            status = dict(self._status)
+            status["healthy"] = status["state"] != "stopped" and time.monotonic() - self._heartbeat < self.stale_after
+        return status
+
+    def write(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def serve(self, port: int) -> ThreadingHTTPServer:
+        """GET /health -> 상태 JSON (정상 200, 비정상 503)"""
+        health = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') not in ('', '/health'):
+                    self.send_error(404)
+                    return
+                status = health.snapshot()
+                body = json.dumps(status, ensure_ascii=False).encode('utf-8')
+                self.send_response(200 if status["healthy"] else 503)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(('', port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+class Daemon:
+    """내부 스케줄러로 종목을 주기적으로 갱신
+
+    cycle(stocks, refreshed)는 주어진 종목을 한 번 수집/기록하고 결과 개수 dict를 반환하며,
+    모든 종목을 갱신한 시장을 refreshed에 담습니다 (그 시장만 갱신 완료로 기록).
+    before_cycle()은 매 주기 시작 전에 호출됩니다 (노션 색인 갱신 등).
+    """
+
+    def __init__(self, cycle: Callable[[List[Dict], Set[str]], Dict[str, int]], stocks: List[Dict],
+                 schedule: MarketSchedule, interval: float = DAEMON_INTERVAL,
+                 before_cycle: Optional[Callable[[], None]] = None,
+                 health_path: str = DAEMON_HEALTH_PATH, health_port: int = DAEMON_HEALTH_PORT,
+                 stale_after: Optional[float] = None):
+        self.cycle = cycle
+        self.stocks = stocks
+        self.interval = interval
+        self.schedule = schedule
+        self.before_cycle = before_cycle
+        self.health = Health(health_path, stale_after or max(3 * interval, 300))
+        self.health_port = health_port
+        self.stop_event = threading.Event()
+        self.cycles = 0
+        self.totals: Dict[str, int] = {}
+
+    def stop(self, *_):
+        if not self.stop_event.is_set():
+            print("🛑 종료 요청: 진행 중인 주기를 마치고 종료합니다")
+        self.stop_event.set()
+
+    def due_stocks(self) -> List[Dict]:
+        """이번 주기에 갱신할 종목 (장중인 시장 + 마감 후 아직 갱신하지 않은 시장)"""
+        due_markets = self.schedule.due_markets({s['market'] for s in self.stocks})
+        return [s for s in self.stocks if s['market'] in due_markets]
+
+    def run(self):
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        server = self.health.serve(self.health_port) if self.health_port else None
+
+        print(f"🔁 데몬 시작: 장중 {self.interval:g}초마다, 장 마감 후 한 번 갱신"
+              + (f", 헬스 체크 :{self.health_port}/health" if server else ""))
+
+        try:
+            while not self.stop_event.is_set():
+                started = time.monotonic()
+                started_at = datetime.now(timezone.utc)
+                due = self.due_stocks()
+                if due:
+                    self.health.beat("running")
+                    try:
+                        if self.before_cycle:
+                            self.before_cycle()
+                        refreshed: Set[str] = set()
+                        counts = self.cycle(due, refreshed)
+                    except Exception as e:
+                        # 한 주기가 실패해도 다음 주기는 계속 실행
+                        print(f"❌ 갱신 주기 오류: {str(e)}")
+                        self.health.beat("idle", last_error=str(e))
+                        self.stop_event.wait(self.interval)
+                        continue
+                    self.cycles += 1
+                    self.schedule.mark(refreshed, started_at)
+                    self.schedule.save()
+                    for key, value in counts.items():
+                        self.totals[key] = self.totals.get(key, 0) + value
+                    elapsed = time.monotonic() - started
+                    print(f"🔁 주기 {self.cycles}: {len(due)}개 종목, {elapsed:.1f}초 | "
+                          + " | ".join(f"{k} {v}" for k, v in counts.items()))
+                    self.health.beat("idle", cycles=self.cycles, last_cycle={
+                        "finished_at": datetime.now(timezone.utc).isoformat(),
+                        "seconds": round(elapsed, 2),
+                        "stocks": len(due),
+                        **counts,
+                    })
+                else:
+                    self.health.beat("idle")
+                self.stop_event.wait(max(0.0, self.interval - (time.monotonic() - started)))
+        finally:
+            self.health.beat("stopped")
+            if server:
+                server.shutdown()
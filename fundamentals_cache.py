@@ -0,0 +1,95 @@
+"""
+펀더멘털 캐시 - PER/PBR/시가총액/종목명처럼 하루에 한 번 정도만 바뀌는 값을
+실행 간에 파일로 보관합니다 (TTL 만료 + 최대 개수 초과 시 오래된 항목부터 제거).
+"""
+
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+# 펀더멘털 캐시 설정 (모든 데이터 제공자가 공유)
+FUNDAMENTALS_CACHE_PATH = os.environ.get('FUNDAMENTALS_CACHE_PATH', '.cache/fundamentals.json')
+FUNDAMENTALS_TTL_HOURS = float(os.environ.get('FUNDAMENTALS_TTL_HOURS', '24'))
+FUNDAMENTALS_CACHE_SIZE = int(os.environ.get('FUNDAMENTALS_CACHE_SIZE', '5000'))
+
+
+class FundamentalsCache:
+    """TTL과 크기 제한이 있는 파일 기반 캐시 (적중/미스 횟수 집계)"""
+
+    def __init__(self, path: str, ttl_seconds: float = 86400, max_entries: int = 5000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._load()
+
+    def _load(self):
+        if not self.path:
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        # 저장 시각 순으로 정렬해 오래된 항목이 먼저 제거되도록 함
+        for key, entry in sorted(data.items(), key=lambda item: item[1].get('t', 0)):
+            self._entries[key] = entry
+
+    def get(self, key: str) -> Optional[Dict]:
+        """유효한 캐시 값 반환 (없거나 만료되면 None)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() - entry['t'] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry['v']
+
+    def set(self, key: str, value: Dict):
+        with self._lock:
+            self._entries[key] = {'t': time.time(), 'v': value}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_fetch(self, key: str, fetch: Callable[[], Optional[Dict]]) -> Optional[Dict]:
+        """캐시에 없으면 fetch()로 가져와 저장 (None은 저장하지 않음)"""
+        value = self.get(key)
+        if value is None:
+            value = fetch()
+            if value is not None:
+                self.set(key, value)
+        return value
+
+    def save(self):
+        """만료된 항목을 정리하고 파일에 저장"""
+        if not self.path:
+            return
+        with self._lock:
+            now = time.time()
+            data = {k: e for k, e in self._entries.items() if now - e['t'] <= self.ttl_seconds}
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def summary(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0
+        return f"적중 {self.hits}개 | 미스 {self.misses}개 ({rate:.0f}%)"
+
+
+fundamentals_cache = FundamentalsCache(FUNDAMENTALS_CACHE_PATH, FUNDAMENTALS_TTL_HOURS * 3600,
+                                       FUNDAMENTALS_CACHE_SIZE)
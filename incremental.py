@@ -0,0 +1,303 @@
+"""
+증분 지표 - 새 봉 하나마다 O(1)로 갱신되는 종목별 지표 상태
+
+- RollingSMA: 최근 period개 종가 링 버퍼
+- WilderRSI: Wilder 평활 평균 상승/하락폭 (avg_gain/avg_loss)
+- RollingExtreme: 단조 덱(monotonic deque)으로 최근 window_days일 최고가/최저가
+
+상태는 실행 간에 파일로 보관하며, 같은 봉 시퀀스에 대해 indicators.compute_indicators와
+비트 단위로 같은 값을 냅니다 (이동평균은 링 버퍼의 period개 값에 같은 np.mean을 적용).
+"""
+
+import os
+import json
+import threading
+from collections import deque
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from indicators import SMA_PERIODS, RSI_PERIOD, ma_signals
+
+INDICATOR_STATE_PATH = os.environ.get('INDICATOR_STATE_PATH', '.cache/indicator_state.json')
+EXTREME_WINDOW_DAYS = 365  # 52주 최고/최저 (PriceStore 보관 기간과 같음)
+
+# (날짜, 고가, 저가, 종가, 거래량)
+Bar = Tuple[date, float, float, float, float]
+
+
+class RollingSMA:
+    """최근 period개 종가의 단순 이동평균"""
+
+    def __init__(self, period: int, window: Optional[List[float]] = None):
+        self.period = period
+        self.window = deque(window or [], maxlen=period)
+
+    def update(self, price: float):
+        self.window.append(price)
+
+    def value(self, live: Optional[float] = None) -> float:
+        """이동평균 (live가 주어지면 그 값을 마지막 봉으로 간주, 봉이 부족하면 NaN)"""
+        values = list(self.window)
+        if live is not None:
+            values = (values + [live])[-self.period:]
+        if len(values) < self.period:
+            return np.nan
+        return np.mean(np.array(values))
+
+
+class WilderRSI:
+    """Wilder RSI (처음 period개 변화량의 평균으로 시작해 봉마다 평활)"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.last: Optional[float] = None
+        self.seed: List[Tuple[float, float]] = []  # 시작 전까지 모은 (상승폭, 하락폭)
+        self.avg_gain: Optional[float] = None
+        self.avg_loss: Optional[float] = None
+
+    def _move(self, price: float) -> Tuple[float, float]:
+        delta = price - self.last
+        return (delta if delta > 0 else 0.0, -delta if delta < 0 else 0.0)
+
+    def _step(self, gain: float, loss: float) -> Tuple[float, float]:
+        p = self.period
+        return ((self.avg_gain * (p - 1) + gain) / p, (self.avg_loss * (p - 1) + loss) / p)
+
+    def update(self, price: float):
+        if self.last is not None:
+            gain, loss = self._move(price)
+            if self.avg_gain is not None:
+                self.avg_gain, self.avg_loss = self._step(gain, loss)
+            else:
+                self.seed.append((gain, loss))
+                if len(self.seed) == self.period:
+                    self.avg_gain = np.mean(np.array([g for g, _ in self.seed]))
+                    self.avg_loss = np.mean(np.array([l for _, l in self.seed]))
+                    self.seed = []
+        self.last = price
+
+    def value(self, live: Optional[float] = None) -> float:
+        avg_gain, avg_loss = self.avg_gain, self.avg_loss
+        if live is not None and self.last is not None:
+            gain, loss = self._move(live)
+            if avg_gain is not None:
+                avg_gain, avg_loss = self._step(gain, loss)
+            elif len(self.seed) == self.period - 1:
+                avg_gain = np.mean(np.array([g for g, _ in self.seed] + [gain]))
+                avg_loss = np.mean(np.array([l for _, l in self.seed] + [loss]))
+        if avg_gain is None:
+            return np.nan
+        if avg_loss == 0:
+            return 100.0
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+    def to_dict(self) -> Dict:
+        return {"last": self.last, "seed": self.seed, "avg_gain": self.avg_gain, "avg_loss": self.avg_loss}
+
+    def load(self, data: Dict):
+        self.last = data["last"]
+        self.seed = [tuple(move) for move in data["seed"]]
+        self.avg_gain = data["avg_gain"]
+        self.avg_loss = data["avg_loss"]
+
+
+class RollingExtreme:
+    """최근 window_days일 최고값(highest=True) 또는 최저값 (단조 덱)"""
+
+    def __init__(self, window_days: int, highest: bool):
+        self.window = timedelta(days=window_days)
+        self.highest = highest
+        self.queue = deque()  # (날짜, 값), 값이 단조 감소(최고) 또는 증가(최저)
+
+    def _dominates(self, a: float, b: float) -> bool:
+        return a >= b if self.highest else a <= b
+
+    def update(self, day: date, value: float):
+        if not np.isnan(value):
+            while self.queue and self._dominates(value, self.queue[-1][1]):
+                self.queue.pop()
+            self.queue.append((day, value))
+        cutoff = day - self.window
+        while self.queue and self.queue[0][0] < cutoff:
+            self.queue.popleft()
+
+    def value(self, live_day: Optional[date] = None, live: Optional[float] = None) -> float:
+        cutoff = live_day - self.window if live_day is not None else None
+        best = np.nan
+        for day, value in self.queue:
+            if cutoff is None or day >= cutoff:
+                best = value
+                break
+        if live is not None and not np.isnan(live) and (np.isnan(best) or self._dominates(live, best)):
+            best = live
+        return best
+
+
+class IndicatorState:
+    """한 종목의 증분 지표 상태 (마감된 봉은 update, 장중 봉은 values(live)로 반영)"""
+
+    def __init__(self, window_days: int = EXTREME_WINDOW_DAYS):
+        self.window_days = window_days
+        self.last_date: Optional[date] = None
+        self.last_close: Optional[float] = None
+        self.refreshed_at: Optional[str] = None  # 상태를 만든 저장소의 전체 다운로드 시각
+        self.sma = {period: RollingSMA(period) for period in SMA_PERIODS}
+        self.rsi = WilderRSI(RSI_PERIOD)
+        self.high = RollingExtreme(window_days, highest=True)
+        self.low = RollingExtreme(window_days, highest=False)
+        self.volumes = deque(maxlen=5)
+
+    @classmethod
+    def from_bars(cls, bars: np.ndarray, refreshed_at: Optional[str] = None) -> "IndicatorState":
+        """저장소 일봉 배열(price_store.PRICE_DTYPE)로 상태 생성"""
+        state = cls()
+        state.refreshed_at = refreshed_at
+        state.extend(bars)
+        return state
+
+    def extend(self, bars: np.ndarray):
+        """last_date 이후의 봉만 반영"""
+        if self.last_date is not None:
+            bars = bars[bars['date'] > np.datetime64(self.last_date, 'D')]
+        for bar in bars:
+            self.update((bar['date'].astype(date), float(bar['high']), float(bar['low']),
+                         float(bar['close']), float(bar['volume'])))
+
+    def update(self, bar: Bar):
+        day, high, low, close, volume = bar
+        if self.last_date is not None and day <= self.last_date:
+            return
+        for sma in self.sma.values():
+            sma.update(close)
+        self.rsi.update(close)
+        self.high.update(day, high)
+        self.low.update(day, low)
+        self.volumes.append(volume)
+        self.last_close = close
+        self.last_date = day
+
+    def values(self, live: Optional[Bar] = None) -> Dict[str, object]:
+        """노션 지표 속성 (compute_indicators + indicator_rows와 같은 값, 계산할 수 없으면 None)
+
+        live가 주어지면 마지막 마감 봉 다음의 장중 봉으로 간주합니다.
+        """
+        if live is None and self.last_date is None:
+            return {}
+        if live is not None:
+            day, high, low, close, volume = live
+            current, prev = close, self.last_close if self.last_close is not None else close
+            volumes = np.array(list(self.volumes)[-4:] + [volume]) if len(self.volumes) else np.array([volume])
+        else:
+            day, high, low = self.last_date, None, None
+            current, volume = self.last_close, self.volumes[-1]
+            closes = self.sma[max(SMA_PERIODS)].window  # 최근 종가 (가장 긴 이동평균의 링 버퍼)
+            prev = closes[-2] if len(closes) > 1 else current
+            volumes = np.array(self.volumes)
+
+        live_close = close if live is not None else None
+        change_pct = current / prev - 1 if prev > 0 else 0
+        avg_volume_5d = np.nansum(volumes) / np.maximum((~np.isnan(volumes)).sum(), 1)
+        volume_ratio = volume / avg_volume_5d - 1 if avg_volume_5d > 0 else 0
+
+        result = {
+            "현재가": np.round(np.float64(current), 2),
+            "등락률": np.round(np.float64(change_pct), 4),
+            "거래량": volume,
+            "5일평균거래량대비": np.round(np.float64(volume_ratio), 4),
+        }
+        for period, sma in self.sma.items():
+            result[f"SMA{period}"] = np.round(sma.value(live_close), 2)
+        result[f"RSI{RSI_PERIOD}"] = np.round(np.float64(self.rsi.value(live_close)), 2)
+        result["52주최고가"] = np.round(np.float64(self.high.value(day, high)), 2)
+        result["52주최저가"] = np.round(np.float64(self.low.value(day, low)), 2)
+        result["골든크로스데드크로스"] = ma_signals(*(np.array([result[f"SMA{p}"]]) for p in SMA_PERIODS))[0]
+
+        row = {}
+        for key, value in result.items():
+            if isinstance(value, str):
+                row[key] = value
+            elif np.isnan(value):
+                row[key] = None
+            else:
+                row[key] = int(value) if key == "거래량" else float(value)
+        return row
+
+    def to_dict(self) -> Dict:
+        return {
+            "last_date": self.last_date.isoformat() if self.last_date else None,
+            "last_close": self.last_close,
+            "refreshed_at": self.refreshed_at,
+            "sma": {str(period): list(sma.window) for period, sma in self.sma.items()},
+            "rsi": self.rsi.to_dict(),
+            "high": [(day.isoformat(), value) for day, value in self.high.queue],
+            "low": [(day.isoformat(), value) for day, value in self.low.queue],
+            "volumes": list(self.volumes),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "IndicatorState":
+        state = cls()
+        state.last_date = date.fromisoformat(data["last_date"]) if data["last_date"] else None
+        state.last_close = data["last_close"]
+        state.refreshed_at = data["refreshed_at"]
+        for period, window in data["sma"].items():
+            state.sma[int(period)] = RollingSMA(int(period), window)
+        state.rsi.load(data["rsi"])
+        state.high.queue = deque((date.fromisoformat(day), value) for day, value in data["high"])
+        state.low.queue = deque((date.fromisoformat(day), value) for day, value in data["low"])
+        state.volumes = deque(data["volumes"], maxlen=5)
+        return state
+
+
+class IndicatorBook:
+    """종목별 IndicatorState 모음 (파일로 보관, 스레드 안전)
+
+    저장소가 전체 다운로드(수정주가 반영)를 하면 해당 종목의 상태를 일봉으로 다시 만듭니다.
+    """
+
+    def __init__(self, path: str = INDICATOR_STATE_PATH):
+        self.path = path
+        self.states: Dict[str, IndicatorState] = {}
+        self._lock = threading.Lock()
+        if path:
+            try:
+                with open(path, encoding='utf-8') as f:
+                    self.states = {ticker: IndicatorState.from_dict(data) for ticker, data in json.load(f).items()}
+            except (OSError, ValueError, KeyError):
+                self.states = {}
+
+    def sync(self, ticker: str, bars: np.ndarray, refreshed_at: Optional[str] = None,
+             before: Optional[date] = None) -> IndicatorState:
+        """저장소 일봉(before 이전 봉만)을 반영한 상태 반환 (새 봉만 O(1)씩 반영)"""
+        if before is not None:
+            bars = bars[bars['date'] < np.datetime64(before, 'D')]
+        with self._lock:
+            state = self.states.get(ticker)
+            if state is None or state.refreshed_at != refreshed_at or not _continues(state, bars):
+                state = self.states[ticker] = IndicatorState.from_bars(bars, refreshed_at)
+            else:
+                state.extend(bars)
+            return state
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = json.dumps({ticker: state.to_dict() for ticker, state in self.states.items()})
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp, self.path)
+
+
+def _continues(state: IndicatorState, bars: np.ndarray) -> bool:
+    """상태의 마지막 봉이 저장소 일봉과 같은지 (다르면 상태를 다시 만들어야 함)"""
+    if state.last_date is None:
+        return False
+    match = bars[bars['date'] == np.datetime64(state.last_date, 'D')]
+    return len(match) == 1 and float(match['close'][0]) == state.last_close
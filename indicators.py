@@ -0,0 +1,216 @@
+"""
+기술적 지표 계산 - 여러 종목을 한 번에 처리하는 벡터화 구현
+
+종목 × 날짜 가격 행렬(히스토리가 짧은 종목은 앞쪽을 NaN으로 채워 오른쪽 정렬)을 받아
+SMA/RSI/52주 최고·최저/거래량 비율/등락률/이동평균 배열 상태를 한 번에 계산합니다.
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+SMA_PERIODS = (20, 50, 200)
+RSI_PERIOD = 30
+
+# determine_ma_signal과 같은 순서로 판단
+MA_SIGNALS = ["정배열", "역배열", "골든크로스 (20>50)", "골든크로스 (50>200)", "데드크로스 (20<50)", "데드크로스 (50<200)"]
+
+
+def rsi_series(prices: np.ndarray, period: int = 30) -> np.ndarray:
+    """Wilder RSI 전체 시계열
+
+    prices는 1-D (시간) 또는 2-D (종목 × 시간) 배열입니다. 2-D에서 히스토리가
+    짧은 종목은 앞쪽을 NaN으로 채워(오른쪽 정렬) 넘기면 됩니다.
+    RSI를 계산할 수 없는 구간(처음 period개 봉)은 NaN입니다.
+
+    시간 축 재귀식은 종목 축 전체에 대해 한 번에 계산하며, 연산 순서가
+    기존 스칼라 구현과 같아 결과가 비트 단위로 일치합니다.
+    """
+    prices = np.asarray(prices, dtype=float)
+    single = prices.ndim == 1
+    p = np.atleast_2d(prices)
+    n_tickers, n_bars = p.shape
+
+    # 종목별 첫 유효 봉 위치와 첫 RSI가 나오는 위치
+    valid = ~np.isnan(p)
+    start = np.where(valid.any(axis=1), valid.argmax(axis=1), n_bars)
+    seed_end = start + period
+    rows = np.nonzero(seed_end < n_bars)[0]
+
+    out = np.full((n_tickers, n_bars), np.nan)
+    if rows.size == 0:
+        return out[0] if single else out
+
+    # 시간 우선 (시간 × 상승/하락 × 종목) 배열로 계산
+    deltas = np.diff(np.ascontiguousarray(p.T), axis=0)
+    moves = np.empty((n_bars - 1, 2, n_tickers))
+    moves[:, 0] = np.where(deltas > 0, deltas, 0)
+    moves[:, 1] = np.where(deltas < 0, -deltas, 0)
+
+    # 첫 period개 변화량의 단순 평균으로 시작
+    window = start[rows, None] + np.arange(period)
+    seed = np.full((2, n_tickers), np.nan)
+    seed_moves = np.ascontiguousarray(moves[window, :, rows[:, None]].transpose(2, 0, 1))
+    seed[:, rows] = np.mean(seed_moves, axis=-1)
+
+    # 시간 축으로 Wilder 평활 (상승/하락 평균을 함께 계산)
+    first = seed_end[rows].min()
+    aligned_from = seed_end[rows].max()
+    hist = np.full((n_bars, 2, n_tickers), np.nan)
+
+    hist[first] = seed
+    for t in range(first + 1, n_bars):
+        avg = hist[t]
+        np.multiply(hist[t - 1], period - 1, out=avg)
+        np.add(avg, moves[t - 1], out=avg)
+        np.divide(avg, period, out=avg)
+        if t <= aligned_from:
+            # 아직 시작 전이거나 이번 봉에서 시작하는 종목은 평활하지 않음
+            waiting = seed_end >= t
+            avg[:, waiting] = seed[:, waiting]
+
+    gain_hist, loss_hist = hist[:, 0], hist[:, 1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = gain_hist / loss_hist
+        rsi = np.where(loss_hist == 0, 100.0, 100 - (100 / (1 + rs)))
+
+    out = rsi.T.copy()
+    out[np.arange(n_bars)[None, :] < seed_end[:, None]] = np.nan
+    return out[0] if single else out
+
+
+def calculate_rsi(prices: np.ndarray, period: int = 30) -> Optional[float]:
+    """RSI 계산 (마지막 값)"""
+    if len(prices) < period + 1:
+        return None
+    return round(rsi_series(prices, period)[-1], 2)
+
+
+def calculate_sma(prices: np.ndarray, period: int) -> Optional[float]:
+    """단순 이동평균 계산"""
+    if len(prices) < period:
+        return None
+    return round(np.mean(prices[-period:]), 2)
+
+
+def determine_ma_signal(current_price: float, sma20: float, sma50: float, sma200: float) -> str:
+    """이동평균선 배열 상태 판단"""
+    if not all([sma20, sma50, sma200]):
+        return "-"
+    
+    if sma20 > sma50 > sma200:
+        return "정배열"
+    elif sma20 < sma50 < sma200:
+        return "역배열"
+    elif sma20 > sma50:
+        return "골든크로스 (20>50)"
+    elif sma50 > sma200:
+        return "골든크로스 (50>200)"
+    elif sma20 < sma50:
+        return "데드크로스 (20<50)"
+    elif sma50 < sma200:
+        return "데드크로스 (50<200)"
+    else:
+        return "-"
+
+
+def ma_signals(sma20: np.ndarray, sma50: np.ndarray, sma200: np.ndarray) -> np.ndarray:
+    """determine_ma_signal의 벡터화 버전 (NaN 또는 0이 있으면 "-")"""
+    with np.errstate(invalid='ignore'):
+        valid = ~(np.isnan(sma20) | np.isnan(sma50) | np.isnan(sma200)) & (sma20 != 0) & (sma50 != 0) & (sma200 != 0)
+        conditions = [
+            valid & (sma20 > sma50) & (sma50 > sma200),
+            valid & (sma20 < sma50) & (sma50 < sma200),
+            valid & (sma20 > sma50),
+            valid & (sma50 > sma200),
+            valid & (sma20 < sma50),
+            valid & (sma50 < sma200),
+        ]
+    return np.select(conditions, MA_SIGNALS, default="-").astype(object)
+
+
+def align_histories(frames: List) -> Dict[str, np.ndarray]:
+    """종목별 히스토리 DataFrame 목록 -> 오른쪽 정렬된 종목 × 날짜 행렬 (compute_indicators 인자)
+
+    종목마다 자신의 마지막 N개 봉을 사용하므로 거래일이 다른 종목(한국/미국)을 섞어도
+    종목별로 계산한 것과 같은 결과가 나옵니다.
+    """
+    n_bars = max((len(frame) for frame in frames), default=0)
+    matrices = {}
+    for column in ('Close', 'High', 'Low', 'Volume'):
+        matrix = np.full((len(frames), n_bars), np.nan)
+        for i, frame in enumerate(frames):
+            if len(frame):
+                matrix[i, n_bars - len(frame):] = frame[column].to_numpy(dtype=float)
+        matrices[column.lower()] = matrix
+    return matrices
+
+
+def compute_indicators(close: np.ndarray, high: np.ndarray, low: np.ndarray,
+                       volume: np.ndarray) -> Dict[str, np.ndarray]:
+    """종목 × 날짜 행렬에서 모든 지표를 한 번에 계산 (노션 속성명 -> 종목별 값 배열)
+
+    get_stock_data와 같은 반올림을 적용하며, 계산할 수 없는 값은 NaN입니다.
+    """
+    n_tickers, n_bars = close.shape
+    if n_bars == 0:
+        close = high = low = volume = np.full((n_tickers, 1), np.nan)
+        n_bars = 1
+    lengths = n_bars - np.where(np.isnan(close).all(axis=1), n_bars, np.isnan(close).argmin(axis=1))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        current_price = close[:, -1]
+        prev_close = close[:, -2] if n_bars > 1 else current_price
+        prev_close = np.where(lengths > 1, prev_close, current_price)
+        change_pct = np.where(prev_close > 0, current_price / prev_close - 1, 0)
+
+        # 5일 평균 거래량 대비
+        recent_volume = volume[:, -5:]
+        counts = (~np.isnan(recent_volume)).sum(axis=1)
+        avg_volume_5d = np.where(counts > 0, np.nansum(recent_volume, axis=1) / np.maximum(counts, 1), np.nan)
+        current_volume = volume[:, -1]
+        volume_ratio = np.where(avg_volume_5d > 0, current_volume / avg_volume_5d - 1, 0)
+
+        result = {
+            "현재가": np.round(current_price, 2),
+            "등락률": np.round(change_pct, 4),
+            "거래량": current_volume,
+            "5일평균거래량대비": np.round(volume_ratio, 4),
+        }
+
+        # 이동평균 (히스토리가 기간보다 짧으면 NaN)
+        for period in SMA_PERIODS:
+            if n_bars >= period:
+                sma = np.round(np.mean(close[:, -period:], axis=1), 2)
+                sma[lengths < period] = np.nan
+            else:
+                sma = np.full(n_tickers, np.nan)
+            result[f"SMA{period}"] = sma
+
+        result[f"RSI{RSI_PERIOD}"] = np.round(rsi_series(close, RSI_PERIOD)[:, -1], 2)
+
+        # 52주 최고/최저
+        has_high = ~np.isnan(high).all(axis=1)
+        has_low = ~np.isnan(low).all(axis=1)
+        result["52주최고가"] = np.round(np.where(has_high, np.max(np.where(np.isnan(high), -np.inf, high), axis=1), np.nan), 2)
+        result["52주최저가"] = np.round(np.where(has_low, np.min(np.where(np.isnan(low), np.inf, low), axis=1), np.nan), 2)
+
+    result["골든크로스데드크로스"] = ma_signals(result["SMA20"], result["SMA50"], result["SMA200"])
+    return result
+
+
+def indicator_rows(tickers: List[str], result: Dict[str, np.ndarray]) -> Dict[str, Dict]:
+    """compute_indicators 결과 -> 티커별 dict (NaN은 None)"""
+    rows = {}
+    for i, ticker in enumerate(tickers):
+        row = {}
+        for key, values in result.items():
+            value = values[i]
+            if isinstance(value, str):
+                row[key] = value
+            elif np.isnan(value):
+                row[key] = None
+            else:
+                row[key] = int(value) if key == "거래량" else float(value)
+        rows[ticker] = row
+    return rows
@@ -0,0 +1,187 @@
+"""
+시장별 거래 일정 - 시장(한국/미국) 필드 기준으로 정규장 시간, 휴장일, 단축/지연 개장을 판단하고
+실행 간에 시장별 마지막 갱신 시각을 보관해 "장중에는 매번, 장 마감 후에는 한 번만" 갱신할 시장을 고릅니다.
+
+휴장일 표는 해마다 거래소 공지에 맞춰 추가해야 하며, 표에 없는 연도는 평일 정규장으로 간주합니다.
+임시 휴장일은 MARKET_HOLIDAYS 환경변수로 추가할 수 있습니다.
+"""
+
+import os
+import json
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Iterable, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+
+# 장 마감 후 종가가 확정될 때까지 장중 주기로 계속 갱신하는 시간 (분)
+MARKET_CLOSE_DELAY_MINUTES = float(os.environ.get('MARKET_CLOSE_DELAY_MINUTES', '15'))
+MARKET_SCHEDULE_PATH = os.environ.get('MARKET_SCHEDULE_PATH', '.cache/market_schedule.json')
+# 추가 휴장일 (JSON): {"한국": ["2026-07-17"], "미국": [...]}
+MARKET_HOLIDAYS = os.environ.get('MARKET_HOLIDAYS', '')
+
+# KRX 휴장일 (주말 제외, 연말 휴장일 포함)
+KRX_HOLIDAYS = {
+    # 2025
+    "2025-01-01", "2025-01-27", "2025-01-28", "2025-01-29", "2025-01-30", "2025-03-03",
+    "2025-05-01", "2025-05-05", "2025-05-06", "2025-06-03", "2025-06-06", "2025-08-15",
+    "2025-10-03", "2025-10-06", "2025-10-07", "2025-10-08", "2025-10-09", "2025-12-25", "2025-12-31",
+    # 2026
+    "2026-01-01", "2026-02-16", "2026-02-17", "2026-02-18", "2026-03-02", "2026-05-01",
+    "2026-05-05", "2026-05-25", "2026-06-03", "2026-08-17", "2026-09-24", "2026-09-25",
+    "2026-10-05", "2026-10-09", "2026-12-25", "2026-12-31",
+    # 2027
+    "2027-01-01", "2027-02-08", "2027-02-09", "2027-03-01", "2027-05-05", "2027-05-13",
+    "2027-08-16", "2027-09-14", "2027-09-15", "2027-09-16", "2027-10-04", "2027-10-11",
+    "2027-12-27", "2027-12-31",
+}
+
+# KRX 개장 시간 변경일 (연초 첫 거래일 10시 개장, 수능일 10시 개장/16시 30분 마감)
+KRX_SPECIAL_SESSIONS = {
+    "2025-01-02": (time(10, 0), time(15, 30)),
+    "2025-11-13": (time(10, 0), time(16, 30)),
+    "2026-01-02": (time(10, 0), time(15, 30)),
+    "2026-11-19": (time(10, 0), time(16, 30)),
+    "2027-01-04": (time(10, 0), time(15, 30)),
+}
+
+# NYSE/NASDAQ 휴장일 (주말 제외)
+NYSE_HOLIDAYS = {
+    # 2025
+    "2025-01-01", "2025-01-09", "2025-01-20", "2025-02-17", "2025-04-18", "2025-05-26",
+    "2025-06-19", "2025-07-04", "2025-09-01", "2025-11-27", "2025-12-25",
+    # 2026
+    "2026-01-01", "2026-01-19", "2026-02-16", "2026-04-03", "2026-05-25", "2026-06-19",
+    "2026-07-03", "2026-09-07", "2026-11-26", "2026-12-25",
+    # 2027
+    "2027-01-01", "2027-01-18", "2027-02-15", "2027-03-26", "2027-05-31", "2027-06-18",
+    "2027-07-05", "2027-09-06", "2027-11-25", "2027-12-24",
+}
+
+# NYSE/NASDAQ 조기 폐장일 (13시 마감)
+NYSE_SPECIAL_SESSIONS = {
+    day: (time(9, 30), time(13, 0))
+    for day in ("2025-07-03", "2025-11-28", "2025-12-24", "2026-11-27", "2026-12-24", "2027-11-26")
+}
+
+
+class MarketCalendar:
+    """거래소 정규장 일정 (현지 시각 기준)"""
+
+    def __init__(self, tz: str, open: time, close: time, holidays: Iterable[str] = (),
+                 special_sessions: Optional[Dict[str, Tuple[time, time]]] = None):
+        self.tz = ZoneInfo(tz)
+        self.open = open
+        self.close = close
+        self.holidays: Set[date] = {date.fromisoformat(day) for day in holidays}
+        self.special_sessions = {date.fromisoformat(day): hours for day, hours in (special_sessions or {}).items()}
+
+    def session(self, day: date) -> Optional[Tuple[datetime, datetime]]:
+        """해당 날짜(현지)의 개장/마감 시각 (휴장일이면 None)"""
+        if day.weekday() >= 5 or day in self.holidays:
+            return None
+        open_time, close_time = self.special_sessions.get(day, (self.open, self.close))
+        return (datetime.combine(day, open_time, self.tz), datetime.combine(day, close_time, self.tz))
+
+    def is_open(self, now: datetime) -> bool:
+        session = self.session(now.astimezone(self.tz).date())
+        return session is not None and session[0] <= now < session[1]
+
+    def last_close(self, now: datetime) -> Optional[datetime]:
+        """now 이전의 가장 최근 마감 시각 (최근 2주 안에 없으면 None)"""
+        day = now.astimezone(self.tz).date()
+        for _ in range(15):
+            session = self.session(day)
+            if session is not None and session[1] <= now:
+                return session[1]
+            day -= timedelta(days=1)
+        return None
+
+    def next_open(self, now: datetime) -> Optional[datetime]:
+        """now 이후의 가장 가까운 개장 시각 (장중이면 now, 2주 안에 없으면 None)"""
+        day = now.astimezone(self.tz).date()
+        for _ in range(15):
+            session = self.session(day)
+            if session is not None and now < session[1]:
+                return max(now, session[0])
+            day += timedelta(days=1)
+        return None
+
+
+MARKET_CALENDARS: Dict[str, MarketCalendar] = {
+    "한국": MarketCalendar("Asia/Seoul", time(9, 0), time(15, 30), KRX_HOLIDAYS, KRX_SPECIAL_SESSIONS),
+    "미국": MarketCalendar("America/New_York", time(9, 30), time(16, 0), NYSE_HOLIDAYS, NYSE_SPECIAL_SESSIONS),
+}
+
+if MARKET_HOLIDAYS:
+    try:
+        for _market, _days in json.loads(MARKET_HOLIDAYS).items():
+            if _market in MARKET_CALENDARS:
+                MARKET_CALENDARS[_market].holidays.update(date.fromisoformat(day) for day in _days)
+    except ValueError:
+        print("⚠️  MARKET_HOLIDAYS 파싱 실패, 기본 휴장일만 사용")
+
+
+def _now(now: Optional[datetime]) -> datetime:
+    return now or datetime.now(timezone.utc)
+
+
+def is_open(market: str, now: Optional[datetime] = None) -> bool:
+    """정규장이 열려 있는지 (알 수 없는 시장은 항상 열린 것으로 간주)"""
+    calendar = MARKET_CALENDARS.get(market)
+    return calendar is None or calendar.is_open(_now(now))
+
+
+def is_active(market: str, now: Optional[datetime] = None) -> bool:
+    """장중이거나 마감 후 종가 확정 대기 시간(MARKET_CLOSE_DELAY_MINUTES) 안인지"""
+    now = _now(now)
+    if is_open(market, now):
+        return True
+    last_close = MARKET_CALENDARS[market].last_close(now)
+    return last_close is not None and now < last_close + timedelta(minutes=MARKET_CLOSE_DELAY_MINUTES)
+
+
+class MarketSchedule:
+    """시장별 마지막 갱신 시각 (파일로 보관)
+
+    장중(마감 직후 종가 확정 대기 시간 포함)인 시장은 항상 갱신 대상이고, 닫힌 시장은
+    마지막 마감 이후 아직 갱신하지 않았을 때 한 번만 갱신 대상이 됩니다.
+    """
+
+    def __init__(self, path: str = MARKET_SCHEDULE_PATH):
+        self.path = path
+        self.refreshed: Dict[str, datetime] = {}
+        if path:
+            try:
+                with open(path, encoding='utf-8') as f:
+                    self.refreshed = {market: datetime.fromisoformat(at) for market, at in json.load(f).items()}
+            except (OSError, ValueError):
+                pass
+
+    def is_due(self, market: str, now: Optional[datetime] = None) -> bool:
+        now = _now(now)
+        if market not in MARKET_CALENDARS or is_active(market, now):
+            return True
+        last_close = MARKET_CALENDARS[market].last_close(now)
+        if last_close is None:
+            return False
+        settled = last_close + timedelta(minutes=MARKET_CLOSE_DELAY_MINUTES)
+        last = self.refreshed.get(market)
+        return last is None or last < settled
+
+    def due_markets(self, markets: Iterable[str], now: Optional[datetime] = None) -> Set[str]:
+        return {market for market in markets if self.is_due(market, now)}
+
+    def mark(self, markets: Iterable[str], at: datetime):
+        """갱신 완료 기록 (at은 수집을 시작한 시각)"""
+        for market in markets:
+            self.refreshed[market] = at
+
+    def save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({market: at.isoformat() for market, at in self.refreshed.items()}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
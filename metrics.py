@@ -0,0 +1,273 @@
+"""
+실행 계측 - 단계별/종목별 소요 시간, HTTP 요청 수와 응답 크기, 재시도, 캐시 적중률을 모아
+실행이 끝날 때 JSON 보고서(METRICS_PATH)와 Prometheus textfile(METRICS_PROM_PATH)로 기록합니다.
+
+단계 이름:
+- history: 일봉 다운로드 (묶음 또는 종목별)
+- info: 펀더멘털(stock.info / OVERVIEW) 조회
+- indicators: 지표 계산
+- probe: 수집 전 최신 시세 확인 (change_probe.py)
+- fetch: 종목별 수집 전체 (제공자 전환 포함)
+- notion_index: 노션 페이지 색인 조회
+- notion_write: 종목별 노션 기록
+- snapshot: 실행 스냅샷 저장 (snapshot.py)
+- alerts: 직전 스냅샷과 비교해 알림 판정/전송 (alerts.py)
+- history_backfill: 지표 히스토리 채우기/새 날 추가 전체 (history_series: 지표 행렬 계산, history_notion: 종목별 노션 기록)
+- import: 모듈 임포트 (시작 시 + 제공자/노션 모듈을 실제로 쓸 때)
+- run: 실행 전체
+"""
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterator, Optional, Tuple
+from urllib.parse import urlparse
+
+METRICS_PATH = os.environ.get('METRICS_PATH', '.cache/metrics.json')  # 빈 값이면 기록 안 함
+METRICS_PROM_PATH = os.environ.get('METRICS_PROM_PATH', '')  # node_exporter textfile 수집 경로 (예: /var/lib/node_exporter/stocks.prom)
+
+# 단계별 히스토그램 구간 (초)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """누적 구간 히스토그램 (Prometheus histogram과 같은 형식)"""
+
+    __slots__ = ('buckets', 'counts', 'count', 'sum', 'max')
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "max": round(self.max, 6),
+            "buckets": {**{f"{bound:g}": n for bound, n in zip(self.buckets, self.counts)}, "+Inf": self.count},
+        }
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _prom_labels(labels: Labels, **extra: str) -> str:
+    pairs = [*labels, *extra.items()]
+    if not pairs:
+        return ""
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+class Metrics:
+    """실행 중 계측값 저장소 (스레드 안전)
+
+    - observe/timer: 단계별 히스토그램 + 종목별 합계/횟수/최대
+    - count: 누적 카운터 (레이블별)
+    - set: 실행 끝에 채우는 게이지 (캐시 적중률 등)
+    """
+
+    def __init__(self):
+        self.started_at = datetime.now(timezone.utc)
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Histogram] = {}
+        self._tickers: Dict[Tuple[str, str], list] = {}  # (stage, ticker) -> [count, sum, max]
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._gauges: Dict[Tuple[str, Labels], float] = {}
+
+    def observe(self, stage: str, seconds: float, ticker: Optional[str] = None):
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = Histogram()
+            histogram.observe(seconds)
+            if ticker:
+                entry = self._tickers.setdefault((stage, ticker), [0, 0.0, 0.0])
+                entry[0] += 1
+                entry[1] += seconds
+                entry[2] = max(entry[2], seconds)
+
+    @contextmanager
+    def timer(self, stage: str, ticker: Optional[str] = None) -> Iterator[None]:
+        """with 블록의 소요 시간을 기록 (예외가 나도 기록)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, ticker)
+
+    def count(self, name: str, value: float = 1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set(self, name: str, value: Optional[float], **labels):
+        if value is None:
+            return
+        with self._lock:
+            self._gauges[(name, _labels(labels))] = value
+
+    def instrument(self, session, client: str):
+        """requests 세션의 요청 수(상태 코드별)와 응답 크기를 집계하는 훅 등록"""
+
+        def hook(response, *args, **kwargs):
+            if kwargs.get('stream'):
+                size = int(response.headers.get('Content-Length') or 0)
+            else:
+                size = len(response.content or b'')
+            host = urlparse(response.url).hostname or ''
+            self.count("http_requests", client=client, host=host, status=response.status_code)
+            self.count("http_response_bytes", size, client=client, host=host)
+            return response
+
+        session.hooks.setdefault('response', []).append(hook)
+
+    def report(self) -> Dict:
+        """JSON 보고서 (단계/종목 시간, 카운터, 게이지)"""
+        with self._lock:
+            finished = datetime.now(timezone.utc)
+            tickers: Dict[str, Dict] = {}
+            for (stage, ticker), (n, total, peak) in sorted(self._tickers.items(), key=lambda item: item[0][1]):
+                tickers.setdefault(ticker, {})[stage] = {"count": n, "sum": round(total, 6), "max": round(peak, 6)}
+
+            def series(values: Dict[Tuple[str, Labels], float]) -> Dict[str, list]:
+                grouped: Dict[str, list] = {}
+                for (name, labels), value in sorted(values.items()):
+                    grouped.setdefault(name, []).append({"labels": dict(labels), "value": value})
+                return grouped
+
+            return {
+                "started_at": self.started_at.isoformat(),
+                "finished_at": finished.isoformat(),
+                "stages": {stage: histogram.to_dict() for stage, histogram in sorted(self._stages.items())},
+                "tickers": tickers,
+                "counters": series(self._counters),
+                "gauges": series(self._gauges),
+            }
+
+    def prometheus(self) -> str:
+        """Prometheus 텍스트 형식 (node_exporter textfile 수집기용)"""
+        lines = []
+        with self._lock:
+            if self._stages:
+                lines += ["# HELP stocks_stage_seconds 단계별 소요 시간", "# TYPE stocks_stage_seconds histogram"]
+                for stage, histogram in sorted(self._stages.items()):
+                    labels = (("stage", stage),)
+                    for bound, n in zip(histogram.buckets, histogram.counts):
+                        lines.append(f"stocks_stage_seconds_bucket{_prom_labels(labels, le=f'{bound:g}')} {n}")
+                    lines.append(f"stocks_stage_seconds_bucket{_prom_labels(labels, le='+Inf')} {histogram.count}")
+                    lines.append(f"stocks_stage_seconds_sum{_prom_labels(labels)} {histogram.sum:.6f}")
+                    lines.append(f"stocks_stage_seconds_count{_prom_labels(labels)} {histogram.count}")
+
+            if self._tickers:
+                lines += ["# HELP stocks_ticker_seconds 종목별 단계 소요 시간", "# TYPE stocks_ticker_seconds summary"]
+                for (stage, ticker), (n, total, _) in sorted(self._tickers.items()):
+                    labels = (("stage", stage), ("ticker", ticker))
+                    lines.append(f"stocks_ticker_seconds_sum{_prom_labels(labels)} {total:.6f}")
+                    lines.append(f"stocks_ticker_seconds_count{_prom_labels(labels)} {n}")
+
+            for kind, values, suffix in (("counter", self._counters, "_total"), ("gauge", self._gauges, "")):
+                names = sorted({name for name, _ in values})
+                for name in names:
+                    metric = f"stocks_{name}{suffix}"
+                    lines.append(f"# TYPE {metric} {kind}")
+                    for (other, labels), value in sorted(values.items()):
+                        if other == name:
+                            lines.append(f"{metric}{_prom_labels(labels)} {value:g}")
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, json_path: str = METRICS_PATH, prom_path: str = METRICS_PROM_PATH):
+        """보고서를 파일로 기록 (원자적으로 교체)"""
+        for path, text in ((json_path, lambda: json.dumps(self.report(), ensure_ascii=False, indent=2)),
+                           (prom_path, self.prometheus)):
+            if not path:
+                continue
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp = f"{path}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(text())
+            os.replace(tmp, path)
+
+    def stage_seconds(self, stage: str) -> float:
+        """단계의 누적 소요 시간 (초)"""
+        with self._lock:
+            histogram = self._stages.get(stage)
+            return histogram.sum if histogram else 0.0
+
+    def summary(self) -> str:
+        with self._lock:
+            parts = [f"{stage} {histogram.sum:.2f}초/{histogram.count}회"
+                     for stage, histogram in sorted(self._stages.items(), key=lambda item: -item[1].sum)]
+        return " | ".join(parts) if parts else "-"
+
+
+metrics = Metrics()
+
+
+class ThreadProfiler:
+    """cProfile을 메인 스레드와 이후 시작하는 모든 스레드(수집/노션 워커)에 걸고, 끝나면 하나의 pstats 파일로 합침
+
+    Python 3.12부터는 cProfile을 여러 스레드에서 동시에 켤 수 없어 워커 스레드는 건너뛰므로,
+    그때는 워커 시간을 단계별 시간(metrics)으로 확인합니다.
+    """
+
+    def __init__(self):
+        import cProfile
+        self._main = cProfile.Profile()
+        self._threads = []
+        self._skipped = 0
+        self._lock = threading.Lock()
+
+    def _start_thread(self, frame, event, arg):
+        import sys
+        import cProfile
+        sys.setprofile(None)  # 스레드마다 첫 이벤트에서 한 번만 호출됨
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            with self._lock:
+                self._skipped += 1
+            return
+        with self._lock:
+            self._threads.append(profile)
+
+    def enable(self):
+        self._main.enable()
+        threading.setprofile(self._start_thread)
+
+    def dump(self, path: str) -> int:
+        """프로파일 중지 후 합쳐서 저장 (기록한 스레드 수 반환, 메인 포함)"""
+        import pstats
+        threading.setprofile(None)
+        self._main.disable()
+        stats = pstats.Stats(self._main)
+        with self._lock:
+            profiles = list(self._threads)
+        for profile in profiles:
+            profile.disable()
+            stats.add(profile)
+        stats.dump_stats(path)
+        if self._skipped:
+            print(f"⚠️  워커 스레드 {self._skipped}개는 프로파일하지 못함 (단계별 시간 참고)")
+        return len(profiles) + 1
@@ -0,0 +1,106 @@
+"""
+노션 API 클라이언트 - 연결 재사용, 속도 제한(평균 초당 3회), 429/5xx 자동 재시도
+"""
+
+import os
+import time
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import metrics
+from rate_limit import TokenBucket
+
+NOTION_API_URL = "https://api.notion.com/v1"
+NOTION_VERSION = "2022-06-28"
+
+NOTION_RATE_LIMIT = float(os.environ.get('NOTION_RATE_LIMIT', '3'))  # 초당 요청 수
+NOTION_MAX_RETRIES = int(os.environ.get('NOTION_MAX_RETRIES', '5'))
+NOTION_TIMEOUT = float(os.environ.get('NOTION_TIMEOUT', '30'))  # 요청당 제한 시간 (초)
+
+
+class NotionClient:
+    """노션 REST API 클라이언트 (스레드 안전)
+
+    모든 요청은 토큰 버킷을 거치며, 429(호출 제한)와 5xx/연결 오류는
+    Retry-After 헤더 또는 지수 백오프만큼 기다린 뒤 다시 시도합니다.
+    페이지 생성처럼 다시 보내면 중복되는 요청(idempotent=False)은 429만 다시 시도하고,
+    5xx/연결 오류는 노션에 반영됐을 수 있으므로 그대로 반환/발생시켜 호출한 쪽이 조회로 확인하게 합니다.
+    """
+
+    def __init__(self, api_key: Optional[str], rate: float = NOTION_RATE_LIMIT,
+                 max_retries: int = NOTION_MAX_RETRIES, timeout: float = NOTION_TIMEOUT,
+                 pool_size: int = 10):
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.bucket = TokenBucket(rate)
+        self.stats = {"requests": 0, "retries": 0, "throttled": 0}
+        self._stats_lock = threading.Lock()
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+            "Notion-Version": NOTION_VERSION
+        })
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
+        if key != "requests":
+            # 재시도/호출 제한은 계측 보고서에도 기록 (요청 수는 세션 훅에서 집계)
+            metrics.count(key, client="notion")
+
+    def request(self, method: str, path: str, json: Optional[Dict] = None,
+                idempotent: bool = True) -> requests.Response:
+        """API 요청 (재시도 후에도 429/5xx면 마지막 응답을 그대로 반환)"""
+        url = f"{NOTION_API_URL}/{path.lstrip('/')}"
+
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            self._count("requests")
+            last_attempt = attempt == self.max_retries
+            backoff = min(30.0, 0.5 * 2 ** attempt)
+
+            try:
+                response = self.session.request(method, url, json=json, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if last_attempt or not idempotent:
+                    raise
+                print(f"⚠️  노션 연결 오류, {backoff:.1f}초 후 재시도: {str(e)}")
+                self._count("retries")
+                time.sleep(backoff)
+                continue
+
+            if response.status_code == 429 or response.status_code >= 500:
+                if last_attempt or (response.status_code != 429 and not idempotent):
+                    return response
+                delay = backoff
+                if response.status_code == 429:
+                    self._count("throttled")
+                    try:
+                        delay = float(response.headers.get('Retry-After', backoff))
+                    except ValueError:
+                        pass
+                    # 다른 스레드의 요청도 함께 멈춤
+                    self.bucket.pause(delay)
+                self._count("retries")
+                time.sleep(delay)
+                continue
+
+            return response
+
+    def post(self, path: str, json: Optional[Dict] = None, idempotent: bool = True) -> requests.Response:
+        """POST 요청 (조회는 그대로, 페이지 생성은 idempotent=False)"""
+        return self.request("POST", path, json, idempotent)
+
+    def patch(self, path: str, json: Optional[Dict] = None) -> requests.Response:
+        return self.request("PATCH", path, json)
+
+    def summary(self) -> str:
+        return (f"요청 {self.stats['requests']}회 | 재시도 {self.stats['retries']}회 | "
+                f"호출 제한(429) {self.stats['throttled']}회")
@@ -0,0 +1,356 @@
+"""
+노션 동기화 - 티커별 페이지 조회/생성/업데이트
+
+마지막으로 기록한 속성 값을 페이지별로 로컬 상태 파일에 보관하고,
+바뀐 속성만 PATCH 합니다 (바뀐 값이 없으면 요청 자체를 생략).
+티커 -> page_id 색인도 로컬에 보관하여 매 실행마다 DB 전체를 조회하지 않습니다.
+"""
+
+import os
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from metrics import metrics
+from notion_api import NotionClient
+
+# 노션 API 설정
+NOTION_API_KEY = os.environ.get('NOTION_API_KEY')
+NOTION_DATABASE_ID = os.environ.get('NOTION_DATABASE_ID', '42c8793f07f84faf96ef46a1ed45579a')
+NOTION_WORKERS = int(os.environ.get('NOTION_WORKERS', '3'))  # 동시에 보낼 페이지 업데이트 수
+
+notion = NotionClient(NOTION_API_KEY, pool_size=max(NOTION_WORKERS, 1))
+metrics.instrument(notion.session, "notion")
+
+# 페이지별 마지막 기록 값 저장 위치 (빈 값이면 실행 간 유지 안 함)
+NOTION_STATE_PATH = os.environ.get('NOTION_STATE_PATH', '.cache/notion_state.json')
+
+# 티커 -> page_id 색인 저장 위치 (빈 값이면 매 실행마다 전체 조회)
+NOTION_INDEX_PATH = os.environ.get('NOTION_INDEX_PATH', '.cache/notion_index.json')
+NOTION_INDEX_MAX_AGE_HOURS = float(os.environ.get('NOTION_INDEX_MAX_AGE_HOURS', '24'))  # 전체 재구성 주기
+
+# 숫자 속성 (값이 None이면 기록하지 않음)
+NUMBER_FIELDS = ['SMA20', 'SMA50', 'SMA200', 'RSI30', 'PER', 'PBR', '시가총액', '52주최고가', '52주최저가']
+
+
+class PageState:
+    """페이지별 마지막 속성 값 (page_id -> {속성명: 값})"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pages: Dict[str, Dict[str, Any]] = {}
+        if path:
+            try:
+                with open(path, encoding='utf-8') as f:
+                    self._pages = json.load(f)
+            except (OSError, ValueError):
+                pass
+
+    def get(self, page_id: str) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._pages.get(page_id, {}))
+
+    def update(self, page_id: str, values: Dict[str, Any]):
+        with self._lock:
+            self._pages.setdefault(page_id, {}).update(values)
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = json.dumps(self._pages, ensure_ascii=False)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp, self.path)
+
+
+page_state = PageState(NOTION_STATE_PATH)
+
+
+def property_value(prop: Dict) -> Any:
+    """노션 속성(요청/응답 형식 모두)을 비교 가능한 단순 값으로 변환"""
+    if 'number' in prop:
+        return prop['number']
+    if 'select' in prop:
+        return (prop['select'] or {}).get('name')
+    for key in ('title', 'rich_text'):
+        if key in prop:
+            return ''.join(t.get('plain_text') or t.get('text', {}).get('content', '') for t in prop[key])
+    return None
+
+
+def build_properties(stock_data: Dict) -> Dict[str, Dict]:
+    """수집 데이터 -> 노션 속성 (업데이트시각 제외)"""
+    properties = {
+        "종목명": {"title": [{"text": {"content": stock_data['종목명']}}]},
+        "티커": {"rich_text": [{"text": {"content": stock_data['티커']}}]},
+        "시장": {"select": {"name": stock_data['시장']}},
+        "현재가": {"number": stock_data['현재가']},
+        "등락률": {"number": stock_data['등락률']},
+        "거래량": {"number": stock_data['거래량']},
+        "5일평균거래량대비": {"number": stock_data['5일평균거래량대비']},
+        "골든크로스데드크로스": {"select": {"name": stock_data['골든크로스데드크로스']}},
+    }
+
+    for key in NUMBER_FIELDS:
+        if stock_data.get(key) is not None:
+            properties[key] = {"number": stock_data[key]}
+
+    return properties
+
+
+def query_pages(filter: Optional[Dict] = None) -> Optional[Dict[str, str]]:
+    """노션 DB를 100개씩 조회하여 티커 -> page_id 매핑 반환 (실패 시 None)
+
+    조회 결과의 속성 값으로 페이지 상태도 갱신합니다 (노션에서 직접 수정한 값 반영).
+    """
+    path = f"databases/{NOTION_DATABASE_ID}/query"
+    all_pages = {}
+    has_more = True
+    start_cursor = None
+
+    while has_more:
+        payload = {"page_size": 100}
+        if filter:
+            payload["filter"] = filter
+        if start_cursor:
+            payload["start_cursor"] = start_cursor
+
+        response = notion.post(path, payload)
+
+        if response.status_code != 200:
+            print(f"❌ 노션 조회 실패: {response.status_code}")
+            print(response.text)
+            return None
+
+        data = response.json()
+
+        for page in data.get('results', []):
+            props = page.get('properties', {})
+            ticker_prop = props.get('티커', {})
+
+            ticker = None
+            if ticker_prop.get('type') == 'rich_text':
+                rich_texts = ticker_prop.get('rich_text', [])
+                if rich_texts:
+                    ticker = rich_texts[0].get('plain_text', '').strip()
+
+            if ticker:
+                all_pages[ticker] = page['id']
+                page_state.update(page['id'], {name: property_value(prop) for name, prop in props.items()})
+
+        has_more = data.get('has_more', False)
+        start_cursor = data.get('next_cursor')
+
+    return all_pages
+
+
+class PageIndex(dict):
+    """로컬에 보관되는 티커 -> page_id 색인
+
+    이전 조회 이후 수정된 페이지만 가져와 갱신하고, 색인이 오래되었거나
+    색인에 없는 티커를 만나면 (실행당 한 번) 전체를 다시 조회합니다.
+    생성 요청이 5xx/연결 오류로 끝난 티커는 페이지가 만들어졌을 수 있으므로, 다시 만들기 전에 그 티커만 조회합니다.
+    """
+
+    def __init__(self, path: str, max_age_hours: float):
+        super().__init__()
+        self.path = path
+        self.max_age = timedelta(hours=max_age_hours)
+        self.synced_at: Optional[datetime] = None
+        self.full_at: Optional[datetime] = None
+        self._rebuilt = False
+        self._unconfirmed = set()  # 생성 결과를 알 수 없는 티커
+        self._lock = threading.Lock()
+
+        if path:
+            try:
+                with open(path, encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('database_id') == NOTION_DATABASE_ID:
+                    self.update(data['pages'])
+                    self.synced_at = datetime.fromisoformat(data['synced_at'])
+                    self.full_at = datetime.fromisoformat(data['full_at'])
+                    self._unconfirmed = set(data.get('unconfirmed', []))
+            except (OSError, ValueError, KeyError):
+                pass
+
+    def is_stale(self) -> bool:
+        return self.full_at is None or datetime.now(timezone.utc) - self.full_at > self.max_age
+
+    def rebuild(self) -> bool:
+        """DB 전체 조회로 색인 재구성"""
+        started = datetime.now(timezone.utc)
+        pages = query_pages()
+        if pages is None:
+            return False
+        self.clear()
+        self.update(pages)
+        self.synced_at = self.full_at = started
+        self._rebuilt = True
+        return True
+
+    def refresh(self) -> bool:
+        """마지막 조회 이후 수정된 페이지만 조회하여 색인 갱신
+
+        노션의 last_edited_time은 분 단위로 기록되므로 1분 여유를 둡니다.
+        """
+        started = datetime.now(timezone.utc)
+        since = (self.synced_at - timedelta(minutes=1)).isoformat()
+        pages = query_pages({"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": since}})
+        if pages is None:
+            return False
+        self.update(pages)
+        self.synced_at = started
+        return True
+
+    def resolve_miss(self, ticker: str) -> Optional[str]:
+        """색인에 없는 티커: 아직 재구성하지 않았다면 전체 조회 후 다시 찾기
+
+        다른 곳에서 만든 페이지를 놓쳐 중복 생성하지 않기 위함입니다.
+        """
+        with self._lock:
+            if ticker in self._unconfirmed:
+                pages = query_pages({"property": "티커", "rich_text": {"equals": ticker}})
+                if pages is None:
+                    raise RuntimeError("이전 생성 요청의 결과를 조회하지 못해 생성 보류")
+                self._unconfirmed.discard(ticker)
+                self.update(pages)
+                return self.get(ticker)
+            if not self._rebuilt:
+                print(f"🔍 {ticker}: 색인에 없음, 노션 DB 전체 재조회")
+                self._rebuilt = True
+                self.rebuild()
+            return self.get(ticker)
+
+    def mark_unconfirmed(self, ticker: str):
+        """생성 요청이 노션에 반영됐는지 알 수 없음 (다음 기록 전에 조회)"""
+        with self._lock:
+            self._unconfirmed.add(ticker)
+
+    def sync(self):
+        """오래되었으면 전체 재구성, 아니면 변경분만 조회 (상주 실행에서는 주기마다 호출)
+
+        색인에 없는 티커의 전체 재조회 제한(실행당 한 번)도 초기화합니다.
+        """
+        self._rebuilt = False
+        if self.is_stale() or not self.refresh():
+            self.rebuild()
+            return True
+        return False
+
+    def discard(self, ticker: str):
+        with self._lock:
+            self.pop(ticker, None)
+
+    def save(self):
+        if not self.path or self.full_at is None:
+            return
+        with self._lock:
+            data = json.dumps({
+                "database_id": NOTION_DATABASE_ID,
+                "synced_at": self.synced_at.isoformat(),
+                "full_at": self.full_at.isoformat(),
+                "pages": dict(self),
+                "unconfirmed": sorted(self._unconfirmed),
+            }, ensure_ascii=False)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp, self.path)
+
+
+def get_existing_pages() -> PageIndex:
+    """노션 DB의 기존 페이지 조회 (티커 -> page_id 매핑)
+
+    로컬 색인이 있으면 변경분만 조회하고, 없거나 오래되었으면 전체를 조회합니다.
+    """
+    index = PageIndex(NOTION_INDEX_PATH, NOTION_INDEX_MAX_AGE_HOURS)
+
+    with metrics.timer("notion_index"):
+        rebuilt = index.sync()
+    if rebuilt:
+        print(f"📊 기존 페이지 {len(index)}개 발견")
+    else:
+        print(f"📊 기존 페이지 {len(index)}개 (로컬 색인, 변경분만 조회)")
+
+    index.save()
+    return index
+
+
+def create_or_update_page(stock_data: Dict, existing_pages: Dict[str, str]) -> Optional[str]:
+    """노션 페이지 생성 또는 업데이트
+
+    반환값: "생성" / "업데이트" / "변경 없음", 실패 시 None
+    """
+    ticker = stock_data['티커']
+    page_id = existing_pages.get(ticker)
+    if page_id is None and isinstance(existing_pages, PageIndex):
+        try:
+            page_id = existing_pages.resolve_miss(ticker)
+        except Exception as e:
+            print(f"❌ {ticker} 노션 페이지 확인 실패: {str(e)}")
+            return None
+    properties = build_properties(stock_data)
+    values = {name: property_value(prop) for name, prop in properties.items()}
+
+    if page_id:
+        # 마지막으로 기록한 값과 다른 속성만 전송
+        last = page_state.get(page_id)
+        properties = {name: prop for name, prop in properties.items() if last.get(name, object()) != values[name]}
+        if not properties:
+            return "변경 없음"
+
+    properties.update({
+        "date:업데이트시각:start": datetime.now(timezone.utc).isoformat(),
+        "date:업데이트시각:is_datetime": 1
+    })
+
+    try:
+        if page_id:
+            response = notion.patch(f"pages/{page_id}", {"properties": properties})
+        else:
+            payload = {
+                "parent": {"type": "database_id", "database_id": NOTION_DATABASE_ID},
+                "properties": properties
+            }
+            try:
+                response = notion.post("pages", payload, idempotent=False)
+            except Exception:
+                if isinstance(existing_pages, PageIndex):
+                    existing_pages.mark_unconfirmed(ticker)
+                raise
+            if response.status_code >= 500 and isinstance(existing_pages, PageIndex):
+                existing_pages.mark_unconfirmed(ticker)
+
+        if response.status_code in [200, 201]:
+            action = "업데이트" if page_id else "생성"
+            if not page_id:
+                page_id = response.json().get('id')
+                if page_id:
+                    existing_pages[ticker] = page_id
+            if page_id:
+                page_state.update(page_id, values)
+            print(f"✅ {ticker} {action} 완료")
+            return action
+        else:
+            print(f"❌ {ticker} 노션 저장 실패: {response.status_code}")
+            print(response.text)
+            # 삭제(보관)된 페이지는 색인에서 제거하여 다음 실행에서 다시 찾도록 함
+            if page_id and isinstance(existing_pages, PageIndex) and (
+                    response.status_code == 404 or 'archived' in response.text):
+                existing_pages.discard(ticker)
+            return None
+
+    except Exception as e:
+        print(f"❌ {ticker} 노션 처리 중 오류: {str(e)}")
+        return None
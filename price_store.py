@@ -0,0 +1,174 @@
+"""
+로컬 OHLCV 저장소 - 종목별 일봉을 디스크에 보관하고 새 봉만 이어 붙입니다.
+
+종목마다 `<티커>.npy` 파일 하나에 (date, open, high, low, close, volume)
+구조화 배열을 날짜순으로 저장하며, 읽을 때는 메모리 맵으로 엽니다.
+일봉 동기화는 종목별로 하루(UTC 날짜) 한 번이면 충분하며, 그 사이의 장중 시세는
+overlay()로 저장된 일봉 위에 얹어 사용합니다 (디스크에는 쓰지 않음).
+"""
+
+import os
+import json
+import threading
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import numpy as np
+
+# pandas는 DataFrame을 만들 때만 임포트 (저장소 설정/일봉 읽기만 하는 경로는 불필요)
+if TYPE_CHECKING:
+    import pandas as pd
+
+# 로컬 일봉 저장소 설정 (빈 값이면 사용 안 함)
+PRICE_STORE_DIR = os.environ.get('PRICE_STORE_DIR', '.cache/prices')
+PRICE_STORE_FULL_REFRESH_DAYS = int(os.environ.get('PRICE_STORE_FULL_REFRESH_DAYS', '7'))
+
+PRICE_DTYPE = np.dtype([
+    ('date', 'datetime64[D]'),
+    ('open', 'f8'),
+    ('high', 'f8'),
+    ('low', 'f8'),
+    ('close', 'f8'),
+    ('volume', 'f8'),
+])
+
+# DataFrame 컬럼 <-> 저장 필드
+COLUMNS = {'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume'}
+
+META_FILE = '_meta.json'
+SYNC_FILE = '_synced.json'
+
+
+class PriceStore:
+    """종목별 일봉 저장소 (티커, 날짜 기준)"""
+
+    def __init__(self, root: str, full_refresh_days: int = 7, keep_days: int = 365):
+        self.root = root
+        self.full_refresh_days = full_refresh_days
+        self.keep_days = keep_days
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._meta = self._load_meta(META_FILE)  # 티커 -> 마지막 전체 다운로드 시각
+        self._synced = self._load_meta(SYNC_FILE)  # 티커 -> 마지막 일봉 동기화 날짜 (UTC)
+
+    def _load_meta(self, name: str) -> Dict[str, str]:
+        try:
+            with open(os.path.join(self.root, name), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_meta(self, name: str = META_FILE):
+        path = os.path.join(self.root, name)
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._meta if name == META_FILE else self._synced, f,
+                      ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp, path)
+
+    def path(self, ticker: str) -> str:
+        return os.path.join(self.root, f"{ticker.replace('/', '_')}.npy")
+
+    def load(self, ticker: str) -> Optional[np.ndarray]:
+        """저장된 일봉 배열 (없으면 None)"""
+        try:
+            return np.load(self.path(ticker), mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+
+    def last_date(self, ticker: str) -> Optional[date]:
+        """마지막으로 저장된 봉의 날짜"""
+        bars = self.load(ticker)
+        if bars is None or len(bars) == 0:
+            return None
+        return bars['date'][-1].astype(date)
+
+    def needs_full_refresh(self, ticker: str) -> bool:
+        """저장된 데이터가 없거나 전체 재다운로드 주기가 지났는지 여부
+
+        수정주가(배당/분할 반영)는 과거 봉까지 바뀌므로 주기적으로 전체를 다시 받습니다.
+        """
+        refreshed = self._meta.get(ticker)
+        if refreshed is None or self.last_date(ticker) is None:
+            return True
+        age = datetime.now() - datetime.fromisoformat(refreshed)
+        return age >= timedelta(days=self.full_refresh_days)
+
+    def refreshed_at(self, ticker: str) -> Optional[str]:
+        """마지막 전체 다운로드 시각 (ISO 문자열, 없으면 None)"""
+        return self._meta.get(ticker)
+
+    def needs_daily_sync(self, ticker: str, day: date) -> bool:
+        """오늘(day) 아직 일봉을 동기화하지 않았는지 여부"""
+        return self._synced.get(ticker) != day.isoformat()
+
+    def mark_synced(self, tickers: List[str], day: date):
+        if not tickers:
+            return
+        with self._lock:
+            for ticker in tickers:
+                self._synced[ticker] = day.isoformat()
+            self._save_meta(SYNC_FILE)
+
+    def overlay(self, ticker: str, frame: 'pd.DataFrame') -> Optional[np.ndarray]:
+        """저장된 일봉의 frame 첫 날짜 이후를 frame의 봉으로 바꾼 배열 (디스크에는 쓰지 않음)"""
+        return _combine(self.load(ticker), frame_to_bars(frame))
+
+    def merge(self, ticker: str, frame: 'pd.DataFrame', full: bool = False) -> np.ndarray:
+        """새로 받은 봉을 저장소에 반영
+
+        full=True면 기존 데이터를 대체하고, 아니면 frame의 첫 날짜 이후 봉만 교체합니다.
+        """
+        bars = _combine(None if full else self.load(ticker), frame_to_bars(frame))
+
+        # 보관 기간(기본 1년)이 지난 봉은 버림
+        cutoff = np.datetime64(date.today() - timedelta(days=self.keep_days), 'D')
+        bars = bars[bars['date'] >= cutoff]
+
+        path = self.path(ticker)
+        tmp = f"{path}.tmp.npy"
+        np.save(tmp, bars)
+        os.replace(tmp, path)
+
+        if full:
+            with self._lock:
+                self._meta[ticker] = datetime.now().isoformat(timespec='seconds')
+                self._save_meta()
+
+        return bars
+
+
+def _combine(existing: Optional[np.ndarray], new: np.ndarray) -> np.ndarray:
+    """기존 봉 중 new의 첫 날짜 이전 봉 + new"""
+    if existing is not None and len(new) > 0:
+        return np.concatenate([existing[existing['date'] < new['date'][0]], new])
+    if existing is not None:
+        return np.array(existing)
+    return new
+
+
+def frame_to_bars(frame: 'pd.DataFrame') -> np.ndarray:
+    """yfinance 히스토리 DataFrame -> 일봉 구조화 배열"""
+    index = frame.index
+    if getattr(index, 'tz', None) is not None:
+        index = index.tz_localize(None)
+
+    bars = np.empty(len(frame), dtype=PRICE_DTYPE)
+    bars['date'] = index.values.astype('datetime64[D]')
+    for column, field in COLUMNS.items():
+        bars[field] = frame[column].to_numpy(dtype='f8')
+
+    # 같은 날짜가 중복되면 마지막 값 사용
+    bars = bars[np.argsort(bars['date'], kind='stable')]
+    keep = np.append(bars['date'][1:] != bars['date'][:-1], True)
+    return bars[keep]
+
+
+def bars_to_frame(bars: np.ndarray) -> 'pd.DataFrame':
+    """일봉 구조화 배열 -> yfinance 히스토리와 같은 형태의 DataFrame"""
+    import pandas as pd
+
+    return pd.DataFrame(
+        {column: np.asarray(bars[field]) for column, field in COLUMNS.items()},
+        index=pd.DatetimeIndex(np.asarray(bars['date']), name='Date'),
+    )
@@ -0,0 +1,219 @@
+"""
+Alpha Vantage 데이터 제공자 - 분당 호출 한도 안에서 가격을 기업 개요보다 먼저 호출 (미국 주식만 지원)
+"""
+
+import os
+from datetime import datetime, timezone
+from typing import Dict, Optional
+import requests
+import numpy as np
+from fundamentals_cache import fundamentals_cache
+from rate_limit import RateScheduler, Throttled
+from indicators import calculate_rsi, calculate_sma, determine_ma_signal
+from metrics import metrics
+from providers import Provider, request_timeout
+
+
+# API 설정
+ALPHA_VANTAGE_API_KEY = os.environ.get('ALPHA_VANTAGE_API_KEY', 'demo')  # 무료 키로 교체 필요
+ALPHA_VANTAGE_CALLS_PER_MINUTE = int(os.environ.get('ALPHA_VANTAGE_CALLS_PER_MINUTE', '5'))  # 무료 5, 프리미엄은 요금제 한도
+# 다른 제공자로 넘길 수 있을 때 호출 한도가 빌 때까지 기다리는 최대 시간 (초)
+ALPHA_VANTAGE_MAX_WAIT = float(os.environ.get('ALPHA_VANTAGE_MAX_WAIT', '5'))
+
+# 호출 우선순위 (작을수록 먼저) - 가격이 기업 개요보다 먼저
+PRIORITY_PRICE = 0
+PRIORITY_OVERVIEW = 1
+
+session = requests.Session()
+metrics.instrument(session, "alphavantage")
+
+
+def _query_av(function: str, ticker: str) -> Dict:
+    """Alpha Vantage API 호출 (호출 제한 응답이면 Throttled)"""
+    url = f"https://www.alphavantage.co/query?function={function}&symbol={ticker}&apikey={ALPHA_VANTAGE_API_KEY}"
+    response = session.get(url, timeout=request_timeout(10))
+    
+    if response.status_code != 200:
+        raise ValueError(f"API 호출 실패 ({response.status_code})")
+    
+    data = response.json()
+    if "Note" in data:
+        print(f"⚠️  {ticker}: API 호출 제한 도달 ({function})")
+        raise Throttled(data["Note"])
+    if "Error Message" in data:
+        raise ValueError(data["Error Message"])
+    return data
+
+
+def get_overview_av(ticker: str) -> Optional[Dict]:
+    """Alpha Vantage OVERVIEW 조회 (종목명, PER, PBR, 시가총액)
+
+    데이터가 없는 응답은 캐시되지 않도록 None을 반환합니다.
+    """
+    with metrics.timer("info", ticker):
+        overview = _query_av("OVERVIEW", ticker)
+    if not overview.get('Name'):
+        return None
+    
+    def to_float(value: Optional[str]) -> Optional[float]:
+        if value and value != 'None':
+            try:
+                return float(value)
+            except:
+                pass
+        return None
+    
+    # 시가총액 (백만달러)
+    market_cap = to_float(overview.get('MarketCapitalization'))
+    
+    return {
+        "name": overview['Name'],
+        "per": to_float(overview.get('PERatio')),
+        "pbr": to_float(overview.get('PriceToBookRatio')),
+        "market_cap": market_cap / 1_000_000 if market_cap is not None else None,
+    }
+
+
+def get_daily_av(ticker: str) -> Dict[str, Dict]:
+    """Alpha Vantage 일일 가격 데이터 (최근 100일, 날짜 -> OHLCV)"""
+    with metrics.timer("history", ticker):
+        time_series = _query_av("TIME_SERIES_DAILY", ticker).get("Time Series (Daily)", {})
+    if not time_series:
+        raise ValueError("데이터 없음")
+    return time_series
+
+
+def build_stock_data_av(ticker: str, market: str, time_series: Dict[str, Dict],
+                        overview: Optional[Dict]) -> Optional[Dict]:
+    """일일 가격 데이터와 기업 개요로 노션에 기록할 데이터 생성"""
+    try:
+        # 날짜순 정렬
+        dates = sorted(time_series.keys())
+        if len(dates) < 2:
+            print(f"❌ {ticker}: 데이터 부족")
+            return None
+        
+        # 최신 데이터
+        latest_date = dates[-1]
+        latest = time_series[latest_date]
+        current_price = float(latest['4. close'])
+        current_volume = int(float(latest['5. volume']))
+        
+        # 이전일 종가 (등락률 계산용)
+        prev_date = dates[-2]
+        prev_close = float(time_series[prev_date]['4. close'])
+        change_pct = (current_price / prev_close - 1) if prev_close > 0 else 0
+        
+        # 종가 리스트 (이동평균 계산용)
+        closes = [float(time_series[d]['4. close']) for d in dates]
+        volumes = [int(float(time_series[d]['5. volume'])) for d in dates[-5:]]
+        
+        # 거래량 분석
+        avg_volume_5d = np.mean(volumes)
+        volume_ratio = (current_volume / avg_volume_5d - 1) if avg_volume_5d > 0 else 0
+        
+        # 이동평균 계산
+        sma20 = calculate_sma(closes, 20)
+        sma50 = calculate_sma(closes, 50)
+        sma200 = calculate_sma(closes, 200) if len(closes) >= 200 else None
+        
+        # RSI 계산
+        rsi30 = calculate_rsi(closes, 30)
+        
+        # 52주 최고/최저 (최근 1년 = 252 거래일)
+        recent_prices = closes[-252:] if len(closes) >= 252 else closes
+        high_52w = max(recent_prices)
+        low_52w = min(recent_prices)
+        
+        # 골든크로스/데드크로스
+        ma_signal = determine_ma_signal(current_price, sma20, sma50, sma200)
+        
+        # 기업 개요 (PER, PBR, 시가총액)
+        overview = overview or {}
+        per = overview.get('per')
+        pbr = overview.get('pbr')
+        market_cap = overview.get('market_cap')
+        company_name = overview.get('name') or ticker
+        
+        data_dict = {
+            "종목명": company_name,
+            "티커": ticker,
+            "시장": market,
+            "현재가": round(current_price, 2),
+            "등락률": round(change_pct, 4),
+            "거래량": current_volume,
+            "5일평균거래량대비": round(volume_ratio, 4),
+            "SMA20": sma20,
+            "SMA50": sma50,
+            "SMA200": sma200,
+            "RSI30": rsi30,
+            "PER": per,
+            "PBR": pbr,
+            "시가총액": round(market_cap, 2) if market_cap else None,
+            "52주최고가": round(high_52w, 2),
+            "52주최저가": round(low_52w, 2),
+            "골든크로스데드크로스": ma_signal,
+            "업데이트시각": datetime.now(timezone.utc).isoformat()
+        }
+        
+        print(f"✅ {ticker} ({company_name}): ${current_price:,.2f} ({change_pct*100:+.2f}%)")
+        return data_dict
+        
+    except Exception as e:
+        print(f"❌ {ticker} 오류: {str(e)}")
+        return None
+
+
+class AlphaVantageProvider(Provider):
+    """Alpha Vantage 제공자 (미국 주식만 지원)
+
+    모든 호출은 하나의 RateScheduler를 거치므로 여러 스레드에서 동시에 호출해도
+    분당 한도를 넘지 않으며, 기다리는 호출 중에서는 가격 호출이 먼저 실행됩니다.
+    """
+
+    name = "alphavantage"
+
+    def __init__(self, calls_per_minute: int = ALPHA_VANTAGE_CALLS_PER_MINUTE,
+                 max_wait: float = ALPHA_VANTAGE_MAX_WAIT):
+        super().__init__()
+        self.scheduler = RateScheduler(calls_per_minute, 60)
+        self.max_wait = max_wait
+        self.throttle_cooldown = self.scheduler.window
+
+    def supports(self, ticker: str, market: str) -> bool:
+        # Alpha Vantage는 한국 주식을 지원하지 않음
+        return market != "한국" and not ticker.upper().endswith(('.KS', '.KQ'))
+
+    def fetch(self, ticker: str, market: str, wait: bool = True) -> Optional[Dict]:
+        max_wait = None if wait else self.max_wait
+        time_series = self.scheduler.call(PRIORITY_PRICE, lambda: get_daily_av(ticker), max_wait)
+        
+        key = f"av:{ticker}"
+        overview = fundamentals_cache.get(key)
+        if overview is None:
+            # 기업 개요를 못 받아도 가격 데이터는 기록
+            try:
+                overview = self.scheduler.call(PRIORITY_OVERVIEW, lambda: get_overview_av(ticker), max_wait)
+            except Exception as e:
+                print(f"⚠️  {ticker}: 기업 개요 조회 실패: {str(e)}")
+            if overview is not None:
+                fundamentals_cache.set(key, overview)
+        
+        return build_stock_data_av(ticker, market, time_series, overview)
+
+    def summary(self) -> str:
+        return (f"{super().summary()} | 호출 {self.scheduler.calls}회 | "
+                f"호출 제한 재시도 {self.scheduler.requeued}회")
+
+
+def get_stock_data_av(ticker: str, market: str) -> Optional[Dict]:
+    """Alpha Vantage API로 주식 데이터 수집 (한 종목, 호출 한도 내에서 바로 실행)"""
+    provider = AlphaVantageProvider()
+    if not provider.supports(ticker, market):
+        print(f"⚠️  {ticker}: Alpha Vantage는 한국 주식 미지원")
+        return None
+    try:
+        return provider.fetch(ticker, market)
+    except Exception as e:
+        print(f"❌ {ticker} 오류: {str(e)}")
+        return None
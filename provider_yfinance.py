@@ -0,0 +1,367 @@
+"""
+yfinance 데이터 제공자 - User-Agent 세션, 호스트별 동시 요청 제한, 묶음 히스토리 다운로드
+"""
+
+import os
+import time
+import threading
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+import yfinance as yf
+from yfinance.data import YfData
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from price_store import PRICE_STORE_DIR, PRICE_STORE_FULL_REFRESH_DAYS, PriceStore, bars_to_frame, frame_to_bars
+from incremental import IndicatorBook
+from fundamentals_cache import fundamentals_cache
+from indicators import align_histories, compute_indicators, indicator_rows
+from metrics import metrics
+from providers import Provider, request_timeout
+
+FETCH_HOST_LIMIT = int(os.environ.get('FETCH_HOST_LIMIT', '4'))  # 호스트별 최대 동시 요청 수
+HISTORY_BATCH_SIZE = int(os.environ.get('HISTORY_BATCH_SIZE', '50'))  # 히스토리 묶음 다운로드 단위 (0이면 종목별)
+
+YF_REQUEST_TIMEOUT = 10  # yf.download 요청당 시간 제한 (초, yfinance 기본값)
+
+# 시세 단계에서 받는 기간 (최근 봉 하나)
+QUOTE_PERIOD = "1d"
+
+# 변경 확인(change_probe.py)에 쓰는 시세 API (여러 종목을 요청 한 번으로)
+QUOTE_URL = "https://query1.finance.yahoo.com/v7/finance/quote"
+QUOTE_FIELDS = "regularMarketTime,regularMarketPrice,regularMarketVolume"
+QUOTE_BATCH_SIZE = 50  # 변경 확인 요청당 종목 수
+
+# stock.info 중 실제로 사용하는 필드만 캐시
+INFO_FIELDS = ('longName', 'shortName', 'marketCap', 'trailingPE', 'priceToBook')
+
+
+class HostLimitedAdapter(HTTPAdapter):
+    """호스트별 동시 요청 수를 제한하는 HTTP 어댑터"""
+
+    def __init__(self, per_host: int, **kwargs):
+        self._per_host = max(1, per_host)
+        self._semaphores = {}
+        self._lock = threading.Lock()
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        # 종목별 수집 기한이 있으면 요청 시간 제한을 남은 시간으로 줄임
+        timeout = kwargs.get('timeout')
+        if isinstance(timeout, tuple):
+            kwargs['timeout'] = tuple(request_timeout(t) for t in timeout)
+        else:
+            kwargs['timeout'] = request_timeout(timeout)
+        host = urlparse(request.url).hostname
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self._per_host)
+                self._semaphores[host] = semaphore
+        with semaphore:
+            return super().send(request, **kwargs)
+
+
+# User-Agent 설정으로 차단 우회
+session = requests.Session()
+session.headers.update({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+})
+_adapter = HostLimitedAdapter(FETCH_HOST_LIMIT, pool_maxsize=max(FETCH_HOST_LIMIT, 10))
+session.mount('https://', _adapter)
+session.mount('http://', _adapter)
+metrics.instrument(session, "yfinance")
+
+
+
+def download_histories(tickers: List[str], period: str = "1y",
+                       start: Optional[str] = None) -> Dict[str, pd.DataFrame]:
+    """여러 종목의 OHLCV 히스토리를 한 번의 yf.download 호출로 받아 종목별로 분리
+
+    start(YYYY-MM-DD)가 주어지면 period 대신 해당 날짜 이후의 봉만 받습니다.
+    """
+    if not tickers:
+        return {}
+    
+    range_args = {'start': start} if start else {'period': period}
+    # threads=True면 yfinance 내부 스레드에서 요청하므로 종목별 기한을 timeout으로 직접 전달
+    df = yf.download(tickers, group_by='ticker', auto_adjust=True, actions=False, threads=True, progress=False,
+                     session=session, timeout=request_timeout(YF_REQUEST_TIMEOUT), **range_args)
+    
+    frames = {}
+    for ticker in tickers:
+        if isinstance(df.columns, pd.MultiIndex):
+            if ticker not in df.columns.get_level_values(0):
+                continue
+            frame = df[ticker]
+        else:
+            frame = df
+        
+        # 거래일이 다른 종목(한국/미국)이 섞이면 빈 행이 생기므로 제거
+        frame = frame.dropna(how='all')
+        if not frame.empty:
+            frames[ticker] = frame
+    
+    return frames
+
+
+def download_quotes(tickers: List[str]) -> Dict[str, List]:
+    """여러 종목의 최신 시세 [시각(epoch), 가격, 거래량]를 quote API 한 번으로 조회"""
+    data = YfData(session=session)
+    result = data.get_raw_json(QUOTE_URL, user_agent_headers=data.user_agent_headers,
+                               params={"symbols": ",".join(tickers), "fields": QUOTE_FIELDS})
+    bars = {}
+    for quote in (result.get('quoteResponse') or {}).get('result') or []:
+        price, at = quote.get('regularMarketPrice'), quote.get('regularMarketTime')
+        if price is None or at is None:
+            continue
+        bars[quote['symbol']] = [int(at), round(float(price), 4), float(quote.get('regularMarketVolume') or 0)]
+    return bars
+
+
+class BatchHistoryLoader:
+    """종목 목록을 chunk_size개씩 묶어 필요할 때 한 번에 다운로드하는 히스토리 로더
+
+    store가 주어지면 두 단계로 나눠 받습니다.
+    - 일봉 동기화 (종목별로 하루 한 번): 저장된 마지막 날짜 이후의 봉(또는 1년치)을 받아 저장소에 반영
+    - 시세 (그 외 매 실행): 최근 봉 하나(현재가/거래량)만 받아 저장된 일봉 위에 얹음
+    시세 단계에서 book이 주어지면 지표도 1년치를 다시 계산하지 않고 전일까지의 증분 지표 상태에 당일 봉만 얹어 계산합니다.
+    """
+
+    def __init__(self, tickers: List[str], chunk_size: int, period: str = "1y",
+                 store: Optional[PriceStore] = None, book: Optional[IndicatorBook] = None):
+        chunk_size = max(1, chunk_size)
+        self._period = period
+        self._store = store
+        self._book = book
+        self._chunks = [tickers[i:i + chunk_size] for i in range(0, len(tickers), chunk_size)]
+        self._chunk_of = {t: i for i, chunk in enumerate(self._chunks) for t in chunk}
+        self._locks = [threading.Lock() for _ in self._chunks]
+        self._frames: List[Optional[Dict[str, pd.DataFrame]]] = [None] * len(self._chunks)
+        self._indicators: List[Dict[str, Dict]] = [{} for _ in self._chunks]
+        self.synced = 0
+        self.quoted = 0
+        self._count_lock = threading.Lock()
+
+    def get(self, ticker: str) -> Tuple[Optional[pd.DataFrame], Optional[Dict]]:
+        """종목의 히스토리와 지표 반환 (해당 묶음이 아직 없으면 먼저 다운로드 후 묶음 단위로 지표 계산)"""
+        index = self._chunk_of.get(ticker)
+        if index is None:
+            return None, None
+        
+        with self._locks[index]:
+            if self._frames[index] is None:
+                try:
+                    self._frames[index], self._indicators[index] = self._load(self._chunks[index])
+                except Exception as e:
+                    print(f"⚠️  묶음 다운로드 오류 ({len(self._chunks[index])}개 종목): {str(e)}")
+                    self._frames[index] = {}
+                
+                # 증분 지표 상태로 계산하지 못한 종목만 묶음 단위로 계산
+                frames = self._frames[index]
+                tickers = [t for t in frames if t not in self._indicators[index]]
+                if tickers:
+                    with metrics.timer("indicators"):
+                        matrices = align_histories([frames[t] for t in tickers])
+                        self._indicators[index].update(indicator_rows(tickers, compute_indicators(**matrices)))
+        
+        return self._frames[index].get(ticker), self._indicators[index].get(ticker)
+
+    def _load(self, tickers: List[str]) -> Tuple[Dict[str, pd.DataFrame], Dict[str, Dict]]:
+        """묶음의 종목별 히스토리와 증분 지표 상태로 계산한 지표 (시세 단계 종목만)"""
+        if self._store is None:
+            with metrics.timer("history"):
+                return download_histories(tickers, self._period), {}
+        
+        store = self._store
+        today = datetime.now(timezone.utc).date()
+        full = [t for t in tickers if store.needs_full_refresh(t)]
+        delta = [t for t in tickers if t not in full and store.needs_daily_sync(t, today)]
+        quote = [t for t in tickers if t not in full and t not in delta]
+        
+        downloaded = {}
+        with metrics.timer("history"):
+            if full:
+                downloaded.update(download_histories(full, self._period))
+            if delta:
+                # 마지막 봉은 장중에 바뀔 수 있으므로 마지막 저장 날짜부터 다시 받음
+                start = min(store.last_date(t) for t in delta)
+                downloaded.update(download_histories(delta, start=start.isoformat()))
+            quotes = download_histories(quote, QUOTE_PERIOD) if quote else {}
+        store.mark_synced([t for t in full + delta if t in downloaded], today)
+        with self._count_lock:
+            self.synced += len(full) + len(delta)
+            self.quoted += len(quote)
+        metrics.count("price_store", len(full), kind="full")
+        metrics.count("price_store", len(delta), kind="sync")
+        metrics.count("price_store", len(quote), kind="quote")
+        
+        frames = {}
+        indicators = {}
+        for ticker in tickers:
+            if ticker in downloaded:
+                bars = store.merge(ticker, downloaded[ticker], full=ticker in full)
+            elif ticker in quotes:
+                bars = store.overlay(ticker, quotes[ticker])
+                live = self._live_indicators(ticker, frame_to_bars(quotes[ticker]))
+                if live:
+                    indicators[ticker] = live
+            else:
+                # 다운로드 실패 시 저장된 데이터로 계산
+                bars = store.load(ticker)
+                if bars is not None and ticker not in full:
+                    print(f"⚠️  {ticker}: 새 데이터 없음, 저장된 일봉 사용")
+            if bars is not None and len(bars) > 0:
+                frames[ticker] = bars_to_frame(bars)
+        
+        return frames, indicators
+
+    def _live_indicators(self, ticker: str, quote: np.ndarray) -> Optional[Dict]:
+        """전일까지의 증분 지표 상태 + 당일 봉 하나로 계산한 지표 (계산할 수 없으면 None)"""
+        if self._book is None or len(quote) != 1 or not np.isfinite(quote['close'][0]):
+            return None
+        bars = self._store.load(ticker)
+        if bars is None or len(bars) == 0:
+            return None
+        day = quote['date'][0].astype(date)
+        with metrics.timer("indicators", ticker):
+            state = self._book.sync(ticker, bars, self._store.refreshed_at(ticker), before=day)
+            if state.last_date is None:
+                return None
+            return state.values((day, float(quote['high'][0]), float(quote['low'][0]),
+                                 float(quote['close'][0]), float(quote['volume'][0])))
+
+
+def build_stock_data(ticker: str, market: str, info: Dict, indicators: Dict) -> Dict:
+    """stock.info 필드와 지표로 노션에 기록할 데이터 생성"""
+    # 시가총액 (억원/백만달러)
+    market_cap = info.get('marketCap')
+    if market_cap:
+        if market == "한국":
+            market_cap = market_cap / 100_000_000  # 억원
+        else:
+            market_cap = market_cap / 1_000_000  # 백만달러
+    
+    return {
+        "종목명": info.get('longName') or info.get('shortName') or ticker,
+        "티커": ticker,
+        "시장": market,
+        **indicators,
+        "PER": info.get('trailingPE'),
+        "PBR": info.get('priceToBook'),
+        "시가총액": round(market_cap, 2) if market_cap else None,
+        "업데이트시각": datetime.now(timezone.utc).isoformat()
+    }
+
+
+def get_stock_data(ticker: str, market: str, hist: Optional[pd.DataFrame] = None,
+                   indicators: Optional[Dict] = None) -> Optional[Dict]:
+    """주식 데이터 수집 (yfinance with User-Agent)
+
+    hist가 주어지면 (묶음 다운로드 결과) 종목별 히스토리 다운로드를 생략하고,
+    indicators가 주어지면 (묶음 지표 계산 결과) 지표 계산도 생략합니다.
+    """
+    try:
+        # User-Agent가 설정된 세션으로 yfinance 사용
+        stock = yf.Ticker(ticker, session=session)
+        
+        # 히스토리 데이터 가져오기 (최대 1년, 재시도 포함)
+        if hist is None or hist.empty:
+            for attempt in range(3):
+                if attempt:
+                    metrics.count("retries", client="yfinance")
+                try:
+                    with metrics.timer("history", ticker):
+                        hist = stock.history(period="1y")
+                    if not hist.empty:
+                        break
+                    print(f"⚠️  {ticker}: 재시도 {attempt + 1}/3")
+                except Exception as e:
+                    print(f"⚠️  {ticker}: 다운로드 오류 (시도 {attempt + 1}/3): {str(e)}")
+                    if attempt < 2:
+                        time.sleep(2)
+        
+        if hist is None or hist.empty:
+            print(f"❌ {ticker}: 데이터 없음 (3회 재시도 후)")
+            return None
+        
+        # 펀더멘털은 하루 단위로만 바뀌므로 캐시 사용
+        def fetch_info() -> Optional[Dict]:
+            with metrics.timer("info", ticker):
+                return {k: v for k, v in stock.info.items() if k in INFO_FIELDS} or None
+        
+        info = fundamentals_cache.get_or_fetch(f"yf:{ticker}", fetch_info) or {}
+        
+        # 기술적 지표 (묶음 다운로드 시에는 묶음 단위로 미리 계산됨)
+        if indicators is None:
+            with metrics.timer("indicators", ticker):
+                indicators = indicator_rows([ticker], compute_indicators(**align_histories([hist])))[ticker]
+        
+        data = build_stock_data(ticker, market, info, indicators)
+        print(f"✅ {ticker} ({data['종목명']}): {data['현재가']:,.2f} ({data['등락률']*100:+.2f}%)")
+        return data
+        
+    except Exception as e:
+        print(f"❌ {ticker} 오류: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+
+class YFinanceProvider(Provider):
+    """yfinance 제공자 (한국/미국 모두 지원)
+
+    prepare()로 받은 종목은 batch_size개씩 묶어 히스토리를 한 번에 받고, 다른 제공자에서
+    넘어온 종목은 종목별로 다운로드합니다.
+    """
+
+    name = "yfinance"
+    probes = True
+
+    def __init__(self, batch_size: int = HISTORY_BATCH_SIZE, store_dir: str = PRICE_STORE_DIR):
+        super().__init__()
+        self.batch_size = batch_size
+        self.store = PriceStore(store_dir, PRICE_STORE_FULL_REFRESH_DAYS) if store_dir else None
+        # 시세 단계 지표용 증분 상태 (상주 실행에서는 주기 사이에 메모리에 유지)
+        self.book = IndicatorBook() if self.store else None
+        self.loader: Optional[BatchHistoryLoader] = None
+        self._synced = 0
+        self._quoted = 0
+
+    def prepare(self, stocks: List[Dict]):
+        if self.loader:
+            self._synced += self.loader.synced
+            self._quoted += self.loader.quoted
+            self.loader = None
+        if stocks and (self.batch_size > 0 or self.store):
+            self.loader = BatchHistoryLoader([s['ticker'] for s in stocks], self.batch_size,
+                                             store=self.store, book=self.book)
+
+    def probe(self, tickers: List[str]) -> Dict[str, List]:
+        """QUOTE_BATCH_SIZE개씩 묶어 최신 시세 조회 (묶음당 요청 한 번, 실패한 묶음은 빠짐)"""
+        bars = {}
+        with metrics.timer("probe"):
+            for i in range(0, len(tickers), QUOTE_BATCH_SIZE):
+                chunk = tickers[i:i + QUOTE_BATCH_SIZE]
+                try:
+                    bars.update(download_quotes(chunk))
+                except Exception as e:
+                    print(f"⚠️  변경 확인 오류 ({len(chunk)}개 종목): {str(e)}")
+        return bars
+
+    def fetch(self, ticker: str, market: str, wait: bool = True) -> Optional[Dict]:
+        hist, indicators = self.loader.get(ticker) if self.loader else (None, None)
+        return get_stock_data(ticker, market, hist, indicators)
+
+    def save(self):
+        if self.book:
+            self.book.save()
+
+    def summary(self) -> str:
+        if not self.store:
+            return super().summary()
+        synced = self._synced + (self.loader.synced if self.loader else 0)
+        quoted = self._quoted + (self.loader.quoted if self.loader else 0)
+        return f"{super().summary()} | 일봉 동기화 {synced}개 | 시세만 {quoted}개"
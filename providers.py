@@ -0,0 +1,268 @@
+"""
+데이터 제공자(provider) 계층 - 종목별 라우팅, 장애 시 다른 제공자로 전환, 제공자별 지연/오류 통계
+
+제공자는 Provider를 상속해 fetch(ticker, market)로 노션에 기록할 데이터 dict를 반환합니다.
+Router는 종목마다 라우팅 규칙(PROVIDER_ROUTES)에 적힌 제공자 중 정상인 제공자를
+빠른 순서로 시도하고, 호출 제한(Throttled)이나 오류가 나면 다음 제공자로 넘어갑니다.
+"""
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+from metrics import metrics
+from rate_limit import Throttled
+
+# 연속 오류가 이 횟수에 도달하면 PROVIDER_COOLDOWN초 동안 후순위로 밀림
+PROVIDER_MAX_ERRORS = int(os.environ.get('PROVIDER_MAX_ERRORS', '3'))
+PROVIDER_COOLDOWN = float(os.environ.get('PROVIDER_COOLDOWN', '60'))
+
+# 종목별 라우팅 규칙 (JSON): 티커 접미사(".KS") 또는 시장("한국") -> 시도할 제공자 목록, "*"는 기본값
+# 비어 있으면 default_routes() 사용
+PROVIDER_ROUTES = os.environ.get('PROVIDER_ROUTES', '')
+
+# 현재 스레드가 수집 중인 종목의 기한 (time.monotonic() 기준, 없으면 None)
+_deadline = threading.local()
+
+
+@contextmanager
+def fetch_deadline(seconds: float) -> Iterator[None]:
+    """이 안에서 보내는 HTTP 요청의 시간 제한을 seconds초 뒤의 기한까지로 줄임 (0이면 제한 없음)"""
+    previous = getattr(_deadline, 'at', None)
+    _deadline.at = time.monotonic() + seconds if seconds else None
+    try:
+        yield
+    finally:
+        _deadline.at = previous
+
+
+def request_timeout(default: Optional[float]) -> Optional[float]:
+    """HTTP 요청 시간 제한: default와 현재 종목의 남은 기한 중 짧은 쪽 (기한이 지났으면 TimeoutError)
+
+    시간 초과로 실패 처리된 종목의 작업 스레드가 요청을 계속 보내며 남아 있지 않도록 합니다.
+    """
+    deadline = getattr(_deadline, 'at', None)
+    if deadline is None:
+        return default
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("종목별 수집 시간 초과")
+    return remaining if default is None else min(default, remaining)
+
+
+class ProviderStats:
+    """제공자별 호출 결과 집계 (스레드 안전)"""
+
+    def __init__(self):
+        self.success = 0
+        self.errors = 0
+        self.throttled = 0
+        self.total_latency = 0.0
+        self.avg_latency: Optional[float] = None  # 성공한 호출의 지수 이동평균 (초)
+        self.consecutive_errors = 0
+        self.cooldown_until = 0.0
+        self._lock = threading.Lock()
+
+    def record_success(self, latency: float):
+        with self._lock:
+            self.success += 1
+            self.total_latency += latency
+            self.avg_latency = latency if self.avg_latency is None else 0.7 * self.avg_latency + 0.3 * latency
+            self.consecutive_errors = 0
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+            self.consecutive_errors += 1
+            if self.consecutive_errors >= PROVIDER_MAX_ERRORS:
+                self.cooldown_until = time.monotonic() + PROVIDER_COOLDOWN
+
+    def record_throttled(self, cooldown: float):
+        with self._lock:
+            self.throttled += 1
+            self.cooldown_until = max(self.cooldown_until, time.monotonic() + cooldown)
+
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.cooldown_until
+
+    def summary(self) -> str:
+        latency = f"{self.total_latency / self.success:.2f}초" if self.success else "-"
+        return (f"성공 {self.success}회 | 오류 {self.errors}회 | 호출 제한 {self.throttled}회 | "
+                f"평균 응답 {latency}")
+
+
+class Provider:
+    """데이터 제공자 인터페이스"""
+
+    name = ""
+    # probe()로 최신 봉을 묶어서 값싸게 확인할 수 있는지
+    probes = False
+    # Throttled 후 이 시간(초) 동안 후순위로 밀림
+    throttle_cooldown = 60.0
+
+    def __init__(self):
+        self.stats = ProviderStats()
+
+    def supports(self, ticker: str, market: str) -> bool:
+        """이 제공자가 해당 종목을 조회할 수 있는지"""
+        return True
+
+    def prepare(self, stocks: List[Dict]):
+        """실행 시작 시 이 제공자가 우선 담당할 종목 목록 전달 (묶음 다운로드 등 준비)"""
+
+    def probe(self, tickers: List[str]) -> Dict[str, List]:
+        """종목별 최신 봉 [날짜, 종가, 거래량] (값싸게 확인할 수 없는 제공자는 빈 dict)"""
+        return {}
+
+    def fetch(self, ticker: str, market: str, wait: bool = True) -> Optional[Dict]:
+        """종목 데이터 수집 (노션 속성명 -> 값, 데이터가 없으면 None)
+
+        wait=False면 호출 한도 때문에 오래 기다려야 할 때 기다리지 않고 Throttled를 던집니다
+        (다른 제공자로 넘길 수 있는 경우).
+        """
+        raise NotImplementedError
+
+    def save(self):
+        """실행(상주 실행은 주기)이 끝날 때 제공자 상태를 파일로 저장"""
+
+    def summary(self) -> str:
+        return self.stats.summary()
+
+
+def default_routes(available: List[str]) -> Dict[str, List[str]]:
+    """기본 라우팅: 한국 주식은 yfinance, 미국 주식은 Alpha Vantage 키가 있으면 Alpha Vantage 우선"""
+    us = ["alphavantage", "yfinance"] if os.environ.get('ALPHA_VANTAGE_API_KEY') else ["yfinance", "alphavantage"]
+    routes = {"한국": ["yfinance"], "미국": us, "*": ["yfinance", "alphavantage"]}
+    return {key: [name for name in names if name in available] for key, names in routes.items()}
+
+
+class Router:
+    """종목별로 제공자를 골라 데이터를 수집 (실패 시 다음 제공자로 전환)"""
+
+    def __init__(self, providers: List[Provider], routes: Optional[Dict[str, List[str]]] = None):
+        self.providers = {provider.name: provider for provider in providers}
+        self.routes = routes or default_routes(list(self.providers))
+        self.failovers = 0
+        self._lock = threading.Lock()
+
+    def route(self, ticker: str, market: str) -> List[Provider]:
+        """라우팅 규칙에 맞는 제공자 목록 (규칙 순서, 지원하지 않는 제공자 제외)"""
+        names = None
+        for key, route in self.routes.items():
+            if key.startswith('.') and ticker.upper().endswith(key.upper()):
+                names = route
+                break
+        if names is None:
+            names = self.routes.get(market) or self.routes.get("*") or list(self.providers)
+        return [self.providers[name] for name in names
+                if name in self.providers and self.providers[name].supports(ticker, market)]
+
+    def candidates(self, ticker: str, market: str) -> List[Provider]:
+        """시도할 순서: 정상인 제공자 먼저, 그중 평균 응답이 빠른 순 (측정 전이면 규칙 순서)"""
+        route = self.route(ticker, market)
+        order = {id(provider): i for i, provider in enumerate(route)}
+
+        def key(provider: Provider):
+            latency = provider.stats.avg_latency
+            measured = all(p.stats.avg_latency is not None for p in route)
+            return (not provider.stats.healthy(), latency if measured else 0, order[id(provider)])
+
+        return sorted(route, key=key)
+
+    def supports(self, ticker: str, market: str) -> bool:
+        return bool(self.route(ticker, market))
+
+    def prepare(self, stocks: List[Dict]):
+        """종목별 첫 번째 제공자에게 담당 종목을 미리 알려줌"""
+        assigned = {name: [] for name in self.providers}
+        for stock_info in stocks:
+            route = self.candidates(stock_info['ticker'], stock_info['market'])
+            if route:
+                assigned[route[0].name].append(stock_info)
+        for name, provider in self.providers.items():
+            provider.prepare(assigned[name])
+
+    def probe(self, stocks: List[Dict]) -> Dict[str, List]:
+        """종목별 최신 봉 (라우팅 규칙 중 probe를 지원하는 첫 제공자가 확인, 확인하지 못한 종목은 빠짐)"""
+        assigned = {name: [] for name in self.providers}
+        for stock_info in stocks:
+            route = [p for p in self.route(stock_info['ticker'], stock_info['market']) if p.probes]
+            if route:
+                assigned[route[0].name].append(stock_info['ticker'])
+        bars = {}
+        for name, tickers in assigned.items():
+            if tickers:
+                bars.update(self.providers[name].probe(tickers))
+        return bars
+
+    def save(self):
+        for provider in self.providers.values():
+            provider.save()
+
+    def fetch(self, ticker: str, market: str) -> Optional[Dict]:
+        """종목 데이터 수집 (모든 제공자가 실패하면 None)"""
+        with metrics.timer("fetch", ticker):
+            return self._fetch(ticker, market)
+
+    def _fetch(self, ticker: str, market: str) -> Optional[Dict]:
+        candidates = self.candidates(ticker, market)
+        if not candidates:
+            print(f"⚠️  {ticker}: 지원하는 데이터 제공자 없음")
+            return None
+
+        for i, provider in enumerate(candidates):
+            last = i == len(candidates) - 1
+            start = time.monotonic()
+            try:
+                data = provider.fetch(ticker, market, wait=last)
+            except Throttled as e:
+                provider.stats.record_throttled(provider.throttle_cooldown)
+                print(f"⏳ {ticker}: {provider.name} 호출 제한 ({str(e)})")
+                data = None
+            except Exception as e:
+                provider.stats.record_error()
+                print(f"⚠️  {ticker}: {provider.name} 오류: {str(e)}")
+                data = None
+            else:
+                if data:
+                    provider.stats.record_success(time.monotonic() - start)
+                else:
+                    provider.stats.record_error()
+
+            if data:
+                return data
+            if not last:
+                with self._lock:
+                    self.failovers += 1
+                print(f"🔀 {ticker}: {candidates[i + 1].name}(으)로 전환")
+
+        return None
+
+    def summary(self) -> List[str]:
+        return [f"{name}: {provider.summary()}" for name, provider in self.providers.items()]
+
+
+def build_router(names: Optional[List[str]] = None) -> Router:
+    """제공자를 생성해 Router 반환 (names가 주어지면 해당 제공자만 사용)"""
+    names = names or ["yfinance", "alphavantage"]
+    providers = []
+    for name in names:
+        if name == "yfinance":
+            from provider_yfinance import YFinanceProvider
+            providers.append(YFinanceProvider())
+        elif name == "alphavantage":
+            from provider_alphavantage import AlphaVantageProvider
+            providers.append(AlphaVantageProvider())
+        else:
+            raise ValueError(f"알 수 없는 데이터 제공자: {name}")
+
+    routes = None
+    if PROVIDER_ROUTES:
+        try:
+            routes = json.loads(PROVIDER_ROUTES)
+        except ValueError:
+            print("⚠️  PROVIDER_ROUTES 파싱 실패, 기본 라우팅 사용")
+    return Router(providers, routes)
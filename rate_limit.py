@@ -0,0 +1,124 @@
+"""
+호출 속도 제한 도구
+"""
+
+import time
+import heapq
+import threading
+from collections import deque
+from typing import Any, Callable, Optional
+
+
+class TokenBucket:
+    """초당 rate개, 최대 burst개까지 연속 호출을 허용하는 토큰 버킷 (스레드 안전)"""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """토큰 하나를 얻을 때까지 대기"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                else:
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """서버가 요청한 대기 시간(Retry-After) 동안 모든 호출을 멈춤"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0
+
+
+class Throttled(Exception):
+    """서버가 호출 제한 응답을 보냄 (같은 호출을 다시 예약)"""
+
+
+class RateScheduler:
+    """슬라이딩 윈도우 호출 스케줄러 (스레드 안전)
+
+    최근 window초 동안 실제로 보낸 호출이 max_calls회 미만이 되는 즉시 다음 호출을
+    실행하며, 여러 스레드가 기다리는 중이면 우선순위(작을수록 먼저), 요청 순서대로 실행합니다.
+    호출이 Throttled를 던지면 윈도우가 빌 때까지 기다린 뒤 같은 우선순위로 다시 실행합니다.
+    """
+
+    def __init__(self, max_calls: int, window: float = 60.0, max_requeue: int = 3):
+        self.max_calls = max(1, max_calls)
+        self.window = window
+        self.max_requeue = max_requeue
+        self.calls = 0
+        self.requeued = 0
+        self._sent = deque()
+        self._waiting = []
+        self._seq = 0
+        self._cond = threading.Condition()
+
+    def _acquire(self, priority: int, max_wait: Optional[float]):
+        """호출 슬롯을 얻을 때까지 대기 (max_wait초 안에 얻을 수 없으면 Throttled)"""
+        with self._cond:
+            self._seq += 1
+            ticket = (priority, self._seq)
+            heapq.heappush(self._waiting, ticket)
+            deadline = None if max_wait is None else time.monotonic() + max_wait
+            try:
+                while True:
+                    now = time.monotonic()
+                    while self._sent and now - self._sent[0] >= self.window:
+                        self._sent.popleft()
+
+                    full = len(self._sent) >= self.max_calls
+                    if not full and self._waiting[0] == ticket:
+                        heapq.heappop(self._waiting)
+                        self._sent.append(now)
+                        self.calls += 1
+                        self._cond.notify_all()
+                        return
+
+                    timeout = self._sent[0] + self.window - now if full else None
+                    if deadline is not None:
+                        if (timeout or 0) > deadline - now or now >= deadline:
+                            raise Throttled(f"호출 한도 대기 시간 초과 ({max_wait:g}초)")
+                        timeout = deadline - now if timeout is None else timeout
+                    self._cond.wait(timeout)
+            except BaseException:
+                if ticket in self._waiting:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._cond.notify_all()
+                raise
+
+    def call(self, priority: int, fn: Callable[[], Any], max_wait: Optional[float] = None) -> Any:
+        """호출 한도 안에서 fn()을 실행하고 결과 반환
+
+        max_wait가 주어지면 그 시간 안에 실행할 수 없을 때 기다리지 않고 Throttled를
+        던지며, 서버의 호출 제한 응답도 다시 시도하지 않고 그대로 전달합니다.
+        """
+        requeues = 0
+        while True:
+            self._acquire(priority, max_wait)
+            try:
+                return fn()
+            except Throttled:
+                # 서버 기준으로 한도를 넘었으므로 윈도우 전체를 사용한 것으로 간주
+                with self._cond:
+                    self._sent = deque([time.monotonic()] * self.max_calls)
+                if max_wait is not None or requeues >= self.max_requeue:
+                    raise
+                requeues += 1
+                with self._cond:
+                    self.requeued += 1
+                print(f"⏳ 호출 제한 응답, {self.window:.0f}초 후 다시 시도 ({requeues}/{self.max_requeue})")
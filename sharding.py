@@ -0,0 +1,146 @@
+"""
+샤딩 - 종목 목록을 티커 해시로 n개 조각으로 나눠 여러 실행기(GitHub Actions matrix, 여러 호스트)가 나눠 처리
+
+같은 티커는 실행기/실행 순서와 관계없이 항상 같은 샤드에 속하므로 한 종목의 노션 페이지는 한 샤드만 쓰고,
+샤드 수를 바꿔 종목의 담당 샤드가 바뀌어도 로컬 색인에 없는 티커는 노션 DB 전체 재조회로 찾으므로
+(notion_sync.PageIndex.resolve_miss) 페이지가 중복 생성되지 않습니다.
+
+각 샤드는 계측 보고서(metrics.py)에 샤드 번호와 처리한 종목을 남기고, merge_reports()가 보고서들을 모아
+전체 결과와 누락/중복 샤드를 확인합니다.
+"""
+
+import os
+import json
+import zlib
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+
+def parse_shard(text: str) -> Tuple[int, int]:
+    """"3/8" -> (3, 8) (샤드 번호는 1부터)"""
+    try:
+        index, count = (int(part) for part in text.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"샤드 형식은 k/n 입니다: {text}")
+    if count < 1 or not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"샤드 번호는 1~{count} 사이여야 합니다: {text}")
+    return index, count
+
+
+def shard_of(ticker: str, count: int) -> int:
+    """티커가 속한 샤드 번호 (1부터, 프로세스/호스트와 관계없이 항상 같은 값)"""
+    return zlib.crc32(ticker.upper().encode('utf-8')) % count + 1
+
+
+def select_shard(stocks: List[Dict], index: int, count: int) -> List[Dict]:
+    """index번 샤드의 종목 (중복 티커는 처음 것만)"""
+    seen = set()
+    selected = []
+    for stock_info in stocks:
+        ticker = stock_info['ticker']
+        if ticker in seen:
+            continue
+        seen.add(ticker)
+        if shard_of(ticker, count) == index:
+            selected.append(stock_info)
+    return selected
+
+
+def _gauges(report: Dict, name: str) -> List[Dict]:
+    return report.get('gauges', {}).get(name, [])
+
+
+def merge_reports(paths: List[str]) -> Dict:
+    """샤드별 계측 보고서를 합쳐 전체 결과 반환
+
+    누락된 샤드, 같은 샤드의 중복 보고서, 여러 샤드에서 처리된 티커가 있으면 problems에 기록합니다.
+    """
+    shards: Dict[int, Dict] = {}
+    counts = set()
+    problems = []
+    results: Dict[str, float] = {}
+    http: Dict[str, float] = {}
+    owners: Dict[str, int] = {}
+
+    for path in paths:
+        try:
+            with open(path, encoding='utf-8') as f:
+                report = json.load(f)
+        except (OSError, ValueError) as e:
+            problems.append(f"{path}: 읽을 수 없음 ({str(e)})")
+            continue
+
+        shard = _gauges(report, 'shard')
+        if not shard:
+            problems.append(f"{path}: 샤드 정보 없음 (--shard 없이 실행한 보고서)")
+            continue
+        index, count = int(shard[0]['value']), int(shard[0]['labels']['of'])
+        counts.add(count)
+        if index in shards:
+            problems.append(f"샤드 {index}/{count}: 보고서 중복 ({shards[index]['path']}, {path})")
+            continue
+
+        for gauge in _gauges(report, 'results'):
+            results[gauge['labels']['result']] = results.get(gauge['labels']['result'], 0) + gauge['value']
+        for counter in report.get('counters', {}).get('http_requests', []):
+            client = counter['labels']['client']
+            http[client] = http.get(client, 0) + counter['value']
+        for ticker in report.get('tickers', {}):
+            if ticker in owners and owners[ticker] != index:
+                problems.append(f"{ticker}: 샤드 {owners[ticker]}, {index}에서 모두 처리됨")
+            owners.setdefault(ticker, index)
+
+        run = report.get('stages', {}).get('run', {})
+        tickers = _gauges(report, 'tickers')
+        shards[index] = {
+            "path": path,
+            "tickers": int(tickers[0]['value']) if tickers else 0,
+            "seconds": run.get('sum'),
+            "results": {g['labels']['result']: g['value'] for g in _gauges(report, 'results')},
+        }
+
+    if len(counts) > 1:
+        problems.append(f"샤드 수가 서로 다름: {sorted(counts)}")
+    count = max(counts) if counts else 0
+    missing = [i for i in range(1, count + 1) if i not in shards]
+    if missing:
+        problems.append(f"누락된 샤드: {', '.join(map(str, missing))} (전체 {count}개)")
+
+    seconds = [s['seconds'] for s in shards.values() if s['seconds'] is not None]
+    return {
+        "shards": count,
+        "reported": len(shards),
+        "tickers": sum(s['tickers'] for s in shards.values()),
+        "results": results,
+        "http_requests": http,
+        "slowest_seconds": max(seconds) if seconds else None,
+        "per_shard": {str(i): shards[i] for i in sorted(shards)},
+        "problems": problems,
+    }
+
+
+def summary_markdown(merged: Dict) -> str:
+    """GitHub Actions 작업 요약(GITHUB_STEP_SUMMARY)용 표"""
+    keys = ("성공", "실패", "생성", "업데이트", "변경 없음")
+    lines = [
+        f"### 📈 샤드 실행 결과 ({merged['reported']}/{merged['shards']}개 샤드, {merged['tickers']}개 종목)",
+        "",
+        "| 샤드 | 종목 | 시간(초) | " + " | ".join(keys) + " |",
+        "|---|---|---|" + "---|" * len(keys),
+    ]
+    for index, shard in merged['per_shard'].items():
+        seconds = f"{shard['seconds']:.1f}" if shard['seconds'] is not None else "-"
+        lines.append(f"| {index} | {shard['tickers']} | {seconds} | "
+                     + " | ".join(f"{shard['results'].get(k, 0):g}" for k in keys) + " |")
+    lines.append("| **합계** | **{}** | | ".format(merged['tickers'])
+                 + " | ".join(f"**{merged['results'].get(k, 0):g}**" for k in keys) + " |")
+    if merged['problems']:
+        lines += ["", "⚠️ 확인 필요:"] + [f"- {problem}" for problem in merged['problems']]
+    return "\n".join(lines) + "\n"
+
+
+def write_step_summary(merged: Dict, path: Optional[str] = None):
+    path = path or os.environ.get('GITHUB_STEP_SUMMARY')
+    if path:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(summary_markdown(merged))
@@ -0,0 +1,250 @@
+"""
+실행 스냅샷 - 실행(수집 주기)마다 전 종목 결과를 열 단위 구조화 배열 파일 하나로 저장하고 빠르게 읽습니다.
+
+- `<UTC 시각>.npy`: SNAPSHOT_DTYPE 구조화 배열 (종목당 한 줄, 종목 코드 순)
+- `_dictionary.json`: 티커/시장 문자열 -> 정수 코드 (추가만 하므로 코드가 실행 간에 바뀌지 않음), 종목명
+
+티커는 정수 코드로 저장되므로 스냅샷끼리 비교할 때 문자열이나 dict를 다루지 않고 코드 배열로 맞출 수 있고,
+읽을 때는 메모리 맵으로 열어 수만 종목도 밀리초 단위로 불러옵니다.
+이번에 수집하지 않은 종목(변경 확인으로 건너뜀, 수집 실패, 상주 실행에서 차례가 아닌 시장)은 직전 스냅샷의 값을 그대로 옮겨
+스냅샷마다 전 종목이 들어 있습니다.
+"""
+
+import os
+import json
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from indicators import MA_SIGNALS, RSI_PERIOD, SMA_PERIODS
+
+SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR', '.cache/snapshots')  # 빈 값이면 저장 안 함
+SNAPSHOT_KEEP = int(os.environ.get('SNAPSHOT_KEEP', '100'))  # 보관할 스냅샷 수 (0이면 모두 보관)
+
+DICTIONARY_FILE = '_dictionary.json'
+TIME_FORMAT = '%Y%m%dT%H%M%S.%fZ'  # 파일 이름 (UTC)
+
+# 노션 속성 -> 스냅샷 필드
+FIELDS = {
+    "현재가": 'close',
+    "등락률": 'change',
+    "거래량": 'volume',
+    "5일평균거래량대비": 'volume_ratio',
+    **{f"SMA{period}": f'sma{period}' for period in SMA_PERIODS},
+    f"RSI{RSI_PERIOD}": f'rsi{RSI_PERIOD}',
+    "52주최고가": 'high52',
+    "52주최저가": 'low52',
+    "PER": 'per',
+    "PBR": 'pbr',
+    "시가총액": 'market_cap',
+}
+
+SNAPSHOT_DTYPE = np.dtype([
+    ('ticker', 'i4'),  # 사전의 티커 코드
+    ('market', 'i1'),  # 사전의 시장 코드
+    ('signal', 'i1'),  # MA_SIGNALS 위치 (-1이면 "-")
+    ('updated_at', 'datetime64[s]'),  # UTC
+    *[(field, 'f8') for field in FIELDS.values()],  # 값이 없으면 NaN
+])
+
+
+def signal_code(label: Optional[str]) -> int:
+    return MA_SIGNALS.index(label) if label in MA_SIGNALS else -1
+
+
+def _utc(text: Optional[str]) -> np.datetime64:
+    if not text:
+        return np.datetime64('NaT')
+    return np.datetime64(datetime.fromisoformat(text).astimezone(timezone.utc).replace(tzinfo=None), 's')
+
+
+class Dictionary:
+    """티커/시장 문자열 <-> 정수 코드 (추가만 함) + 티커별 종목명"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.tickers: List[str] = []
+        self.markets: List[str] = []
+        self.names: Dict[str, str] = {}
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            self.tickers, self.markets, self.names = data['tickers'], data['markets'], data.get('names', {})
+        except (OSError, ValueError, KeyError):
+            pass
+        self._codes = {ticker: code for code, ticker in enumerate(self.tickers)}
+        self._dirty = False
+
+    def code(self, ticker: str) -> int:
+        """티커 코드 (없으면 새로 부여)"""
+        code = self._codes.get(ticker)
+        if code is None:
+            code = self._codes[ticker] = len(self.tickers)
+            self.tickers.append(ticker)
+            self._dirty = True
+        return code
+
+    def lookup(self, ticker: str) -> Optional[int]:
+        return self._codes.get(ticker)
+
+    def market_code(self, market: str) -> int:
+        if market not in self.markets:
+            self.markets.append(market)
+            self._dirty = True
+        return self.markets.index(market)
+
+    def set_name(self, ticker: str, name: Optional[str]):
+        if name and self.names.get(ticker) != name:
+            self.names[ticker] = name
+            self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({"tickers": self.tickers, "markets": self.markets, "names": self.names}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+        self._dirty = False
+
+
+class Snapshot:
+    """읽어 들인 스냅샷 (rows는 메모리 맵 구조화 배열, 티커 코드 순)"""
+
+    def __init__(self, path: str, rows: np.ndarray, dictionary: Dictionary):
+        self.path = path
+        self.rows = rows
+        self.dictionary = dictionary
+        self.taken_at = datetime.strptime(os.path.basename(path)[:-4], TIME_FORMAT).replace(tzinfo=timezone.utc)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def tickers(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """줄마다 티커 문자열 (rows를 주면 그 줄들, 예: align() 결과)"""
+        rows = self.rows if rows is None else rows
+        return np.asarray(self.dictionary.tickers, dtype=object)[rows['ticker']]
+
+    def find(self, ticker: str) -> Optional[np.void]:
+        """티커의 줄 (없으면 None, 코드 순 정렬을 이용한 이진 탐색)"""
+        code = self.dictionary.lookup(ticker)
+        if code is None:
+            return None
+        i = np.searchsorted(self.rows['ticker'], code)
+        if i < len(self.rows) and self.rows['ticker'][i] == code:
+            return self.rows[i]
+        return None
+
+    def to_dict(self, row: np.void) -> Dict:
+        """한 줄 -> 노션 속성명 dict (느린 경로, 출력/디버깅용)"""
+        ticker = self.dictionary.tickers[row['ticker']]
+        data = {"티커": ticker, "종목명": self.dictionary.names.get(ticker, ticker),
+                "시장": self.dictionary.markets[row['market']],
+                "골든크로스데드크로스": MA_SIGNALS[row['signal']] if row['signal'] >= 0 else "-",
+                "업데이트시각": f"{row['updated_at']}+00:00"}
+        for name, field in FIELDS.items():
+            value = float(row[field])
+            data[name] = None if np.isnan(value) else (int(value) if field == 'volume' else value)
+        return data
+
+
+def align(previous: Snapshot, current: Snapshot):
+    """두 스냅샷에 모두 있는 종목의 줄을 같은 순서로 반환 (previous 줄, current 줄)"""
+    _, prev_index, curr_index = np.intersect1d(previous.rows['ticker'], current.rows['ticker'],
+                                               assume_unique=True, return_indices=True)
+    return previous.rows[prev_index], current.rows[curr_index]
+
+
+class SnapshotStore:
+    """실행 스냅샷 디렉터리"""
+
+    def __init__(self, root: str = SNAPSHOT_DIR, keep: int = SNAPSHOT_KEEP):
+        self.root = root
+        self.keep = keep
+        os.makedirs(root, exist_ok=True)
+        self.dictionary = Dictionary(os.path.join(root, DICTIONARY_FILE))
+
+    def paths(self) -> List[str]:
+        """스냅샷 파일 (오래된 것부터)"""
+        names = sorted(name for name in os.listdir(self.root) if name.endswith('Z.npy'))
+        return [os.path.join(self.root, name) for name in names]
+
+    def load(self, path: str) -> Snapshot:
+        return Snapshot(path, np.load(path, mmap_mode='r'), self.dictionary)
+
+    def latest(self, n: int = 1) -> List[Snapshot]:
+        """최근 스냅샷 n개 (오래된 것부터)"""
+        return [self.load(path) for path in self.paths()[-n:]]
+
+    def write(self, results: Iterable[Dict], carry: Iterable[str] = (),
+              taken_at: Optional[datetime] = None) -> Optional[str]:
+        """수집 결과(노션 속성명 dict)로 스냅샷 저장 (carry의 종목은 직전 값을 옮김, 경로 반환)"""
+        results = list(results)
+        rows = np.empty(len(results), dtype=SNAPSHOT_DTYPE)
+        rows['ticker'] = [self.dictionary.code(data['티커']) for data in results]
+        rows['market'] = [self.dictionary.market_code(data.get('시장') or '') for data in results]
+        rows['signal'] = [signal_code(data.get('골든크로스데드크로스')) for data in results]
+        rows['updated_at'] = [_utc(data.get('업데이트시각')) for data in results]
+        for name, field in FIELDS.items():
+            rows[field] = np.array([data.get(name) for data in results], dtype='f8')  # None -> NaN
+        for data in results:
+            self.dictionary.set_name(data['티커'], data.get('종목명'))
+
+        # carry의 종목은 그 종목이 들어 있는 가장 최근 스냅샷에서 옮김
+        codes = np.array([code for code in map(self.dictionary.lookup, carry) if code is not None], dtype='i4')
+        missing = np.setdiff1d(codes, rows['ticker'])
+        carried = [rows]
+        for old_path in reversed(self.paths()):
+            if len(missing) == 0:
+                break
+            old = self.load(old_path).rows
+            old = old[np.isin(old['ticker'], missing)]
+            carried.append(old)
+            missing = np.setdiff1d(missing, old['ticker'])
+        rows = np.concatenate(carried)
+        if len(rows) == 0:
+            return None
+
+        # 같은 종목이 여러 번 들어오면 마지막 값 사용, 코드 순 정렬
+        rows = rows[::-1]
+        _, first = np.unique(rows['ticker'], return_index=True)
+        rows = rows[first]
+
+        taken_at = taken_at or datetime.now(timezone.utc)
+        path = os.path.join(self.root, f"{taken_at.astimezone(timezone.utc).strftime(TIME_FORMAT)}.npy")
+        self.dictionary.save()
+        tmp = f"{path[:-4]}.tmp.npy"
+        np.save(tmp, rows)
+        os.replace(tmp, path)
+
+        if self.keep:
+            for old_path in self.paths()[:-self.keep]:
+                os.remove(old_path)
+        return path
+
+
+class SnapshotBuilder:
+    """실행 중 수집 결과를 모아 두었다가 끝에 스냅샷 하나로 저장 (스레드 안전, 종목별 마지막 값)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._results: Dict[str, Dict] = {}
+        self._carry = set()
+
+    def add(self, stock_data: Dict):
+        with self._lock:
+            self._results[stock_data['티커']] = stock_data
+
+    def carry(self, tickers: Iterable[str]):
+        """이번에 수집하지 않았지만 값이 그대로인 종목 (직전 스냅샷 값을 옮김)"""
+        with self._lock:
+            self._carry.update(tickers)
+
+    def write(self, root: str = SNAPSHOT_DIR) -> Optional[str]:
+        if not root:
+            return None
+        with self._lock:
+            results, carry = list(self._results.values()), set(self._carry)
+        return SnapshotStore(root).write(results, carry)
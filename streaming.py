@@ -0,0 +1,238 @@
+"""
+실시간 시세 스트리밍 - 시세 피드의 틱을 종목별 상태(현재가, 당일 거래량, 고가/저가)로 모으고,
+정해진 주기(STREAM_SNAPSHOT_SECONDS)마다 바뀐 종목만 증분 지표 상태(incremental.py)로
+지표를 계산해 노션에 기록합니다.
+
+피드는 QuoteFeed를 상속해 ticks()로 Tick을 내보내면 됩니다.
+- ReplayFeed: 기록된 틱 파일을 재생 (오프라인 테스트용)
+- PollingFeed: 푸시 피드가 없을 때 최근 봉 하나를 주기적으로 받아 틱으로 변환
+"""
+
+import os
+import json
+import time
+import signal
+import threading
+from datetime import date, datetime, timezone
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from price_store import PriceStore
+from fundamentals_cache import fundamentals_cache
+from incremental import IndicatorBook
+from market_hours import MARKET_CALENDARS
+
+STREAM_SNAPSHOT_SECONDS = float(os.environ.get('STREAM_SNAPSHOT_SECONDS', '10'))  # 노션 기록 주기 (초)
+STREAM_POLL_SECONDS = float(os.environ.get('STREAM_POLL_SECONDS', '5'))  # PollingFeed 조회 주기 (초)
+STREAM_REPLAY_SPEED = float(os.environ.get('STREAM_REPLAY_SPEED', '1'))  # 재생 배속 (0이면 기다리지 않음)
+
+
+class Tick(NamedTuple):
+    ticker: str
+    price: float
+    time: datetime  # 체결 시각 (timezone 포함)
+    size: float = 0.0  # 이번 체결 수량
+    day_volume: Optional[float] = None  # 피드가 당일 누적 거래량을 주면 size 대신 사용
+
+
+class QuoteFeed:
+    """시세 피드 인터페이스"""
+
+    def subscribe(self, tickers: List[str]):
+        self.tickers = set(tickers)
+
+    def ticks(self) -> Iterator[Tick]:
+        """틱을 도착 순서대로 반환 (close() 후 또는 피드가 끝나면 종료)"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class ReplayFeed(QuoteFeed):
+    """기록된 틱 재생
+
+    파일은 한 줄에 하나씩 {"t": ISO 시각, "ticker", "price", "size"(선택), "day_volume"(선택)} 형식의
+    JSON Lines이며, speed배속으로 틱 사이 간격을 지켜 재생합니다.
+    """
+
+    def __init__(self, path: str, speed: float = STREAM_REPLAY_SPEED):
+        self.path = path
+        self.speed = speed
+        self.tickers = set()
+        self._closed = threading.Event()
+
+    def ticks(self) -> Iterator[Tick]:
+        previous = None
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                if self._closed.is_set():
+                    return
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if self.tickers and record['ticker'] not in self.tickers:
+                    continue
+                at = datetime.fromisoformat(record['t'])
+                if at.tzinfo is None:
+                    at = at.replace(tzinfo=timezone.utc)
+                if self.speed > 0 and previous is not None:
+                    self._closed.wait(max(0.0, (at - previous).total_seconds() / self.speed))
+                previous = at
+                yield Tick(record['ticker'], float(record['price']), at,
+                           float(record.get('size', 0)), record.get('day_volume'))
+
+    def close(self):
+        self._closed.set()
+
+
+class PollingFeed(QuoteFeed):
+    """최근 봉 하나(provider_yfinance.QUOTE_PERIOD)를 interval초마다 묶어서 받아 틱으로 변환"""
+
+    def __init__(self, interval: float = STREAM_POLL_SECONDS):
+        self.interval = interval
+        self.tickers = set()
+        self._closed = threading.Event()
+
+    def ticks(self) -> Iterator[Tick]:
+        from provider_yfinance import QUOTE_PERIOD, download_histories
+
+        while not self._closed.is_set():
+            started = time.monotonic()
+            try:
+                frames = download_histories(sorted(self.tickers), QUOTE_PERIOD)
+            except Exception as e:
+                print(f"⚠️  시세 조회 오류: {str(e)}")
+                frames = {}
+            now = datetime.now(timezone.utc)
+            for ticker, frame in frames.items():
+                bar = frame.iloc[-1]
+                yield Tick(ticker, float(bar['Close']), now, day_volume=float(bar['Volume']))
+            self._closed.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def close(self):
+        self._closed.set()
+
+
+class QuoteState:
+    """종목별 당일 시세 상태"""
+
+    __slots__ = ('session', 'open', 'high', 'low', 'last', 'volume')
+
+    def __init__(self, session: date, price: float):
+        self.session = session
+        self.open = self.high = self.low = self.last = price
+        self.volume = 0.0
+
+
+class TickAggregator:
+    """틱을 종목별 당일 상태로 모으고, 바뀐 종목의 노션 데이터를 계산 (스레드 안전)
+
+    지표는 저장소의 이전 거래일까지 일봉으로 만든 증분 지표 상태에 당일 봉(고가/저가/현재가/거래량)을
+    얹어 계산하므로 주기 실행(compute_indicators) 결과와 같은 값이 나오며, 스냅샷마다 히스토리를 다시 읽지 않습니다.
+    """
+
+    def __init__(self, stocks: List[Dict], store: PriceStore, book: Optional[IndicatorBook] = None):
+        self.markets = {s['ticker']: s['market'] for s in stocks}
+        self.store = store
+        self.book = book or IndicatorBook('')
+        self.ticks = 0
+        self._synced: Dict[str, date] = {}  # 종목별로 지표 상태를 맞춘 거래일
+        self._states: Dict[str, QuoteState] = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+
+    def apply(self, tick: Tick):
+        market = self.markets.get(tick.ticker)
+        if market is None:
+            return
+        calendar = MARKET_CALENDARS.get(market)
+        session = tick.time.astimezone(calendar.tz if calendar else timezone.utc).date()
+
+        with self._lock:
+            state = self._states.get(tick.ticker)
+            if state is None or state.session != session:
+                state = self._states[tick.ticker] = QuoteState(session, tick.price)
+            state.last = tick.price
+            state.high = max(state.high, tick.price)
+            state.low = min(state.low, tick.price)
+            state.volume = float(tick.day_volume) if tick.day_volume is not None else state.volume + tick.size
+            self._dirty.add(tick.ticker)
+            self.ticks += 1
+
+    def snapshot(self) -> List[Tuple[Dict, Dict]]:
+        """마지막 스냅샷 이후 틱이 들어온 종목의 (stock_info, 노션 데이터) 목록"""
+        with self._lock:
+            dirty = sorted(self._dirty)
+            self._dirty.clear()
+            states = {ticker: (self._states[ticker].session, self._states[ticker].open, self._states[ticker].high,
+                               self._states[ticker].low, self._states[ticker].last, self._states[ticker].volume)
+                      for ticker in dirty}
+
+        from provider_yfinance import build_stock_data
+
+        results = []
+        for ticker in dirty:
+            session, _, high, low, last, volume = states[ticker]
+            if self._synced.get(ticker) != session:
+                # 새 거래일이면 저장소의 이전 거래일까지 일봉을 지표 상태에 반영
+                bars = self.store.load(ticker)
+                if bars is None or len(bars) == 0:
+                    continue
+                self.book.sync(ticker, bars, self.store.refreshed_at(ticker), before=session)
+                self._synced[ticker] = session
+            indicators = self.book.states[ticker].values((session, high, low, last, volume))
+
+            market = self.markets[ticker]
+            info = fundamentals_cache.get(f"yf:{ticker}") or {}
+            results.append(({"ticker": ticker, "market": market},
+                            build_stock_data(ticker, market, info, indicators)))
+        return results
+
+
+def run_stream(feed: QuoteFeed, aggregator: TickAggregator,
+               write: Callable[[List[Tuple[Dict, Dict]]], Dict[str, int]],
+               cadence: float = STREAM_SNAPSHOT_SECONDS) -> Dict[str, int]:
+    """피드를 소비하면서 cadence초마다 바뀐 종목을 write()로 기록
+
+    SIGINT/SIGTERM을 받거나 피드가 끝나면 남은 변경분을 기록하고 합계를 반환합니다.
+    """
+    stop = threading.Event()
+    totals: Dict[str, int] = {}
+
+    def on_signal(*_):
+        if not stop.is_set():
+            print("🛑 종료 요청: 남은 시세를 기록하고 종료합니다")
+        stop.set()
+        feed.close()
+
+    signal.signal(signal.SIGINT, on_signal)
+    signal.signal(signal.SIGTERM, on_signal)
+
+    def consume():
+        try:
+            for tick in feed.ticks():
+                aggregator.apply(tick)
+                if stop.is_set():
+                    break
+        except Exception as e:
+            print(f"❌ 시세 피드 오류: {str(e)}")
+        finally:
+            stop.set()
+
+    consumer = threading.Thread(target=consume, daemon=True)
+    consumer.start()
+    print(f"📡 스트리밍 시작: {len(aggregator.markets)}개 종목, {cadence:g}초마다 노션 기록")
+
+    def flush():
+        items = aggregator.snapshot()
+        if items:
+            counts = write(items)
+            for key, value in counts.items():
+                totals[key] = totals.get(key, 0) + value
+
+    while not stop.wait(cadence):
+        flush()
+    consumer.join(timeout=cadence)
+    flush()
+    print(f"📡 스트리밍 종료: 틱 {aggregator.ticks}개 처리")
+    return totals
@@ -1,274 +1,325 @@
 #!/usr/bin/env python3
 """
-실시간 주식 모니터링 - yfinance (User-Agent 우회)
+실시간 주식 모니터링 - 데이터 제공자(yfinance/Alpha Vantage)에서 수집해 노션에 기록
 GitHub Actions에서 작동하도록 개선된 버전
 """
 
+import time
+_IMPORT_STARTED = time.perf_counter()
+
 import os
 import json
+import argparse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime, timezone
-from typing import Dict, List, Optional
-import yfinance as yf
-import numpy as np
-import requests
-
-# User-Agent 설정으로 차단 우회
-import requests_cache
-session = requests.Session()
-session.headers.update({
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-})
-
-# 노션 API 설정
-NOTION_API_KEY = os.environ.get('NOTION_API_KEY')
-NOTION_DATABASE_ID = os.environ.get('NOTION_DATABASE_ID', '42c8793f07f84faf96ef46a1ed45579a')
-NOTION_HEADERS = {
-    "Authorization": f"Bearer {NOTION_API_KEY}",
-    "Content-Type": "application/json",
-    "Notion-Version": "2022-06-28"
-}
-
-
-def calculate_rsi(prices: np.ndarray, period: int = 30) -> float:
-    """RSI 계산"""
-    if len(prices) < period + 1:
-        return None
-    
-    deltas = np.diff(prices)
-    gains = np.where(deltas > 0, deltas, 0)
-    losses = np.where(deltas < 0, -deltas, 0)
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from fundamentals_cache import fundamentals_cache
+from change_probe import change_probe
+from providers import Router, build_router, fetch_deadline
+from market_hours import MarketSchedule
+from metrics import metrics
+from sharding import merge_reports, parse_shard, select_shard, write_step_summary
+from write_queue import NOTION_JOURNAL_PATH, WriteQueue, load_journal
+
+# requests(노션)와 yfinance/pandas(제공자)는 갱신할 종목이 있을 때만 임포트
+if TYPE_CHECKING:
+    from notion_sync import PageIndex
+    from snapshot import SnapshotBuilder
+
+metrics.observe("import", time.perf_counter() - _IMPORT_STARTED)
+
+# 병렬 수집 설정
+FETCH_WORKERS = int(os.environ.get('FETCH_WORKERS', '8'))  # 동시에 수집할 종목 수
+FETCH_TIMEOUT = float(os.environ.get('FETCH_TIMEOUT', '60'))  # 종목별 최대 수집 시간 (초, 0이면 제한 없음)
+
+
+def fetch_all(stocks: List[Dict], router: Router, workers: int = FETCH_WORKERS,
+              timeout: float = FETCH_TIMEOUT) -> Iterator[Tuple[Dict, Optional[Dict]]]:
+    """종목 데이터를 병렬로 수집하여 완료되는 순서대로 반환
+
+    종목마다 router가 고른 제공자로 수집하며, 종목별 수집 시간이 timeout(초)을 넘으면
+    실패(None)로 처리합니다. 제공자의 HTTP 요청도 같은 기한으로 시간 제한을 줄이므로
+    시간 초과된 종목의 작업 스레드는 다음 요청에서 끝납니다.
+    """
+    executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    started = {}
+    router.prepare(stocks)
+
+    def task(index: int, stock_info: Dict) -> Optional[Dict]:
+        started[index] = time.monotonic()
+        with fetch_deadline(timeout):
+            return router.fetch(stock_info['ticker'], stock_info['market'])
+
+    futures = {}
+    indexes = {}
+    for index, stock_info in enumerate(stocks):
+        future = executor.submit(task, index, stock_info)
+        futures[future] = stock_info
+        indexes[future] = index
+    pending = set(futures)
+
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=1, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                try:
+                    yield futures[future], future.result()
+                except Exception as e:
+                    print(f"❌ {futures[future]['ticker']} 오류: {str(e)}")
+                    yield futures[future], None
+
+            # 시간 초과 종목은 결과를 기다리지 않고 실패 처리
+            now = time.monotonic()
+            for future in list(pending):
+                stock_info = futures[future]
+                start = started.get(indexes[future])
+                if timeout and start is not None and now - start > timeout:
+                    pending.discard(future)
+                    print(f"❌ {stock_info['ticker']}: 시간 초과 ({timeout:g}초)")
+                    yield stock_info, None
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def write_results(results: Iterable[Tuple[Dict, Optional[Dict]]], queue: WriteQueue,
+                  wait: bool = True, snapshot: Optional['SnapshotBuilder'] = None) -> Dict[str, int]:
+    """수집 결과를 노션 쓰기 큐에 넣고 결과 개수 반환 (snapshot이 주어지면 실행 스냅샷에도 모음)
+
+    wait=False면 기록을 기다리지 않고 지금까지 끝난 기록만 셉니다 (나머지는 다음 호출에서 집계).
+    """
+    counts = {"성공": 0, "실패": 0, "생성": 0, "업데이트": 0, "변경 없음": 0}
+    for stock_info, stock_data in results:
+        if stock_data:
+            queue.put(stock_data)
+            if snapshot is not None:
+                snapshot.add(stock_data)
+        else:
+            counts["실패"] += 1
+    for key, value in queue.flush(wait=wait).items():
+        counts[key] = counts.get(key, 0) + value
+    return counts
+
+
+def run_cycle(router: Router, stocks: List[Dict], existing_pages: 'PageIndex', queue: WriteQueue,
+              timeout: float = FETCH_TIMEOUT, probe: bool = False,
+              universe: Optional[List[Dict]] = None, refreshed: Optional[Set[str]] = None) -> Dict[str, int]:
+    """종목을 한 번 수집해 노션에 기록하고 캐시/상태를 저장 (결과 개수 반환)
+
+    probe=True면 먼저 최신 봉만 확인해 지난번 수집 때와 같은 종목은 건너뜁니다.
+    refreshed가 주어지면 대상 종목을 모두 수집했거나 변경 없음으로 건너뛴 시장을 담습니다 (갱신 완료 기록용,
+    수집에 실패한 종목이 하나라도 있는 시장은 빼서 다음 주기에 다시 갱신).
+    결과는 실행 스냅샷(SNAPSHOT_DIR)으로도 저장하고 (universe 중 이번에 수집하지 못한 종목은 직전 값)
+    직전 스냅샷과 비교해 알림을 보냅니다.
+    """
+    from notion_sync import page_state
+    from snapshot import SnapshotBuilder
+    from alerts import check_alerts
     
-    avg_gain = np.mean(gains[:period])
-    avg_loss = np.mean(losses[:period])
+    snapshot = SnapshotBuilder()
+    snapshot.carry(s['ticker'] for s in (universe or stocks))
+    markets = {s['market'] for s in stocks}
+    failed = set()
+    bars = {}
+    skipped = set()
+    if probe and change_probe.enabled:
+        bars = router.probe(stocks)
+        skipped = change_probe.unchanged(bars)
+        if skipped:
+            print(f"🔎 최신 봉이 그대로인 {len(skipped)}개 종목 건너뜀")
+            stocks = [s for s in stocks if s['ticker'] not in skipped]
     
-    for i in range(period, len(deltas)):
-        avg_gain = (avg_gain * (period - 1) + gains[i]) / period
-        avg_loss = (avg_loss * (period - 1) + losses[i]) / period
+    def fetched() -> Iterator[Tuple[Dict, Optional[Dict]]]:
+        for stock_info, stock_data in fetch_all(stocks, router, timeout=timeout):
+            if stock_data and stock_info['ticker'] in bars:
+                change_probe.record(stock_info['ticker'], bars[stock_info['ticker']])
+            if not stock_data:
+                failed.add(stock_info['market'])
+            yield stock_info, stock_data
     
-    if avg_loss == 0:
-        return 100
+    # 수집이 끝난 종목부터 쓰기 큐로 넘겨 노션 응답과 관계없이 수집을 계속함
+    counts = write_results(fetched(), queue, snapshot=snapshot)
+    counts["건너뜀"] = len(skipped)
+    if refreshed is not None:
+        refreshed.update(markets - failed)
+    with metrics.timer("snapshot"):
+        written = snapshot.write()
+    if written:
+        check_alerts()
     
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
-    return round(rsi, 2)
+    fundamentals_cache.save()
+    change_probe.save()
+    router.save()
+    page_state.save()
+    existing_pages.save()
+    metrics.write()  # 상주 실행에서도 주기마다 보고서 갱신
+    return counts
 
 
-def calculate_sma(prices: np.ndarray, period: int) -> Optional[float]:
-    """단순 이동평균 계산"""
-    if len(prices) < period:
-        return None
-    return round(np.mean(prices[-period:]), 2)
-
-
-def determine_ma_signal(current_price: float, sma20: float, sma50: float, sma200: float) -> str:
-    """이동평균선 배열 상태 판단"""
-    if not all([sma20, sma50, sma200]):
-        return "-"
+def run_stream_mode(router: Router, stocks: List[Dict], existing_pages: 'PageIndex', queue: WriteQueue,
+                    timeout: float, replay: Optional[str] = None) -> Dict[str, int]:
+    """스트리밍 실행: 한 번 전체 수집(일봉 동기화)한 뒤 시세 피드의 틱으로 갱신"""
+    from price_store import PRICE_STORE_DIR, PRICE_STORE_FULL_REFRESH_DAYS, PriceStore
+    from streaming import PollingFeed, ReplayFeed, TickAggregator, run_stream
+    from incremental import IndicatorBook
+    from notion_sync import page_state
+    from snapshot import SnapshotBuilder
+    from alerts import check_alerts
     
-    if sma20 > sma50 > sma200:
-        return "정배열"
-    elif sma20 < sma50 < sma200:
-        return "역배열"
-    elif sma20 > sma50:
-        return "골든크로스 (20>50)"
-    elif sma50 > sma200:
-        return "골든크로스 (50>200)"
-    elif sma20 < sma50:
-        return "데드크로스 (20<50)"
-    elif sma50 < sma200:
-        return "데드크로스 (50<200)"
-    else:
-        return "-"
+    if not PRICE_STORE_DIR:
+        print("❌ 스트리밍은 로컬 일봉 저장소(PRICE_STORE_DIR)가 필요합니다")
+        return {}
+    
+    counts = run_cycle(router, stocks, existing_pages, queue, timeout)
+    
+    store = PriceStore(PRICE_STORE_DIR, PRICE_STORE_FULL_REFRESH_DAYS)
+    missing = [s['ticker'] for s in stocks if store.last_date(s['ticker']) is None]
+    if missing:
+        print(f"⚠️  저장된 일봉이 없어 스트리밍에서 제외: {', '.join(missing)}")
+    streamed = [s for s in stocks if s['ticker'] not in missing]
+    
+    feed = ReplayFeed(replay) if replay else PollingFeed()
+    feed.subscribe([s['ticker'] for s in streamed])
+    book = IndicatorBook()
+    snapshot = SnapshotBuilder()
+    # 노션이 느려도 스냅샷을 기다리게 하지 않음 (밀린 종목은 큐에서 마지막 값만 기록)
+    totals = run_stream(feed, TickAggregator(streamed, store, book),
+                        lambda items: write_results(items, queue, wait=False, snapshot=snapshot))
+    for key, value in queue.flush().items():
+        totals[key] = totals.get(key, 0) + value
+    # 스트리밍 동안의 종목별 마지막 값 (틱이 없던 종목은 직전 스냅샷 값)
+    snapshot.carry(s['ticker'] for s in stocks)
+    with metrics.timer("snapshot"):
+        written = snapshot.write()
+    if written:
+        check_alerts()
+    
+    book.save()
+    fundamentals_cache.save()
+    page_state.save()
+    existing_pages.save()
+    for key, value in totals.items():
+        counts[key] = counts.get(key, 0) + value
+    return counts
 
 
-def get_stock_data(ticker: str, market: str) -> Optional[Dict]:
-    """주식 데이터 수집 (yfinance with User-Agent)"""
-    try:
-        # User-Agent가 설정된 세션으로 yfinance 사용
-        stock = yf.Ticker(ticker, session=session)
-        
-        # 히스토리 데이터 가져오기 (최대 1년, 재시도 포함)
-        hist = None
-        for attempt in range(3):
-            try:
-                hist = stock.history(period="1y")
-                if not hist.empty:
-                    break
-                print(f"⚠️  {ticker}: 재시도 {attempt + 1}/3")
-            except Exception as e:
-                print(f"⚠️  {ticker}: 다운로드 오류 (시도 {attempt + 1}/3): {str(e)}")
-                if attempt < 2:
-                    import time
-                    time.sleep(2)
-        
-        if hist is None or hist.empty:
-            print(f"❌ {ticker}: 데이터 없음 (3회 재시도 후)")
-            return None
-        
-        info = stock.info
-        current_price = hist['Close'].iloc[-1]
-        
-        # 5일 평균 거래량
-        avg_volume_5d = hist['Volume'].tail(5).mean()
-        current_volume = hist['Volume'].iloc[-1]
-        volume_ratio = (current_volume / avg_volume_5d - 1) if avg_volume_5d > 0 else 0
-        
-        # 이동평균 계산
-        closes = hist['Close'].values
-        sma20 = calculate_sma(closes, 20)
-        sma50 = calculate_sma(closes, 50)
-        sma200 = calculate_sma(closes, 200)
-        
-        # RSI 계산
-        rsi30 = calculate_rsi(closes, 30)
-        
-        # 52주 최고/최저
-        high_52w = hist['High'].max()
-        low_52w = hist['Low'].min()
-        
-        # 등락률 계산
-        prev_close = hist['Close'].iloc[-2] if len(hist) > 1 else current_price
-        change_pct = (current_price / prev_close - 1) if prev_close > 0 else 0
-        
-        # 골든크로스/데드크로스 판단
-        ma_signal = determine_ma_signal(current_price, sma20, sma50, sma200)
-        
-        # 시가총액 (억원/백만달러)
-        market_cap = info.get('marketCap')
-        if market_cap:
-            if market == "한국":
-                market_cap = market_cap / 100_000_000  # 억원
-            else:
-                market_cap = market_cap / 1_000_000  # 백만달러
-        
-        data = {
-            "종목명": info.get('longName') or info.get('shortName') or ticker,
-            "티커": ticker,
-            "시장": market,
-            "현재가": round(current_price, 2),
-            "등락률": round(change_pct, 4),
-            "거래량": int(current_volume),
-            "5일평균거래량대비": round(volume_ratio, 4),
-            "SMA20": sma20,
-            "SMA50": sma50,
-            "SMA200": sma200,
-            "RSI30": rsi30,
-            "PER": info.get('trailingPE'),
-            "PBR": info.get('priceToBook'),
-            "시가총액": round(market_cap, 2) if market_cap else None,
-            "52주최고가": round(high_52w, 2),
-            "52주최저가": round(low_52w, 2),
-            "골든크로스데드크로스": ma_signal,
-            "업데이트시각": datetime.now(timezone.utc).isoformat()
-        }
-        
-        print(f"✅ {ticker} ({data['종목명']}): {current_price:,.2f} ({change_pct*100:+.2f}%)")
-        return data
-        
-    except Exception as e:
-        print(f"❌ {ticker} 오류: {str(e)}")
-        import traceback
-        traceback.print_exc()
+def run_history(stocks: List[Dict], sync: bool) -> Optional[Dict[str, int]]:
+    """지표 히스토리 채우기/새 날 추가 (sync=True면 일봉 저장소부터 동기화해 채우고, 아니면 이미 채운 종목에 새 날만 추가)
+
+    사용하지 않으면 None을 반환합니다.
+    """
+    from price_store import PRICE_STORE_DIR, PRICE_STORE_FULL_REFRESH_DAYS, PriceStore
+    from backfill import INDICATOR_HISTORY_DIR, run_backfill, summary
+    
+    if not (PRICE_STORE_DIR and INDICATOR_HISTORY_DIR):
+        if sync:
+            print("❌ 지표 히스토리는 로컬 일봉 저장소(PRICE_STORE_DIR)와 INDICATOR_HISTORY_DIR가 필요합니다")
         return None
+    
+    store = PriceStore(PRICE_STORE_DIR, PRICE_STORE_FULL_REFRESH_DAYS)
+    with metrics.timer("history_backfill"):
+        counts = run_backfill([s['ticker'] for s in stocks], store, sync=sync, append_only=not sync)
+    if sync or any(counts.values()):
+        print(f"📚 지표 히스토리: {summary(counts)}")
+    return counts
 
 
-def get_existing_pages() -> Dict[str, str]:
-    """노션 DB의 기존 페이지 조회 (티커 -> page_id 매핑)"""
-    url = f"https://api.notion.com/v1/databases/{NOTION_DATABASE_ID}/query"
-    all_pages = {}
-    has_more = True
-    start_cursor = None
+def record_metrics(router: Router, queue: WriteQueue, counts: Dict[str, int]):
+    """실행 결과와 제공자/캐시/노션 통계를 계측 보고서에 기록"""
+    for key, value in counts.items():
+        metrics.set("results", value, result=key)
+    for name, provider in router.providers.items():
+        metrics.set("provider_calls", provider.stats.success, provider=name, outcome="success")
+        metrics.set("provider_calls", provider.stats.errors, provider=name, outcome="error")
+        metrics.set("provider_calls", provider.stats.throttled, provider=name, outcome="throttled")
+    metrics.set("failovers", router.failovers)
     
-    while has_more:
-        payload = {"page_size": 100}
-        if start_cursor:
-            payload["start_cursor"] = start_cursor
-        
-        response = requests.post(url, headers=NOTION_HEADERS, json=payload)
-        
-        if response.status_code != 200:
-            print(f"❌ 노션 조회 실패: {response.status_code}")
-            print(response.text)
-            return {}
-        
-        data = response.json()
-        
-        for page in data.get('results', []):
-            props = page.get('properties', {})
-            ticker_prop = props.get('티커', {})
-            
-            ticker = None
-            if ticker_prop.get('type') == 'rich_text':
-                rich_texts = ticker_prop.get('rich_text', [])
-                if rich_texts:
-                    ticker = rich_texts[0].get('plain_text', '').strip()
-            
-            if ticker:
-                all_pages[ticker] = page['id']
-        
-        has_more = data.get('has_more', False)
-        start_cursor = data.get('next_cursor')
+    lookups = fundamentals_cache.hits + fundamentals_cache.misses
+    metrics.set("cache_lookups", fundamentals_cache.hits, cache="fundamentals", outcome="hit")
+    metrics.set("cache_lookups", fundamentals_cache.misses, cache="fundamentals", outcome="miss")
+    metrics.set("cache_hit_ratio", fundamentals_cache.hits / lookups if lookups else None, cache="fundamentals")
+    unchanged = counts.get("변경 없음", 0)
+    written = unchanged + counts.get("업데이트", 0) + counts.get("생성", 0)
+    metrics.set("cache_hit_ratio", unchanged / written if written else None, cache="notion_state")
     
-    print(f"📊 기존 페이지 {len(all_pages)}개 발견")
-    return all_pages
+    metrics.set("notion_queue", queue.coalesced, kind="coalesced")
+    metrics.set("notion_queue", queue.replayed, kind="replayed")
+    metrics.set("notion_queue", queue.pending(), kind="pending")
 
 
-def create_or_update_page(stock_data: Dict, existing_pages: Dict[str, str]) -> bool:
-    """노션 페이지 생성 또는 업데이트"""
-    ticker = stock_data['티커']
-    page_id = existing_pages.get(ticker)
+def merge_shards(paths: List[str]):
+    """샤드 실행 결과를 합쳐 출력 (누락/중복 샤드가 있으면 종료 코드 1)"""
+    merged = merge_reports(paths)
+    results = merged['results']
+    print("=" * 60)
+    print(f"🧩 샤드 {merged['reported']}/{merged['shards']}개 | 종목 {merged['tickers']}개 | "
+          f"가장 느린 샤드 {merged['slowest_seconds'] or 0:.1f}초")
+    print(f"✅ 성공: {results.get('성공', 0):g}개 | ❌ 실패: {results.get('실패', 0):g}개")
+    print(f"📝 노션: 생성 {results.get('생성', 0):g}개 | 업데이트 {results.get('업데이트', 0):g}개 | "
+          f"변경 없음 {results.get('변경 없음', 0):g}개")
+    for index, shard in merged['per_shard'].items():
+        print(f"   샤드 {index}: 종목 {shard['tickers']}개 | 성공 {shard['results'].get('성공', 0):g}개 | "
+              f"실패 {shard['results'].get('실패', 0):g}개")
+    for problem in merged['problems']:
+        print(f"⚠️  {problem}")
+    print("=" * 60)
+    write_step_summary(merged)
+    if merged['problems']:
+        raise SystemExit(1)
+
+
+def main(providers: Optional[List[str]] = None, timeout: float = FETCH_TIMEOUT,
+         argv: Optional[List[str]] = None):
+    """메인 실행 함수 (providers가 주어지면 해당 데이터 제공자만 사용)
+
+    실행이 끝나면 (중간에 실패해도) 계측 보고서를 METRICS_PATH/METRICS_PROM_PATH에 기록합니다.
+    """
+    parser = argparse.ArgumentParser(description="주식 데이터를 수집해 노션에 기록")
+    parser.add_argument('--daemon', action='store_true',
+                        help="상주하면서 장 시간에 맞춰 주기적으로 갱신 (DAEMON_* 환경변수)")
+    parser.add_argument('--force', action='store_true',
+                        help="장 시간과 관계없이 모든 종목 갱신")
+    parser.add_argument('--stream', action='store_true',
+                        help="시세 피드를 받아 STREAM_SNAPSHOT_SECONDS초마다 노션에 기록 (STREAM_* 환경변수)")
+    parser.add_argument('--replay', metavar='FILE',
+                        help="--stream에서 실시간 피드 대신 기록된 틱 파일(JSON Lines) 재생")
+    parser.add_argument('--profile', metavar='FILE',
+                        help="cProfile 결과(워커 스레드 포함)를 FILE에 저장 (python -m pstats FILE로 확인)")
+    parser.add_argument('--backfill', action='store_true',
+                        help="1년치 일봉으로 일자별 지표 히스토리를 채움 (INDICATOR_HISTORY_DIR, NOTION_HISTORY_DATABASE_ID)")
+    parser.add_argument('--shard', metavar='K/N', type=parse_shard,
+                        help="종목을 티커 해시로 N개로 나눈 것 중 K번째(1부터)만 처리")
+    parser.add_argument('--merge', metavar='REPORT', nargs='+',
+                        help="샤드별 계측 보고서(metrics.json)를 합쳐 전체 결과 출력 (수집하지 않음)")
+    args = parser.parse_args(argv)
     
-    properties = {
-        "종목명": {"title": [{"text": {"content": stock_data['종목명']}}]},
-        "티커": {"rich_text": [{"text": {"content": stock_data['티커']}}]},
-        "시장": {"select": {"name": stock_data['시장']}},
-        "현재가": {"number": stock_data['현재가']},
-        "등락률": {"number": stock_data['등락률']},
-        "거래량": {"number": stock_data['거래량']},
-        "5일평균거래량대비": {"number": stock_data['5일평균거래량대비']},
-        "골든크로스데드크로스": {"select": {"name": stock_data['골든크로스데드크로스']}},
-        "date:업데이트시각:start": datetime.now(timezone.utc).isoformat(),
-        "date:업데이트시각:is_datetime": 1
-    }
+    if args.merge:
+        merge_shards(args.merge)
+        return
     
-    for key, notion_key in [
-        ('SMA20', 'SMA20'), ('SMA50', 'SMA50'), ('SMA200', 'SMA200'),
-        ('RSI30', 'RSI30'), ('PER', 'PER'), ('PBR', 'PBR'),
-        ('시가총액', '시가총액'), ('52주최고가', '52주최고가'), ('52주최저가', '52주최저가')
-    ]:
-        if stock_data.get(key) is not None:
-            properties[notion_key] = {"number": stock_data[key]}
+    profiler = None
+    if args.profile:
+        from metrics import ThreadProfiler
+        profiler = ThreadProfiler()
+        profiler.enable()
     
     try:
-        if page_id:
-            url = f"https://api.notion.com/v1/pages/{page_id}"
-            response = requests.patch(url, headers=NOTION_HEADERS, json={"properties": properties})
-        else:
-            url = "https://api.notion.com/v1/pages"
-            payload = {
-                "parent": {"type": "database_id", "database_id": NOTION_DATABASE_ID},
-                "properties": properties
-            }
-            response = requests.post(url, headers=NOTION_HEADERS, json=payload)
-        
-        if response.status_code in [200, 201]:
-            action = "업데이트" if page_id else "생성"
-            print(f"✅ {ticker} {action} 완료")
-            return True
-        else:
-            print(f"❌ {ticker} 노션 저장 실패: {response.status_code}")
-            print(response.text)
-            return False
-            
-    except Exception as e:
-        print(f"❌ {ticker} 노션 처리 중 오류: {str(e)}")
-        return False
+        with metrics.timer("run"):
+            run(args, providers, timeout)
+    finally:
+        if profiler:
+            threads = profiler.dump(args.profile)
+            print(f"🔬 프로파일 저장: {args.profile} (스레드 {threads}개)")
+        metrics.write()
 
 
-def main():
-    """메인 실행 함수"""
+def run(args: argparse.Namespace, providers: Optional[List[str]], timeout: float):
+    """인자에 따라 한 번 실행 / 상주 실행 / 스트리밍 실행
+
+    갱신할 시장이 없으면 데이터 제공자/노션 모듈을 임포트하기 전에 종료합니다.
+    """
     print("=" * 60)
-    print("🚀 주식 데이터 수집 시작 (yfinance with User-Agent)")
+    print("🚀 주식 데이터 수집 시작")
     print(f"⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("=" * 60)
     
@@ -298,27 +349,98 @@ def main():
         except:
             print("⚠️  환경변수 파싱 실패, 기본 종목 사용")
     
+    if args.shard:
+        index, count = args.shard
+        total = len(stocks)
+        stocks = select_shard(stocks, index, count)
+        print(f"🧩 샤드 {index}/{count}: {total}개 중 {len(stocks)}개 종목")
+        metrics.set("shard", index, of=count)
+    metrics.set("tickers", len(stocks))
+    universe = stocks  # 갱신할 시장만 고르기 전 전체 종목 (실행 스냅샷은 항상 전 종목을 담음)
+    
+    if args.backfill:
+        run_history(stocks, sync=True)
+        return
+    
+    # 장중인 시장은 매번, 닫힌 시장은 마감 후 한 번만 갱신
+    schedule = MarketSchedule()
+    if not (args.daemon or args.stream or args.force):
+        markets = {s['market'] for s in stocks}
+        due_markets = schedule.due_markets(markets)
+        skipped = sorted(markets - due_markets)
+        if skipped:
+            print(f"💤 장 마감 후 이미 갱신한 시장 건너뜀: {', '.join(skipped)}")
+        stocks = [s for s in stocks if s['market'] in due_markets]
+        if not stocks and not load_journal(NOTION_JOURNAL_PATH):
+            print(f"💤 갱신할 시장 없음, 종료 (임포트 {metrics.stage_seconds('import'):.2f}초)")
+            return
+    
+    with metrics.timer("import"):
+        from notion_sync import get_existing_pages, notion
+        router = build_router(providers)
+    print(f"🔌 데이터 제공자: {', '.join(router.providers)} (임포트 {metrics.stage_seconds('import'):.2f}초)")
+    
+    unsupported = [s['ticker'] for s in stocks if not router.supports(s['ticker'], s['market'])]
+    if unsupported:
+        print(f"⚠️  지원하는 데이터 제공자가 없어 제외: {', '.join(unsupported)}")
+        stocks = [s for s in stocks if s['ticker'] not in unsupported]
+    
     existing_pages = get_existing_pages()
+    queue = WriteQueue(existing_pages)
     
-    success_count = 0
-    fail_count = 0
+    print(f"⚙️  병렬 수집: 워커 {FETCH_WORKERS}개, 종목당 {f'{timeout:g}초' if timeout else '무제한'} 제한")
     
-    for stock_info in stocks:
-        ticker = stock_info['ticker']
-        market = stock_info['market']
+    if args.daemon:
+        from daemon import Daemon, DAEMON_INDEX_SYNC_MINUTES
+        last_sync = time.monotonic()
         
-        stock_data = get_stock_data(ticker, market)
+        def sync_index():
+            # 다른 곳에서 만들거나 지운 페이지를 반영 (매 주기마다 조회하지 않음)
+            nonlocal last_sync
+            if time.monotonic() - last_sync >= DAEMON_INDEX_SYNC_MINUTES * 60:
+                existing_pages.sync()
+                last_sync = time.monotonic()
         
-        if stock_data:
-            if create_or_update_page(stock_data, existing_pages):
-                success_count += 1
-            else:
-                fail_count += 1
-        else:
-            fail_count += 1
+        daemon = Daemon(lambda due, refreshed: run_cycle(router, due, existing_pages, queue, timeout,
+                                                          probe=not args.force, universe=universe,
+                                                          refreshed=refreshed),
+                        stocks, schedule, before_cycle=sync_index)
+        daemon.run()
+        counts = daemon.totals
+        print(f"🔁 데몬 종료: {daemon.cycles}회 갱신")
+    elif args.stream:
+        counts = run_stream_mode(router, stocks, existing_pages, queue, timeout, args.replay)
+    else:
+        started_at = datetime.now(timezone.utc)
+        refreshed = set()
+        counts = run_cycle(router, stocks, existing_pages, queue, timeout, probe=not args.force,
+                           universe=universe, refreshed=refreshed)
+        # 수집에 실패한 종목이 있는 시장은 기록하지 않아 다음 실행에서 다시 시도 (도중에 예외로 끝나면 아무 시장도 기록 안 함)
+        schedule.mark(refreshed, started_at)
+        schedule.save()
+        failed_markets = sorted({s['market'] for s in stocks} - refreshed)
+        if failed_markets:
+            print(f"⚠️  수집에 실패한 종목이 있는 시장은 다음 실행에서 다시 갱신: {', '.join(failed_markets)}")
+        if "yfinance" in router.providers:  # 일봉 저장소는 yfinance 제공자만 채움
+            run_history(stocks, sync=False)  # 새로 완성된 날만 추가
+    queue.close()
+    
+    record_metrics(router, queue, counts)
     
+    write_counts = {key: counts.get(key, 0) for key in ("생성", "업데이트", "변경 없음")}
     print("=" * 60)
-    print(f"✅ 성공: {success_count}개 | ❌ 실패: {fail_count}개")
+    print(f"✅ 성공: {counts.get('성공', 0)}개 | ❌ 실패: {counts.get('실패', 0)}개")
+    print(f"📝 노션: 생성 {write_counts['생성']}개 | 업데이트 {write_counts['업데이트']}개 | "
+          f"변경 없음 {write_counts['변경 없음']}개")
+    for line in router.summary():
+        print(f"🔌 {line}")
+    print(f"🔀 제공자 전환: {router.failovers}회")
+    print(f"📦 펀더멘털 캐시: {fundamentals_cache.summary()}")
+    if change_probe.probed:
+        print(f"🔎 변경 확인: {change_probe.summary()}")
+    print(f"📒 노션 쓰기 큐: {queue.summary()}")
+    print(f"🌐 노션 API: {notion.summary()}")
+    print(f"⏱️  단계별 시간: {metrics.summary()}")
     print("=" * 60)
 
 
@@ -0,0 +1,238 @@
+"""
+노션 쓰기 지연 큐 (write-behind) - 수집 단계와 노션 기록 단계를 분리
+
+수집 결과를 큐에 넣으면 워커 스레드가 노션에 기록하며, 같은 종목의 기록이 아직 보내지지 않은 채
+여러 번 들어오면 마지막 값만 보냅니다. 큐에 들어온 기록은 디스크 저널(JSON Lines)에 먼저 남기고
+완료/실패를 이어 적으므로, 프로세스가 죽거나 시간 초과로 끝나도 보내지 못한 기록은 다음 실행에서 다시 보냅니다.
+
+저널 한 줄은 다음 중 하나입니다.
+- {"seq", "ticker", "data", "attempts"}: 기록 요청 (같은 종목은 seq가 큰 요청이 이전 요청을 대체)
+- {"seq", "ticker", "done": true}: 해당 seq 기록 완료
+- {"seq", "ticker", "failed": true}: 해당 seq 기록 실패 (다음 실행에서 재시도)
+"""
+
+import os
+import json
+import time
+import threading
+from collections import deque
+from typing import Callable, Dict, Optional
+
+from metrics import metrics
+
+NOTION_JOURNAL_PATH = os.environ.get('NOTION_JOURNAL_PATH', '.cache/notion_journal.jsonl')  # 빈 값이면 저널 사용 안 함
+NOTION_JOURNAL_MAX_ATTEMPTS = int(os.environ.get('NOTION_JOURNAL_MAX_ATTEMPTS', '5'))  # 실행 간 재시도 횟수
+NOTION_FLUSH_TIMEOUT = float(os.environ.get('NOTION_FLUSH_TIMEOUT', '0'))  # 기록 완료 대기 시간 (초, 0이면 제한 없음)
+NOTION_JOURNAL_COMPACT_LINES = 1000  # 저널이 이보다 길어지면 남은 기록만 다시 씀
+
+
+def load_journal(path: str) -> Dict[str, Dict]:
+    """저널을 재생해 아직 완료되지 않은 종목별 마지막 기록 요청 반환
+
+    마지막 줄이 쓰다 끊긴 경우 등 읽을 수 없는 줄은 건너뜁니다.
+    """
+    entries: Dict[str, Dict] = {}
+    if not path:
+        return entries
+    try:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    ticker, seq = record['ticker'], record['seq']
+                except (ValueError, KeyError, TypeError):
+                    continue
+                if 'data' in record:
+                    if ticker not in entries or entries[ticker]['seq'] < seq:
+                        entries[ticker] = {"seq": seq, "ticker": ticker, "data": record['data'],
+                                           "attempts": record.get('attempts', 0)}
+                    continue
+                entry = entries.get(ticker)
+                if entry is None or entry['seq'] != seq:
+                    continue
+                if record.get('done'):
+                    del entries[ticker]
+                elif record.get('failed'):
+                    entry['attempts'] += 1
+    except OSError:
+        pass
+    return entries
+
+
+class WriteQueue:
+    """종목별로 병합되는 노션 쓰기 큐 (스레드 안전)
+
+    put()은 바로 반환하고, flush()가 큐가 빌 때까지 기다린 뒤 그동안 끝난 기록의 결과 개수를 반환합니다.
+    이전 실행에서 넘어온 기록은 이번 실행의 새 값으로 대체될 수 있도록 첫 flush() 때 보냅니다.
+    workers/write를 생략하면 NOTION_WORKERS와 notion_sync.create_or_update_page를 사용합니다.
+    """
+
+    def __init__(self, existing_pages: Dict[str, str], workers: Optional[int] = None,
+                 journal_path: str = NOTION_JOURNAL_PATH, max_attempts: int = NOTION_JOURNAL_MAX_ATTEMPTS,
+                 write: Optional[Callable[[Dict, Dict[str, str]], Optional[str]]] = None):
+        # 노션 클라이언트(requests)는 큐를 만들 때 임포트 (load_journal만 쓰는 경우 불필요)
+        from notion_sync import NOTION_WORKERS, create_or_update_page
+        workers = NOTION_WORKERS if workers is None else workers
+        write = write or create_or_update_page
+        
+        self.existing_pages = existing_pages
+        self.journal_path = journal_path
+        self.max_attempts = max_attempts
+        self.write = write
+        self.coalesced = 0  # 보내기 전에 새 값으로 대체된 기록 수
+        self.replayed = 0  # 이전 실행에서 넘어온 기록 수
+        self.dropped = 0  # 재시도 횟수를 넘겨 버린 기록 수
+
+        self._cond = threading.Condition()
+        self._pending: Dict[str, Dict] = {}  # 보낼 기록 (종목별 마지막 값)
+        self._failed: Dict[str, Dict] = {}  # 실패해서 다음 실행에 다시 보낼 기록
+        self._ready = deque()  # 워커가 가져갈 종목 순서
+        self._queued = set()
+        self._held = set()  # 첫 flush()까지 보내지 않는 이전 실행 기록
+        self._inflight = set()
+        self._counts: Dict[str, int] = {}
+        self._seq = 0
+        self._lines = 0
+        self._closed = False
+        self._journal = None
+
+        for ticker, entry in load_journal(journal_path).items():
+            self._seq = max(self._seq, entry['seq'])
+            if entry['attempts'] >= max_attempts:
+                print(f"⚠️  {ticker}: 노션 기록 {entry['attempts']}회 실패, 저널에서 제거")
+                self.dropped += 1
+                continue
+            self._pending[ticker] = entry
+            self._held.add(ticker)
+            self.replayed += 1
+        if self.replayed:
+            print(f"📒 이전 실행에서 보내지 못한 노션 기록 {self.replayed}개")
+        self._compact()
+
+        self._workers = [threading.Thread(target=self._work, daemon=True) for _ in range(max(1, workers))]
+        for worker in self._workers:
+            worker.start()
+
+    def _append(self, record: Dict):
+        if self._journal is not None:
+            self._journal.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._journal.flush()
+            self._lines += 1
+
+    def _compact(self):
+        """남은 기록(대기 + 실패)만으로 저널을 다시 씀"""
+        if not self.journal_path:
+            return
+        if self._journal is not None:
+            self._journal.close()
+        directory = os.path.dirname(self.journal_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        entries = sorted([*self._pending.values(), *self._failed.values()], key=lambda e: e['seq'])
+        tmp = f"{self.journal_path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.journal_path)
+        self._journal = open(self.journal_path, 'a', encoding='utf-8')
+        self._lines = len(entries)
+
+    def _make_ready(self, ticker: str):
+        if ticker not in self._queued and ticker not in self._inflight:
+            self._ready.append(ticker)
+            self._queued.add(ticker)
+            self._cond.notify()
+
+    def put(self, stock_data: Dict):
+        """기록 요청 (같은 종목의 보내지 않은 이전 요청은 대체)"""
+        ticker = stock_data['티커']
+        with self._cond:
+            self._seq += 1
+            entry = {"seq": self._seq, "ticker": ticker, "data": stock_data, "attempts": 0}
+            self._append(entry)
+            if ticker in self._pending and ticker not in self._inflight:
+                self.coalesced += 1
+            self._pending[ticker] = entry
+            self._failed.pop(ticker, None)
+            self._held.discard(ticker)
+            self._make_ready(ticker)
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._ready and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                ticker = self._ready.popleft()
+                self._queued.discard(ticker)
+                entry = self._pending[ticker]
+                self._inflight.add(ticker)
+
+            try:
+                with metrics.timer("notion_write", ticker):
+                    action = self.write(entry['data'], self.existing_pages)
+            except Exception as e:
+                print(f"❌ {ticker} 노션 처리 중 오류: {str(e)}")
+                action = None
+
+            with self._cond:
+                self._inflight.discard(ticker)
+                key = action or "실패"
+                self._counts[key] = self._counts.get(key, 0) + 1
+                if action:
+                    self._counts["성공"] = self._counts.get("성공", 0) + 1
+                self._append({"seq": entry['seq'], "ticker": ticker, **({"done": True} if action else {"failed": True})})
+                if self._pending.get(ticker) is entry:
+                    del self._pending[ticker]
+                    if not action:
+                        self._failed[ticker] = dict(entry, attempts=entry['attempts'] + 1)
+                else:
+                    # 보내는 동안 새 값이 들어왔으면 이어서 보냄
+                    self._make_ready(ticker)
+                self._cond.notify_all()
+
+    def flush(self, timeout: float = NOTION_FLUSH_TIMEOUT, wait: bool = True) -> Dict[str, int]:
+        """큐가 빌 때까지 기다린 뒤(timeout초, 0이면 제한 없음) 지난 flush() 이후 끝난 기록의 결과 개수 반환
+
+        wait=False면 기다리지 않고 지금까지의 결과만 반환합니다. 시간 안에 보내지 못한 기록은
+        저널에 남아 다음 실행에서 다시 보냅니다.
+        """
+        deadline = time.monotonic() + timeout if timeout else None
+        with self._cond:
+            for ticker in list(self._held):
+                self._make_ready(ticker)
+            self._held.clear()
+            while wait and (self._pending or self._inflight):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    print(f"⏳ 노션 기록 {len(self._pending)}개 대기 중 (다음 실행에서 다시 보냄)")
+                    break
+                self._cond.wait(remaining)
+            counts, self._counts = self._counts, {}
+            if self._journal is not None:
+                os.fsync(self._journal.fileno())
+                if self._lines > max(NOTION_JOURNAL_COMPACT_LINES, 4 * (len(self._pending) + len(self._failed))):
+                    self._compact()
+        return counts
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def close(self):
+        """워커를 멈추고 남은 기록만 저널에 남김 (보내는 중인 기록은 기다리지 않음)"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            self._compact()
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+    def summary(self) -> str:
+        with self._cond:
+            return (f"병합 {self.coalesced}개 | 이전 실행 재전송 {self.replayed}개 | "
+                    f"대기 {len(self._pending)}개 | 재시도 예정 {len(self._failed)}개")